@@ -0,0 +1,84 @@
+"""
+Pattern and function lookups of FunctionProvider with the prefix/n-gram index
+against the linear scan they replaced, on a pattern library scaled up from
+patterns.json.
+
+    python -m benchmarks.autocomplete_index_benchmark --sizes 1000 10000 50000
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from src.app.core.autocomplete.function_provider import FunctionProvider, PatternStore
+
+PATTERNS_FILE = Path(__file__).parent.parent / "src" / "app" / "core" / "autocomplete" / "patterns.json"
+# what a user types, one keystroke at a time
+TYPED = ("quadratic", "sin(x", "x**2 + ", "log", "derivative", "zeta")
+VARIABLES = "xyztuvw"
+
+
+def scaled_library(size: int, seed: int = 0) -> dict:
+    """size patterns made from the real ones, renamed and with varied templates"""
+    rng = random.Random(seed)
+    base = json.loads(PATTERNS_FILE.read_text(encoding="utf-8"))
+    originals = [(category, item) for category, items in base.items() for item in items]
+    library = {}
+    for number in range(size):
+        category, item = originals[number % len(originals)]
+        variable = rng.choice(VARIABLES)
+        library.setdefault(category, []).append({
+            "name": f"{item['name']}_{number}",
+            "pattern": item["pattern"].replace("x", variable) + f" + {rng.randint(1, 99)}*{variable}",
+            "description": f"{item['description']} variant {number}",
+            "category": item.get("category", category),
+            "commonness": rng.randint(1, 100),
+        })
+    return library
+
+
+def linear_find(store: PatternStore, partial_text: str):
+    # find_matching_patterns before the index
+    text = partial_text.lower().strip()
+    if not text:
+        return []
+    matches = [pattern for pattern in store.patterns if store._matches_text(text, pattern)]
+    return sorted(matches, key=lambda pattern: (store._similarity_score(text, pattern), pattern.commonness), reverse=True)
+
+
+def time_queries(function, queries) -> float:
+    started = time.perf_counter()
+    for query in queries:
+        function(query)
+    return (time.perf_counter() - started) / len(queries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args(argv)
+
+    queries = [word[:length] for word in TYPED for length in range(1, len(word) + 1)]
+    print(f"{len(queries)} keystrokes per run")
+    print(f"{'patterns':>9} {'build ms':>9} {'linear ms/key':>14} {'index ms/key':>13} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = Path(directory) / f"patterns_{size}.json"
+            path.write_text(json.dumps(scaled_library(size)), encoding="utf-8")
+
+            started = time.perf_counter()
+            provider = FunctionProvider(patterns_path=path)
+            build = time.perf_counter() - started
+            store = provider.pattern_store
+
+            for query in queries:
+                assert store.find_matching_patterns(query) == linear_find(store, query), query
+            linear = time_queries(lambda query: linear_find(store, query), queries)
+            indexed = time_queries(store.find_matching_patterns, queries)
+            print(f"{size:>9} {build * 1000:>9.0f} {linear * 1000:>14.2f} {indexed * 1000:>13.2f} {linear / indexed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Suggestion latency per keystroke: FunctionProvider, HistoryProvider,
+PatternProvider and _merge_and_rank driven by synthetic typing traces, for
+growing history sizes. Runs without a display (QCoreApplication, and a plain
+object in place of HistoryPanel).
+
+Reports p50/p95/p99 milliseconds and the memory allocated per keystroke, and
+exits with status 1 when a limit is exceeded:
+
+    python -m benchmarks.autocomplete_latency_benchmark --history-sizes 0 1000 10000
+    python -m benchmarks.autocomplete_latency_benchmark --save baseline.json
+    python -m benchmarks.autocomplete_latency_benchmark --baseline baseline.json --tolerance 0.25
+    python -m benchmarks.autocomplete_latency_benchmark --max-p95 50
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+from PyQt6.QtCore import QCoreApplication
+
+from src.app.core.autocomplete.autocomplete_manager import AutocompleteManager
+from src.app.core.symbolic_engine import SymbolicEngine
+
+# what a user types, one keystroke at a time
+TRACES = (
+    "sin(x)**2 + cos(x)**2",
+    "integrate(x*exp(x), x)",
+    "x**2 + 5*x + 6",
+    "sqrt(x**2 + 1) - log(x)",
+    "diff(tan(x)/x, x)",
+    "a*x**2 + b*x + c",
+)
+OPERATIONS = ("simplify", "expand", "factor", "differentiate", "integrate")
+FUNCTIONS = ("sin", "cos", "tan", "exp", "log", "sqrt", "sinh", "atan")
+VARIABLES = "xyzt"
+STAGES = ("function", "history", "pattern", "merge", "total")
+PERCENTILES = (50, 95, 99)
+
+
+class HeadlessHistory:
+    # the part of HistoryPanel that HistoryProvider reads
+    def __init__(self, calculation_history):
+        self.calculation_history = calculation_history
+
+
+def synthetic_history(size: int, seed: int = 0) -> list:
+    """size history items in the "operation: expression => result" format of HistoryPanel"""
+    rng = random.Random(seed)
+    items = []
+    for _ in range(size):
+        variable = rng.choice(VARIABLES)
+        terms = [f"{rng.randint(1, 9)}*{rng.choice(FUNCTIONS)}({variable})" for _ in range(rng.randint(1, 3))]
+        terms.append(f"{variable}**{rng.randint(2, 5)}")
+        rng.shuffle(terms)
+        items.append(f"{rng.choice(OPERATIONS)}: {' + '.join(terms)} => result")
+    return items
+
+
+def keystrokes(manager: AutocompleteManager) -> list:
+    # the texts that on_text_changed would start a search for
+    texts = []
+    for trace in TRACES:
+        for length in range(manager.min_chars_trigger, len(trace) + 1):
+            text = trace[:length]
+            token = manager._get_current_token(text)
+            if token and not token.replace('.', '').replace('-', '').isdigit():
+                texts.append(text)
+    return texts
+
+
+def search(manager: AutocompleteManager, text: str, timings=None):
+    """one search as the manager's worker runs it, with the time of every stage"""
+    clock = time.perf_counter
+    started = clock()
+    manager.current_input = text
+    token = manager._get_current_token(text)
+    function = manager.function_provider.get_suggestions(token)
+    function_done = clock()
+    history = manager.history_provider.get_suggestions(token)
+    history_done = clock()
+    pattern = manager.pattern_provider.get_suggestions(text)
+    pattern_done = clock()
+    manager._merge_and_rank([function, history, pattern])[:10]
+    merge_done = clock()
+    if timings is not None:
+        timings["function"].append(function_done - started)
+        timings["history"].append(history_done - function_done)
+        timings["pattern"].append(pattern_done - history_done)
+        timings["merge"].append(merge_done - pattern_done)
+        timings["total"].append(merge_done - started)
+
+
+def measure(history_size: int, repeat: int) -> dict:
+    manager = AutocompleteManager(SymbolicEngine(), HeadlessHistory(synthetic_history(history_size)), threaded=False)
+    # accepted suggestions, so history scoring includes expressions with usage statistics
+    for expression in manager.history_provider.history_index.expressions()[::50]:
+        manager.history_provider.record_usage(expression)
+    texts = keystrokes(manager)
+    search(manager, texts[0])  # warm up the lazy parts
+
+    timings = {stage: [] for stage in STAGES}
+    for _ in range(repeat):
+        for text in texts:
+            search(manager, text, timings)
+
+    # separate pass, tracing allocations slows everything down
+    allocated = []
+    tracemalloc.start()
+    try:
+        for text in texts:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            search(manager, text)
+            allocated.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+
+    result = {"keystrokes": len(texts)}
+    for stage in STAGES:
+        milliseconds = np.array(timings[stage]) * 1000
+        for percentile in PERCENTILES:
+            result[f"{stage}_p{percentile}"] = float(np.percentile(milliseconds, percentile))
+    result["alloc_kib_mean"] = float(np.mean(allocated)) / 1024
+    result["alloc_kib_p95"] = float(np.percentile(allocated, 95)) / 1024
+    return result
+
+
+def print_results(results: dict):
+    for size, result in results.items():
+        print(f"\nhistory size {size}, {result['keystrokes']} keystrokes, "
+              f"allocated per keystroke {result['alloc_kib_mean']:.1f} KiB mean, "
+              f"{result['alloc_kib_p95']:.1f} KiB p95")
+        print(f"{'stage':>9} " + " ".join(f"{f'p{p} ms':>9}" for p in PERCENTILES))
+        for stage in STAGES:
+            print(f"{stage:>9} " + " ".join(f"{result[f'{stage}_p{p}']:>9.2f}" for p in PERCENTILES))
+
+
+def regressions(results: dict, baseline: dict, tolerance: float, max_p95: float = None) -> list:
+    """
+    what exceeds a limit: total p95 above max_p95 milliseconds, or any p95 /
+    allocation figure more than tolerance (0.25 = 25%) above the baseline run
+    """
+    failures = []
+    for size, result in results.items():
+        if max_p95 is not None and result["total_p95"] > max_p95:
+            failures.append(f"history {size}: total p95 {result['total_p95']:.2f} ms > {max_p95:.2f} ms")
+        previous = baseline.get(str(size))
+        if not previous:
+            continue
+        for key in [f"{stage}_p95" for stage in STAGES] + ["alloc_kib_mean"]:
+            if key in previous and result[key] > previous[key] * (1 + tolerance):
+                failures.append(f"history {size}: {key} {result[key]:.2f} > {previous[key]:.2f} "
+                                f"+ {tolerance:.0%}")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history-sizes", type=int, nargs="+", default=[0, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3, help="times every trace is typed")
+    parser.add_argument("--save", type=Path, help="write the results to this json file")
+    parser.add_argument("--baseline", type=Path, help="results saved by an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression over the baseline")
+    parser.add_argument("--max-p95", type=float, help="fail when the total p95 is above this many ms")
+    args = parser.parse_args(argv)
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    results = {str(size): measure(size, args.repeat) for size in args.history_sizes}
+    print_results(results)
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else {}
+    failures = regressions(results, baseline, args.tolerance, args.max_p95)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Compares the token based parse_expression with the previous string rewriting
+pipeline on long inputs, and full validation with IncrementalValidator when
+an expression is typed one character at a time. Exits with status 1 when
+parse_expression is slower than the old pipeline at any size of at least
+GATE_MIN_CHARS characters; shorter inputs are timed but too noisy to gate on.
+
+    python -m benchmarks.parser_benchmark
+    python -m benchmarks.parser_benchmark --min-speedup 1.2
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from src.app.core.parser_validator import IncrementalValidator, parse_expression, validate
+
+TERM = "3x² + sin(2x) - √(x + 1)/4 + "
+GATE_MIN_CHARS = 100
+
+
+# ---------- the old pipeline ----------
+# parser_validator before the tokenizer, kept here as the baseline
+
+def validate_characters(expr):
+    allowed = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789+-*/^.()_ ²³√"
+    for ch in expr:
+        if ch not in allowed:
+            return f"Invalid character: '{ch}'"
+    return None
+
+
+def validate_parentheses(expr):
+    count = 0
+    for ch in expr:
+        if ch == "(":
+            count += 1
+        elif ch == ")":
+            count -= 1
+            if count < 0:
+                return "Closing parenthesis without opening one"
+    if count != 0:
+        return "Unmatched parentheses"
+    return None
+
+
+def validate_operators(expr):
+    bad_sequences = ["++", "--", "**", "//", "..", "+*", "+/", "*-", "*/"]
+    for seq in bad_sequences:
+        if seq in expr:
+            return f"Invalid operator sequence: '{seq}'"
+    stripped = expr.strip()
+    if stripped[0] in "*/.^":
+        return "Expression cannot start with operator"
+    if stripped[-1] in "+-*/^.":
+        return "Expression cannot end with operator"
+    return None
+
+
+def handle_powers(expr):
+    expr = expr.replace("x²", "x^2")
+    expr = expr.replace("x³", "x^3")
+    expr = expr.replace("²", "^2")
+    expr = expr.replace("³", "^3")
+    expr = expr.replace("^", "**")
+    return expr
+
+
+def handle_roots(expr):
+    expr = expr.replace("√(", "sqrt(")
+    expr = expr.replace("**(1/2)", ")__SQRT__")
+    expr = expr.replace("(1/2)", "__SQRT__")
+    expr = expr.replace("(1/3)", "__CBRT__")
+    expr = expr.replace("**(1/", "__ROOT__(")
+    return expr
+
+
+def handle_implicit_multiplication(expr):
+    result = ""
+    for i in range(len(expr) - 1):
+        a, b = expr[i], expr[i+1]
+        if a.isdigit() and b.isalpha():
+            result += a + "*"
+            continue
+        if a.isalpha() and b.isdigit():
+            result += a + "*"
+            continue
+        if a == ")" and (b.isalpha() or b.isdigit()):
+            result += a + "*"
+            continue
+        if a.isalpha() and b == "(":
+            result += a + "*"
+            continue
+        result += a
+    result += expr[-1]
+    return result
+
+
+def handle_functions(expr):
+    repl = {
+        "sin(": "SIN(",
+        "cos(": "COS(",
+        "tan(": "TAN(",
+        "sinh(": "SINH(",
+        "cosh(": "COSH(",
+        "tanh(": "TANH(",
+        "asin(": "ASIN(",
+        "acos(": "ACOS(",
+        "atan(": "ATAN(",
+        "ln(": "LN(",
+        "log(": "LOG(",
+        "exp(": "EXP("
+    }
+    for k, v in repl.items():
+        expr = expr.replace(k, v)
+    return expr
+
+
+def handle_constants(expr):
+    expr = expr.replace("pi", "PI")
+    expr = expr.replace("e", "E")
+    return expr
+
+
+def legacy_parse_expression(expr):
+    # parse_expression before the tokenizer: one pass over the string per check and rewrite
+    expr = expr.replace(" ", "")
+    for check in (validate_characters, validate_parentheses, validate_operators):
+        err = check(expr)
+        if err:
+            return {"error": err}
+    for rewrite in (handle_powers, handle_roots, handle_implicit_multiplication, handle_functions, handle_constants):
+        expr = rewrite(expr)
+    return {"parsed": expr}
+
+
+def timed(function) -> float:
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def best_of(function, repeat: int) -> float:
+    return min(timed(function) for _ in range(repeat))
+
+
+def bench_parse(sizes, repeat) -> dict:
+    """text length -> how many times faster parse_expression is than the old pipeline"""
+    speedups = {}
+    print(f"{'terms':>8} {'chars':>8} {'legacy ms':>11} {'tokens ms':>11} {'speedup':>8}")
+    for terms in sizes:
+        text = TERM * terms + "x"
+        # short inputs run too fast for one call to be timed
+        calls = max(1, 20000 // len(text))
+        legacy_times, token_times = [], []
+        # alternating the two keeps a slow moment of the machine from landing on one side
+        for _ in range(repeat):
+            legacy_times.append(timed(lambda: [legacy_parse_expression(text) for _ in range(calls)]) / calls)
+            token_times.append(timed(lambda: [parse_expression(text) for _ in range(calls)]) / calls)
+        speedup = statistics.median(legacy / tokens for legacy, tokens in zip(legacy_times, token_times))
+        speedups[len(text)] = speedup
+        print(f"{terms:>8} {len(text):>8} {min(legacy_times) * 1000:>11.3f} {min(token_times) * 1000:>11.3f} "
+              f"{speedup:>7.2f}x")
+    return speedups
+
+
+def bench_typing(terms, repeat):
+    # validate after every keystroke, as live highlighting does
+    text = TERM * terms + "x"
+    prefixes = [text[:i] for i in range(1, len(text) + 1)]
+
+    def full():
+        for prefix in prefixes:
+            validate(prefix)
+
+    def incremental():
+        validator = IncrementalValidator()
+        for prefix in prefixes:
+            validator.update(prefix)
+
+    full_time = best_of(full, repeat)
+    incremental_time = best_of(incremental, repeat)
+    per_key = 1e6 / len(prefixes)
+    print(f"typing {len(text)} chars: full {full_time * per_key:.1f} us/key, "
+          f"incremental {incremental_time * per_key:.1f} us/key ({full_time / incremental_time:.1f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 5000])
+    parser.add_argument("--typing-terms", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-speedup", type=float, default=1.0,
+                        help="fail when parse_expression is less than this many times as fast as the old pipeline")
+    args = parser.parse_args(argv)
+    speedups = bench_parse(args.sizes, args.repeat)
+    bench_typing(args.typing_terms, max(1, args.repeat // 2))
+
+    failures = [f"{chars} chars: {speedup:.2f}x < {args.min_speedup:.2f}x"
+                for chars, speedup in speedups.items() if chars >= GATE_MIN_CHARS and speedup < args.min_speedup]
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+"""
+Headless batch evaluation, no QApplication needed.
+
+    python -m src.app.batch expressions.txt --operation simplify -o results.jsonl
+    cat items.jsonl | python -m src.app.batch --workers 4 --timeout 5
+
+Input is one expression per line, or JSONL objects with "expression" and
+optionally "operation", "optional" (the second input: variable, second
+equation or substitutions such as "x=3, y=5") and "id". Expressions can be
+written as in the main window (2x, x², π). Every item produces
+one JSON line on the output, in input order. Throughput stats go to stderr.
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .core.operation_runner import ERROR_RESULTS, OPERATIONS, OperationRunner, worker_loop
+from .core.math_formatter import MathFormatter
+from .core.time_budget import BudgetExceeded, run_with_budget
+
+
+@dataclass
+class BatchItem:
+    index: int  # position in the input, results are written in this order
+    id: object
+    operation: str
+    expression: str
+    optional: Optional[str] = None
+    error: Optional[str] = None  # the input line itself was unusable
+
+
+def read_items(lines: Iterable[str], default_operation: str = "simplify",
+               input_format: str = "auto") -> Iterator[BatchItem]:
+    index = 0
+    for line_number, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text:
+            continue
+        is_json = input_format == "jsonl" or (input_format == "auto" and text.startswith("{"))
+        if not is_json:
+            if text.startswith("#"):
+                continue
+            yield BatchItem(index, line_number, default_operation, text)
+            index += 1
+            continue
+
+        try:
+            record = json.loads(text)
+            if not isinstance(record, dict) or not record.get("expression"):
+                raise ValueError("expected an object with an \"expression\" field")
+            operation = record.get("operation", default_operation)
+            # the worker also takes internal messages (warm-up, preview), only real operations get through
+            if operation not in OPERATIONS:
+                raise ValueError(f"unknown operation {operation!r}")
+            yield BatchItem(
+                index,
+                record.get("id", line_number),
+                operation,
+                str(record["expression"]),
+                record.get("optional"),
+            )
+        except ValueError as e:  # json.JSONDecodeError is a ValueError
+            yield BatchItem(index, line_number, default_operation, text, error=f"Invalid input line: {e}")
+        index += 1
+
+
+def internal_inputs(item: BatchItem) -> Tuple[str, Optional[str]]:
+    # the same notation the main window accepts: 2x, x², ×, π ...
+    optional = MathFormatter.to_internal(item.optional) if item.optional else item.optional
+    return MathFormatter.to_internal(item.expression), optional
+
+
+def make_record(item: BatchItem, status: str, payload: str, info: Dict, seconds: float) -> Dict:
+    if status == "ok" and payload in ERROR_RESULTS:
+        status = "error"
+    record = {"id": item.id, "operation": item.operation, "expression": item.expression}
+    if item.optional is not None:
+        record["optional"] = item.optional
+    record["status"] = status
+    if status == "ok":
+        record["result"] = payload
+        if info:
+            record["strategy"] = info.get("strategy")
+            record["partial"] = info.get("partial", False)
+    else:
+        record["error"] = payload
+    record["seconds"] = round(seconds, 6)
+    return record
+
+
+def run_inline(items: Iterable[BatchItem], timeout: Optional[float] = None) -> Iterator[Dict]:
+    """
+    Evaluates in this process, mostly for debugging. The timeout uses
+    time_budget, so a stuck C extension call cannot be interrupted here.
+    """
+    runner = OperationRunner()
+    for item in items:
+        if item.error:
+            yield make_record(item, "error", item.error, {}, 0.0)
+            continue
+        started = time.monotonic()
+        try:
+            expression, optional = internal_inputs(item)
+            # the solvers print messages, stdout only carries the records
+            with contextlib.redirect_stdout(sys.stderr):
+                result = run_with_budget(
+                    lambda: runner.run(item.operation, expression, optional, optional),
+                    timeout,
+                )
+            yield make_record(item, "ok", result, runner.last_evaluation, time.monotonic() - started)
+        except BudgetExceeded:
+            yield make_record(item, "timeout", f"No result within {timeout:g}s", {}, time.monotonic() - started)
+        except Exception as e:
+            yield make_record(item, "error", str(e), {}, time.monotonic() - started)
+
+
+def _worker_main(conn):
+    # the workers share stdout with the records, what the solvers print goes to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        worker_loop(conn, None)
+
+
+class _Worker:
+    # one evaluation process running operation_runner.worker_loop
+
+    def __init__(self, context):
+        parent_conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.item: Optional[BatchItem] = None
+        self.started = 0.0
+        # importing sympy takes a second or two; a throwaway job tells us when
+        # the worker is ready so start-up does not count against an item's timeout
+        self.warming_up = True
+        self.conn.send((-1, "simplify", "0", None, None))
+
+    def submit(self, item: BatchItem):
+        self.item = item
+        self.started = time.monotonic()
+        expression, optional = internal_inputs(item)
+        self.conn.send((item.index, item.operation, expression, optional, optional))
+
+    def stop(self, graceful: bool):
+        if graceful and self.process.is_alive():
+            try:
+                self.conn.send(None)
+                self.process.join(2)
+            except (BrokenPipeError, OSError):
+                pass
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1)
+        self.conn.close()
+
+
+def run_pool(items: Iterable[BatchItem], workers: int, timeout: Optional[float] = None) -> Iterator[Dict]:
+    """
+    Evaluates with a pool of worker processes. An item that runs past the
+    timeout gets its worker killed and replaced, like a cancelled job in the GUI.
+    """
+    # spawn, same as the GUI executor, so the workers start from a clean interpreter
+    context = multiprocessing.get_context("spawn")
+    pool: List[_Worker] = [_Worker(context) for _ in range(max(1, workers))]
+    items = iter(items)
+    exhausted = False
+    finished: Dict[int, Dict] = {}  # results waiting for an earlier, slower item
+    next_index = 0
+
+    try:
+        while True:
+            for worker in pool:
+                while worker.item is None and not worker.warming_up and not exhausted:
+                    item = next(items, None)
+                    if item is None:
+                        exhausted = True
+                    elif item.error:
+                        finished[item.index] = make_record(item, "error", item.error, {}, 0.0)
+                    else:
+                        worker.submit(item)
+
+            busy = [worker for worker in pool if worker.item is not None]
+            if not busy and (exhausted or not any(worker.warming_up for worker in pool)):
+                break
+
+            wait_for = None
+            if timeout and busy:
+                deadline = min(worker.started for worker in busy) + timeout
+                wait_for = max(deadline - time.monotonic(), 0)
+            ready = wait([worker.conn for worker in pool if worker.item is not None or worker.warming_up],
+                         timeout=wait_for)
+
+            for index, worker in enumerate(pool):
+                if worker.warming_up and worker.conn in ready:
+                    try:
+                        worker.conn.recv()
+                        worker.warming_up = False
+                    except (EOFError, OSError):
+                        worker.stop(graceful=False)
+                        pool[index] = _Worker(context)
+                    continue
+                if worker.item is None:
+                    continue
+                item, elapsed = worker.item, time.monotonic() - worker.started
+                if worker.conn in ready:
+                    try:
+                        _job_id, status, payload, info = worker.conn.recv()
+                        finished[item.index] = make_record(item, status, payload, info, elapsed)
+                        worker.item = None
+                        continue
+                    except (EOFError, OSError):
+                        record = make_record(item, "error", "Evaluation worker stopped unexpectedly.", {}, elapsed)
+                elif timeout and elapsed >= timeout:
+                    record = make_record(item, "timeout", f"No result within {timeout:g}s", {}, elapsed)
+                else:
+                    continue
+                # the worker is stuck or gone, a fresh one takes its place
+                worker.stop(graceful=False)
+                pool[index] = _Worker(context)
+                finished[item.index] = record
+
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+
+        for index in sorted(finished):
+            yield finished[index]
+    finally:
+        for worker in pool:
+            worker.stop(graceful=worker.item is None)
+
+
+class BatchStats:
+
+    def __init__(self):
+        self.counts = {"ok": 0, "error": 0, "timeout": 0}
+        self.latencies: List[float] = []
+        self.started = time.monotonic()
+
+    def add(self, record: Dict):
+        self.counts[record["status"]] = self.counts.get(record["status"], 0) + 1
+        self.latencies.append(record["seconds"])
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.started
+        total = len(self.latencies)
+        lines = [
+            f"items: {total}  ok: {self.counts['ok']}  errors: {self.counts['error']}  "
+            f"timeouts: {self.counts['timeout']}",
+            f"wall time: {elapsed:.2f}s  throughput: {total / elapsed if elapsed > 0 else 0:.1f} items/s",
+        ]
+        if total:
+            latencies = sorted(self.latencies)
+            p50 = latencies[int(0.50 * (total - 1))]
+            p95 = latencies[int(0.95 * (total - 1))]
+            lines.append(f"latency p50: {p50:.4f}s  p95: {p95:.4f}s  max: {latencies[-1]:.4f}s")
+        return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.app.batch",
+        description="Evaluate expressions without the GUI and write the results as JSONL.",
+    )
+    parser.add_argument("input", nargs="?", default="-", help="input file, '-' for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout (default)")
+    parser.add_argument("--operation", default="simplify", choices=OPERATIONS,
+                        help="operation for items that do not name one (default: simplify)")
+    parser.add_argument("--format", dest="input_format", default="auto", choices=("auto", "lines", "jsonl"),
+                        help="input format, auto treats lines starting with '{' as JSON")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes, 0 evaluates in this process")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="seconds per item before it is reported as a timeout, 0 disables")
+    parser.add_argument("--quiet", action="store_true", help="do not print stats to stderr")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    timeout = args.timeout if args.timeout > 0 else None
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    stats = BatchStats()
+    try:
+        items = read_items(source, args.operation, args.input_format)
+        if args.workers > 0:
+            records = run_pool(items, args.workers, timeout)
+        else:
+            records = run_inline(items, timeout)
+        for record in records:
+            target.write(json.dumps(record) + "\n")
+            stats.add(record)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+        else:
+            target.flush()
+
+    if not args.quiet:
+        print(stats.summary(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Adaptive sampling of y = f(x) for 2D plots.
+Instead of a fixed linspace, intervals are halved where the curve bends (the
+midpoint is far from the straight line between the ends) until the error is
+below a fraction of the plot height or the point budget is spent. Jumps that
+survive refinement down to the smallest interval are treated as
+discontinuities and broken with NaN so matplotlib does not draw vertical spikes.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class SampleResult:
+    xs: np.ndarray
+    ys: np.ndarray  # contains NaN where the line must be broken
+    evaluations: int
+    discontinuities: int
+    y_limits: Optional[Tuple[float, float]] = None  # suggested view when the curve blows up
+
+
+def evaluate(f: Callable, xs: np.ndarray) -> np.ndarray:
+    with np.errstate(all="ignore"):
+        ys = np.asarray(f(xs))
+    if ys.shape != xs.shape:
+        ys = np.broadcast_to(ys, xs.shape)
+    if np.iscomplexobj(ys):
+        # keep values that are real up to rounding, the rest cannot be plotted
+        real = np.where(np.abs(ys.imag) < 1e-12, ys.real, np.nan)
+        return real.astype(float)
+    return ys.astype(float)
+
+
+def robust_scale(ys: np.ndarray) -> Tuple[float, float, float]:
+    finite = ys[np.isfinite(ys)]
+    if finite.size == 0:
+        return 0.0, 1.0, 1.0
+    low, high = np.percentile(finite, [5, 95])
+    scale = high - low
+    if scale <= 0:
+        scale = max(abs(high), 1.0)
+    return float(low), float(high), float(scale)
+
+
+def uniform_sample(f: Callable, x_min: float, x_max: float, num_points: int = 1000) -> SampleResult:
+    xs = np.linspace(float(x_min), float(x_max), num_points)
+    return SampleResult(xs, evaluate(f, xs), num_points, 0)
+
+
+def sample_function(f: Callable, x_min: float, x_max: float, num_points: int = 1000,
+                    mode: str = "adaptive") -> SampleResult:
+    if mode == "adaptive":
+        return adaptive_sample(f, x_min, x_max, max_points=num_points)
+    if mode == "uniform":
+        return uniform_sample(f, x_min, x_max, num_points)
+    raise ValueError(f"Unknown sampling mode: {mode}")
+
+
+def adaptive_sample(
+    f: Callable,
+    x_min: float,
+    x_max: float,
+    max_points: int = 1000,
+    initial_points: int = 65,
+    tolerance: float = 1e-3,
+    max_depth: int = 16,
+    jump_fraction: float = 0.25,
+) -> SampleResult:
+    """
+    f must accept a numpy array. tolerance is relative to the robust y range,
+    max_points bounds the number of evaluations of f.
+    """
+    # a reversed range is sampled the same way, interval widths must stay positive
+    x_min, x_max = sorted((float(x_min), float(x_max)))
+    initial_points = max(3, min(initial_points, max_points))
+    xs = np.linspace(x_min, x_max, initial_points)
+    ys = evaluate(f, xs)
+    evaluations = initial_points
+    min_width = (x_max - x_min) / (initial_points - 1) / (2 ** max_depth)
+
+    # the view is judged on the uniform first pass, later samples cluster
+    # around features and would skew the percentiles
+    low, high, scale = robust_scale(ys)
+    clip_low, clip_high = low - 2 * scale, high + 2 * scale
+
+    def on_screen(values):
+        return np.clip(values, clip_low, clip_high)
+
+    # part of the budget is kept back for pinning down jumps (see _locate_jumps)
+    refine_budget = max_points - max_points // 5
+    active = np.ones(len(xs) - 1, dtype=bool)  # intervals still worth refining
+
+    while active.any() and evaluations < refine_budget:
+        left = np.nonzero(active)[0]
+        widths = xs[left + 1] - xs[left]
+        left = left[widths > 2 * min_width]
+        if left.size == 0:
+            break
+        # spend what is left of the budget on the worst intervals first
+        budget = refine_budget - evaluations
+        if left.size > budget:
+            bend = np.abs(np.diff(on_screen(ys))[left])
+            bend = np.where(np.isfinite(bend), bend, np.inf)
+            left = np.sort(left[np.argsort(-bend, kind="stable")[:budget]])
+
+        mids = (xs[left] + xs[left + 1]) / 2
+        mid_ys = evaluate(f, mids)
+        evaluations += mids.size
+
+        # error is measured on screen: values far outside the view are clipped,
+        # so the steep flanks of an asymptote do not eat the budget
+        linear = (on_screen(ys[left]) + on_screen(ys[left + 1])) / 2
+        error = np.abs(on_screen(mid_ys) - linear)
+        # NaN/inf on either side: refine to find where the function stops being defined
+        undefined = ~(np.isfinite(mid_ys) & np.isfinite(ys[left]) & np.isfinite(ys[left + 1]))
+        needs_more = undefined & ~(np.isnan(mid_ys) & np.isnan(ys[left]) & np.isnan(ys[left + 1]))
+        needs_more |= ~undefined & (error > tolerance * scale)
+
+        xs = np.insert(xs, left + 1, mids)
+        ys = np.insert(ys, left + 1, mid_ys)
+
+        # each refined interval becomes two; both halves inherit the verdict
+        new_active = np.zeros(len(xs) - 1, dtype=bool)
+        new_left = left + np.arange(left.size)
+        new_active[new_left] = needs_more
+        new_active[new_left + 1] = needs_more
+        active = new_active
+
+    xs, ys, breaks, evaluations = _locate_jumps(
+        f, xs, ys, on_screen, jump_fraction * scale, min_width, max_points, evaluations)
+
+    if breaks:
+        # a NaN between the two sides of a jump makes matplotlib lift the pen
+        cut = np.searchsorted(xs, breaks)
+        xs = np.insert(xs, cut, breaks)
+        ys = np.insert(ys, cut, np.nan)
+
+    y_limits = None
+    finite = ys[np.isfinite(ys)]
+    if finite.size and (finite.max() - finite.min()) > 10 * scale:
+        margin = 0.5 * scale
+        y_limits = (low - margin, high + margin)
+
+    return SampleResult(xs, ys, evaluations, len(breaks), y_limits)
+
+
+def _locate_jumps(f, xs, ys, on_screen, jump_size, min_width, max_points, evaluations):
+    """
+    Bisects every interval whose on-screen jump is larger than jump_size, always
+    following the half that keeps the jump. A jump that is still there when the
+    interval is down to min_width is a discontinuity; a steep but continuous
+    curve loses it on the way down.
+    """
+    dy = np.abs(np.diff(on_screen(ys)))
+    candidates = np.nonzero(np.isfinite(dy) & (dy > jump_size))[0]
+    candidates = candidates[np.argsort(-dy[candidates], kind="stable")]
+
+    extra_xs, extra_ys, breaks = [], [], []
+    for index in candidates:
+        a, b = xs[index], xs[index + 1]
+        ya, yb = ys[index], ys[index + 1]
+        while b - a > 2 * min_width and evaluations < max_points:
+            m = (a + b) / 2
+            ym = float(evaluate(f, np.array([m]))[0])
+            evaluations += 1
+            extra_xs.append(m)
+            extra_ys.append(ym)
+            left_jump = abs(on_screen(ym) - on_screen(ya))
+            right_jump = abs(on_screen(yb) - on_screen(ym))
+            if left_jump >= right_jump:
+                b, yb = m, ym
+            else:
+                a, ya = m, ym
+            if not np.isfinite(ym) or max(left_jump, right_jump) <= jump_size:
+                break
+        jump = abs(on_screen(yb) - on_screen(ya))
+        if b - a <= 2 * min_width and np.isfinite(jump) and jump > jump_size:
+            breaks.append((a + b) / 2)
+
+    if extra_xs:
+        xs = np.concatenate([xs, extra_xs])
+        ys = np.concatenate([ys, extra_ys])
+        order = np.argsort(xs, kind="stable")
+        xs, ys = xs[order], ys[order]
+    return xs, ys, sorted(breaks), evaluations
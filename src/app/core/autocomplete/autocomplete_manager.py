@@ -1,18 +1,41 @@
 import re
 import json
-from typing import List, Optional
+import math
+import queue
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 from .suggestion import Suggestion, SuggestionType
 from .function_provider import FunctionProvider
 from .history_provider import HistoryProvider
 from .pattern_provider import PatternProvider
 
+# providers in the order they are run and merged, fastest first
+PROVIDERS = ("function", "history", "pattern")
+
+
+@dataclass
+class SearchQuery:
+    generation: int
+    text: str
+    token: str
+    started: float
+    deadline: float
+    results: Dict[str, List[Suggestion]] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)  # provider -> seconds
+
+
 class AutocompleteManager(QObject):
 
 
     suggestions_ready = pyqtSignal(list)
+    # generation, providers that answered, providers skipped for the latency budget
+    search_finished = pyqtSignal(int, list, list)
 
-    def __init__(self, engine, history_panel):
+    def __init__(self, engine, history_panel, threaded: bool = True):
         super().__init__()
 
         # initialize providers
@@ -31,11 +54,26 @@ class AutocompleteManager(QObject):
 
         self.pending_text = ""
 
+        # searches run on a worker thread; every search gets a new generation
+        # and anything the worker sends for an older generation is dropped
+        self.threaded = threaded
+        self.latency_budget = 0.25  # seconds per query, providers not done by then are skipped
+        self.generation = 0
+        self.query: Optional[SearchQuery] = None
+        self.last_query: Optional[SearchQuery] = None
+        self._requests: "queue.Queue[Optional[SearchQuery]]" = queue.Queue()
+        self._results: queue.Queue = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self.poll_timer = QTimer()
+        self.poll_timer.setInterval(15)
+        self.poll_timer.timeout.connect(self._poll_results)
+
     def on_text_changed(self, text: str):
         self.pending_text = text
 
         # if too short hide immediately
         if len(text) < self.min_chars_trigger:
+            self._cancel_search()
             self.suggestions_ready.emit([])
             return
 
@@ -44,16 +82,18 @@ class AutocompleteManager(QObject):
 
         # don't show autocomplete for pure numbers or operators
         if current_token.replace('.', '').replace('-', '').isdigit():
+            self._cancel_search()
             self.suggestions_ready.emit([])
             return
 
         # don't show for empty or very short tokens
         if len(current_token) < 1:
+            self._cancel_search()
             self.suggestions_ready.emit([])
             return
 
-        # restart debounce timer
-        self.debounce_timer.stop()
+        # a search still running is for the old text; restart debounce timer
+        self._cancel_search()
         self.debounce_timer.start(self.debounce_delay)
 
     def _do_search(self):
@@ -63,18 +103,119 @@ class AutocompleteManager(QObject):
         # extract token at cursor
         current_token = self._get_current_token(text)
 
-        # query all providers
-        func_suggestions = self.function_provider.get_suggestions(current_token)
-        hist_suggestions = self.history_provider.get_suggestions(current_token)
-        pattern_suggestions = self.pattern_provider.get_suggestions(text)
+        self.generation += 1
+        started = time.monotonic()
+        self.query = SearchQuery(self.generation, text, current_token, started, started + self.latency_budget)
+        if not self.threaded:
+            self._run_search(self.query)
+            self._poll_results()
+            return
+        self._ensure_worker()
+        self._requests.put(self.query)
+        self.poll_timer.start()
 
-        final_suggestions = self._merge_and_rank([
-            func_suggestions,
-            hist_suggestions,
-            pattern_suggestions
-        ])
+    def _cancel_search(self):
+        # text changed so that no search is needed, whatever is running is outdated
+        self.debounce_timer.stop()
+        self.generation += 1
+        self.query = None
+        self.poll_timer.stop()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._worker_loop, daemon=True)
+            self._worker.start()
+
+    def shutdown(self):
+        self._cancel_search()
+        if self._worker is not None:
+            self._requests.put(None)
+            self._worker.join(1)
+            self._worker = None
+
+    def _worker_loop(self):
+        while True:
+            query = self._requests.get()
+            # only the newest waiting query matters
+            while query is not None and not self._requests.empty():
+                query = self._requests.get_nowait()
+            if query is None:
+                return
+            self._run_search(query)
+
+    def _run_search(self, query: SearchQuery):
+        """
+        runs the providers one after another and posts each result as it is
+        ready: (generation, provider, suggestions, seconds), suggestions is None
+        for a provider skipped because the budget ran out; (generation, None,
+        None, 0) marks the end
+        """
+        for provider in PROVIDERS:
+            if query.generation != self.generation:
+                return  # outdated, a newer search has started
+            if time.monotonic() >= query.deadline:
+                self._results.put((query.generation, provider, None, 0.0))
+                continue
+            started = time.monotonic()
+            try:
+                suggestions = self._search_provider(provider, query)
+            except Exception as e:
+                print(f"warning: {provider} suggestions failed: {e}")
+                suggestions = []
+            self._results.put((query.generation, provider, suggestions, time.monotonic() - started))
+        self._results.put((query.generation, None, None, 0.0))
+
+    def _search_provider(self, provider: str, query: SearchQuery) -> List[Suggestion]:
+        if provider == "function":
+            return self.function_provider.get_suggestions(query.token)
+        if provider == "history":
+            return self.history_provider.get_suggestions(query.token)
+        return self.pattern_provider.get_suggestions(query.text, deadline=query.deadline)
+
+    def _poll_results(self):
+        query = self.query
+        changed = False
+        finished = False
+        while True:
+            try:
+                generation, provider, suggestions, seconds = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if query is None or generation != query.generation:
+                continue  # answer to an outdated search
+            if provider is None:
+                finished = True
+            elif suggestions is None:
+                query.skipped.append(provider)
+            else:
+                query.results[provider] = suggestions
+                query.timings[provider] = seconds
+                changed = changed or bool(suggestions)
 
-        self.suggestions_ready.emit(final_suggestions[:10])
+        if query is None:
+            self.poll_timer.stop()
+            return
+        if changed:
+            self.suggestions_ready.emit(self._merged_results(query))
+        if not finished and time.monotonic() >= query.deadline:
+            # hard budget: stop waiting, whatever arrives later is dropped
+            query.skipped.extend(p for p in PROVIDERS if p not in query.results and p not in query.skipped)
+            finished = True
+        if finished:
+            self.poll_timer.stop()
+            self.query = None
+            self.last_query = query
+            if not changed and not any(query.results.values()):
+                self.suggestions_ready.emit([])
+            self.search_finished.emit(query.generation, list(query.results), list(query.skipped))
+
+    def _merged_results(self, query: SearchQuery) -> List[Suggestion]:
+        # ranking adds boosts to the scores, so every emit ranks fresh copies
+        suggestion_lists = [
+            [replace(suggestion) for suggestion in query.results[provider]]
+            for provider in PROVIDERS if provider in query.results
+        ]
+        return self._merge_and_rank(suggestion_lists)[:10]
 
     def _get_current_token(self, text: str, cursor_pos: Optional[int] = None) -> str:
         if not text:
@@ -147,7 +288,6 @@ class AutocompleteManager(QObject):
             # recently used 
             if suggestion.usage_count > 0:
                 # logarithmic boost for frequency
-                import math
                 boost = min(15, 5 * math.log(suggestion.usage_count + 1))
                 suggestion.score += boost
 
@@ -208,9 +348,7 @@ class AutocompleteManager(QObject):
                 data = json.load(f)
 
             # restore to history provider
-            from collections import Counter
-            self.history_provider.usage_frequency = Counter(data.get('usage_frequency', {}))
-            self.history_provider.recency_scores = data.get('recency_scores', {})
+            self.history_provider.load_usage(data.get('usage_frequency', {}), data.get('recency_scores', {}))
 
             print(f"loaded learning data from {filepath}")
         except FileNotFoundError:
@@ -5,6 +5,7 @@ import json
 import time
 
 from .suggestion import Suggestion, SuggestionType
+from .text_index import TextIndex
 
 
 @dataclass
@@ -21,25 +22,42 @@ class PatternStore:
         self.patterns_by_category: Dict[str, List[Pattern]] = {}
         self._load_from_file(json_path)
 
+        # all patterns in file order, positions are the ids used by the indexes
+        self.patterns: List[Pattern] = [
+            pattern for patterns in self.patterns_by_category.values() for pattern in patterns
+        ]
+        self._name_index = TextIndex(pattern.name for pattern in self.patterns)
+        self._template_index = TextIndex(pattern.template for pattern in self.patterns)
+        self._description_index = TextIndex(pattern.description for pattern in self.patterns)
+        # position of each pattern when sorted by commonness, file order breaks ties
+        by_commonness = sorted(range(len(self.patterns)), key=lambda pattern_id: -self.patterns[pattern_id].commonness)
+        self._commonness_rank: List[int] = [0] * len(self.patterns)
+        for rank, pattern_id in enumerate(by_commonness):
+            self._commonness_rank[pattern_id] = rank
+
     def find_matching_patterns(self, partial_text: str) -> List[Pattern]:
         normalized_text = partial_text.lower().strip()
         if not normalized_text:
             return []
 
-        matches: List[Pattern] = []
-        for patterns in self.patterns_by_category.values():
-            for pattern in patterns:
-                if self._matches_text(normalized_text, pattern):
-                    matches.append(pattern)
-
-        ranked = sorted(
-            matches,
-            key=lambda pattern: (
-                self._similarity_score(normalized_text, pattern),
-                pattern.commonness,
-            ),
-            reverse=True,
+        # same matches and order as checking every pattern with _matches_text and
+        # ranking by (_similarity_score, commonness): the indexes give the matches
+        # grouped by similarity, best group first, and each group is ordered by
+        # commonness alone
+        groups = (
+            self._name_index.starting_with(normalized_text),  # 1.0
+            self._name_index.containing(normalized_text),  # 0.8
+            self._template_index.starting_with(normalized_text),  # 0.6
+            self._template_index.containing(normalized_text),  # 0.4
+            self._description_index.containing(normalized_text),  # 0.0
         )
+        seen = set()
+        ranked: List[Pattern] = []
+        for group in groups:
+            fresh = set(group)
+            fresh -= seen
+            seen |= fresh
+            ranked.extend(self.patterns[pattern_id] for pattern_id in sorted(fresh, key=self._commonness_rank.__getitem__))
         return ranked
 
     def _load_from_file(self, json_path: Path) -> None:
@@ -87,6 +105,10 @@ class FunctionProvider:
         self.functions: Dict[str, str] = self._build_functions()
         self.constants: Dict[str, str] = self._build_constants()
         self.categories: Dict[str, str] = self._build_categories()
+        self._function_names: List[str] = list(self.functions)
+        self._function_index = TextIndex(self._function_names)
+        self._constant_names: List[str] = list(self.constants)
+        self._constant_index = TextIndex(self._constant_names)
         self.history: List[str] = []
         self.usage: Dict[str, Dict[str, float]] = {}
 
@@ -151,7 +173,8 @@ class FunctionProvider:
     def _build_function_suggestions(self, partial_text: str) -> List[Suggestion]:
         suggestions: List[Suggestion] = []
 
-        for name, description in self.functions.items():
+        for name in self._candidates(self._function_index, self._function_names, partial_text):
+            description = self.functions[name]
             similarity = self._similarity_score(partial_text, name)
             if similarity == 0.0:
                 continue
@@ -175,7 +198,8 @@ class FunctionProvider:
     def _build_constant_suggestions(self, partial_text: str) -> List[Suggestion]:
         suggestions: List[Suggestion] = []
 
-        for name, description in self.constants.items():
+        for name in self._candidates(self._constant_index, self._constant_names, partial_text):
+            description = self.constants[name]
             similarity = self._similarity_score(partial_text, name)
             if similarity == 0.0:
                 continue
@@ -195,6 +219,10 @@ class FunctionProvider:
 
         return suggestions
 
+    def _candidates(self, index: TextIndex, names: List[str], partial_text: str) -> List[str]:
+        # only names containing the text can score above zero
+        return [names[name_id] for name_id in index.containing(partial_text)]
+
     def _build_pattern_suggestions(self, partial_text: str) -> List[Suggestion]:
         patterns = self.pattern_store.find_matching_patterns(partial_text)
         suggestions: List[Suggestion] = []
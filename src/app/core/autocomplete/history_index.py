@@ -0,0 +1,118 @@
+"""
+History Index - the expressions of the calculation history, kept up to date
+one item at a time instead of re-parsing the whole history on every keystroke.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from .text_index import TextIndex
+
+
+def parse_history_item(item_text: str) -> str:
+    """
+    "operation: expression, optional => result" or "expression = result" -> expression
+    """
+    if '=>' in item_text:
+        parts = item_text.split('=>')[0].strip()
+        if ':' in parts:
+            expr = parts.split(':', 1)[1].strip()
+        else:
+            expr = parts.strip()
+    elif '=' in item_text:
+        expr = item_text.split('=')[0].strip()
+    else:
+        expr = item_text.strip()
+
+    # remove optional expression part if present
+    if ',' in expr:
+        expr = expr.split(',')[0].strip()
+    return expr
+
+
+@dataclass
+class IndexedExpression:
+    expression: str
+    key: str  # lowercased, what the similarity scores compare against
+    count: int = 0  # times it appears in the history
+    last_added: float = 0.0  # timestamp
+
+
+class HistoryIndex:
+    """
+    One entry per distinct expression, with a substring index over the keys.
+    sync() reads only the items appended to the history list since the last call.
+    """
+
+    # at most this many substring matches are scored, prefix matches and newer
+    # entries first; the rest score lower than these or tie with them
+    max_matches = 1000
+    # fuzzy matching has to look at every entry, so it only gets the most recent ones
+    fuzzy_pool_size = 1000
+
+    def __init__(self):
+        self._source: Optional[list] = None
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def sync(self, calculation_history: list):
+        # a different or shorter list means the history was replaced, start over
+        if calculation_history is not self._source or len(calculation_history) < self._consumed:
+            self.clear()
+            self._source = calculation_history
+        for item_text in calculation_history[self._consumed:]:
+            self.add_item(item_text)
+        self._consumed = len(calculation_history)
+
+    def add_item(self, item_text: str, timestamp: Optional[float] = None):
+        expression = parse_history_item(item_text)
+        if not expression:
+            return
+        entry_id = self._ids.get(expression)
+        if entry_id is None:
+            entry_id = self._ids[expression] = len(self.entries)
+            self.entries.append(IndexedExpression(expression, expression.lower()))
+            self._text_index.add(expression)
+        entry = self.entries[entry_id]
+        entry.count += 1
+        entry.last_added = timestamp if timestamp is not None else datetime.now().timestamp()
+        self._recent.pop(entry_id, None)
+        self._recent[entry_id] = None
+
+    def clear(self):
+        self.entries: List[IndexedExpression] = []
+        self._ids: Dict[str, int] = {}
+        self._text_index = TextIndex()
+        self._recent: Dict[int, None] = {}  # entry ids, least recently added first
+        self._consumed = 0
+
+    def get(self, expression: str) -> Optional[IndexedExpression]:
+        entry_id = self._ids.get(expression)
+        return self.entries[entry_id] if entry_id is not None else None
+
+    def expressions(self) -> List[str]:
+        return [entry.expression for entry in self.entries]
+
+    def candidates(self, partial_text: str, preferred: Iterable[str] = ()) -> List[IndexedExpression]:
+        """
+        the entries worth scoring for partial_text: the preferred expressions
+        (the ones with usage statistics), entries starting with and then
+        containing the text, and the most recent entries for fuzzy matching
+        """
+        ids: Dict[int, None] = {}
+        for expression in preferred:
+            entry_id = self._ids.get(expression)
+            if entry_id is not None:
+                ids[entry_id] = None
+        for matches in (self._text_index.starting_with(partial_text), self._text_index.containing(partial_text)):
+            for entry_id in reversed(matches):
+                if len(ids) >= self.max_matches:
+                    break
+                ids[entry_id] = None
+        for count, entry_id in enumerate(reversed(self._recent)):
+            if count >= self.fuzzy_pool_size:
+                break
+            ids[entry_id] = None
+        return [self.entries[entry_id] for entry_id in ids]
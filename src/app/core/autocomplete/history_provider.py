@@ -2,28 +2,50 @@ from typing import List, Dict
 from collections import Counter
 from datetime import datetime
 import math
+import threading
+import numpy as np
 from .suggestion import Suggestion, SuggestionType
+from .history_index import HistoryIndex
 
 try:
-    from rapidfuzz import fuzz
+    from rapidfuzz import fuzz, process
     HAS_RAPIDFUZZ = True
 except ImportError:
     HAS_RAPIDFUZZ = False
     print("warning: rapidfuzz not installed. run: pip install rapidfuzz")
 
 
+# recency score decays by a factor e every this many hours
+RECENCY_DECAY_HOURS = 24.0
+
+
 class HistoryProvider:
     def __init__(self, history_panel=None):
         self.history_panel = history_panel
         self.usage_frequency = Counter()  
         self.recency_scores = {}  
 
+        # running aggregates, kept up to date by record_usage / clear_old_entries
+        self.max_count = 0
+        self._count_histogram = Counter()  # usage count -> how many expressions have it
+        # last use in decay units (timestamp / decay seconds), so that
+        # recency = 100 * exp(decay_time - now_in_decay_units) for every expression at once
+        self.decay_times: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+        # parsed history, updated as calculations are added instead of per keystroke
+        self.history_index = HistoryIndex()
+        added = getattr(history_panel, 'calculation_added', None)
+        if added is not None:
+            added.connect(lambda item_text: self._sync_history())
+        self._sync_history()
+
     def get_suggestions(self, partial_text: str, max_results: int = 5) -> List[Suggestion]:
         """
         get history based suggestions with smart ranking
 
         algorithm:
-        1. get all history items from history_panel
+        1. get candidate history items from the history index
         2. filter expressions that match partial_text (fuzzy matching)
         3. score based on: frequency + recency + similarity
         4. return top N suggestions
@@ -37,66 +59,87 @@ class HistoryProvider:
         if not self.history_panel or not partial_text:
             return []
 
-        suggestions = []
-        history_expressions = self._get_history_expressions()
+        # the search runs off the GUI thread while calculations and accepted
+        # suggestions are recorded on it
+        with self._lock:
+            self._sync_history()
+            candidates = self.history_index.candidates(partial_text, preferred=self.usage_frequency)
+
+            if not candidates:
+                return []
+
+            expressions = [entry.expression for entry in candidates]
+            similarity, scores = self.score_candidates(partial_text, expressions)
+            matching = np.flatnonzero(similarity >= 40)
+            # highest score first, ties keep candidate order like a stable sort
+            best = matching[np.argsort(-scores[matching], kind="stable")][:max_results]
+
+            suggestions = []
+            for position in best:
+                expr = expressions[position]
+                suggestions.append(Suggestion(
+                    text=expr,
+                    type=SuggestionType.HISTORY,
+                    score=float(scores[position]),
+                    description=f"Used {self.usage_frequency.get(expr, 1)} time(s)",
+                    category="history",
+                    usage_count=self.usage_frequency.get(expr, 1)
+                ))
+            return suggestions
+
+    def score_candidates(self, partial_text: str, expressions: List[str]):
+        """
+        scores every candidate in one pass with numpy arrays, the same formulae
+        as _calculate_similarity_score / _frequency_score / _recency_score
 
-        if not history_expressions:
-            return []
+        returns:
+            (similarity scores, final scores) as arrays in the order of expressions
+        """
+        partial_lower = partial_text.lower()
+        keys = np.array([expression.lower() for expression in expressions], dtype=str)
+        if not len(keys):
+            return np.zeros(0), np.zeros(0)
+
+        # similarity: prefix 100, substring by position (max 95), otherwise fuzzy
+        positions = np.char.find(keys, partial_lower)
+        lengths = np.maximum(np.char.str_len(keys), 1)
+        substring = np.minimum(95.0, 100 - positions / lengths * 20)
+        similarity = np.where(positions == 0, 100.0, np.where(positions > 0, substring, self._fuzzy_scores(partial_lower, keys)))
+
+        counts = np.array([self.usage_frequency.get(expression, 1) for expression in expressions], dtype=float)
+        if not self.usage_frequency or self.max_count == 1:
+            frequency = np.full(len(keys), 50.0)
+        else:
+            frequency = 100 * np.log(counts + 1) / math.log(self.max_count + 1)
 
-        for expr in history_expressions:
-            similarity_score = self._calculate_similarity_score(partial_text, expr)
-            
-            if similarity_score < 40:
-                continue
-
-            
-            frequency_score = self._calculate_frequency_score(expr)
-            recency_score = self._calculate_recency_score(expr)
-            final_score = (
-                similarity_score * 0.3 +
-                frequency_score * 0.4 +
-                recency_score * 0.3
-            )
-            suggestion = Suggestion(
-                text=expr,
-                type=SuggestionType.HISTORY,
-                score=final_score,
-                description=f"Used {self.usage_frequency.get(expr, 1)} time(s)",
-                category="history",
-                usage_count=self.usage_frequency.get(expr, 1)
-            )
-
-            suggestions.append(suggestion)
-
-        suggestions.sort(key=lambda s: s.score, reverse=True)
-        return suggestions[:max_results]
+        decay_times = np.array([self.decay_times.get(expression, -np.inf) for expression in expressions])
+        recency = 100 * np.exp(decay_times - self._decay_now())
 
-    def _get_history_expressions(self) -> List[str]:
-        if not hasattr(self.history_panel, 'calculation_history'):
-            return []
+        scores = similarity * 0.3 + frequency * 0.4 + recency * 0.3
+        return similarity, scores
 
-        expressions = []
-        for item_text in self.history_panel.calculation_history:
-            # parse operation: expression = result format
-            if '=>' in item_text:
-                parts = item_text.split('=>')[0].strip()
-                if ':' in parts:
-                    expr = parts.split(':', 1)[1].strip()
-                else:
-                    expr = parts.strip()
-            elif '=' in item_text:
-                expr = item_text.split('=')[0].strip()
-            else:
-                expr = item_text.strip()
-
-            # remove optional expression part if present
-            if ',' in expr:
-                expr = expr.split(',')[0].strip()
-
-            if expr:
-                expressions.append(expr)
-
-        return list(set(expressions))  # remove duplicates
+    def _fuzzy_scores(self, partial_lower: str, keys: np.ndarray) -> np.ndarray:
+        if HAS_RAPIDFUZZ:
+            token_scores = process.cdist([partial_lower], keys.tolist(), scorer=fuzz.token_set_ratio)[0]
+            partial_scores = process.cdist([partial_lower], keys.tolist(), scorer=fuzz.partial_ratio)[0]
+            return np.maximum(token_scores, partial_scores).astype(float)
+        # share of the typed characters that appear in the expression
+        overlap = np.zeros(len(keys))
+        for char, times in Counter(partial_lower).items():
+            overlap += (np.char.find(keys, char) >= 0) * times
+        return overlap / len(partial_lower) * 70
+
+    def _decay_now(self) -> float:
+        return datetime.now().timestamp() / (RECENCY_DECAY_HOURS * 3600)
+
+    def _sync_history(self):
+        if hasattr(self.history_panel, 'calculation_history'):
+            with self._lock:
+                self.history_index.sync(self.history_panel.calculation_history)
+
+    def _get_history_expressions(self) -> List[str]:
+        self._sync_history()
+        return self.history_index.expressions()
 
     def _calculate_similarity_score(self, partial: str, full: str) -> float:
         partial_lower = partial.lower()
@@ -137,13 +180,11 @@ class HistoryProvider:
         if not self.usage_frequency:
             return 50.0  # default if no history
 
-        max_count = max(self.usage_frequency.values())
-
-        if max_count == 1:
+        if self.max_count == 1:
             return 50.0  # all equal returns middle score
 
         # logarithmic scaling
-        score = 100 * (math.log(count + 1) / math.log(max_count + 1))
+        score = 100 * (math.log(count + 1) / math.log(self.max_count + 1))
 
         return score
 
@@ -151,22 +192,44 @@ class HistoryProvider:
         if expression not in self.recency_scores:
             return 0.0  # never used before
 
-        last_used_timestamp = self.recency_scores[expression]
-        current_timestamp = datetime.now().timestamp()
-
-        # calculate hours ago
-        seconds_ago = current_timestamp - last_used_timestamp
-        hours_ago = seconds_ago / 3600
-
-        # exponential decay (half-life of 24 hours)
-        decay_constant = 24.0
-        score = 100 * math.exp(-hours_ago / decay_constant)
-
-        return score
+        # exponential decay over RECENCY_DECAY_HOURS
+        decay_time = self.recency_scores[expression] / (RECENCY_DECAY_HOURS * 3600)
+        return 100 * math.exp(decay_time - self._decay_now())
 
     def record_usage(self, expression: str):
-        self.usage_frequency[expression] += 1
-        self.recency_scores[expression] = datetime.now().timestamp()
+        with self._lock:
+            count = self.usage_frequency[expression] + 1
+            self.usage_frequency[expression] = count
+            self._move_count(count - 1, count)
+            timestamp = datetime.now().timestamp()
+            self.recency_scores[expression] = timestamp
+            self.decay_times[expression] = timestamp / (RECENCY_DECAY_HOURS * 3600)
+
+    def load_usage(self, usage_frequency: Dict[str, int], recency_scores: Dict[str, float]):
+        # replaces the usage statistics and rebuilds the aggregates from them
+        with self._lock:
+            self.usage_frequency = Counter(usage_frequency)
+            self.recency_scores = dict(recency_scores)
+            self._count_histogram = Counter(self.usage_frequency.values())
+            self.max_count = max(self._count_histogram, default=0)
+            self.decay_times = {
+                expression: timestamp / (RECENCY_DECAY_HOURS * 3600)
+                for expression, timestamp in self.recency_scores.items()
+            }
+
+    def _move_count(self, old_count: int, new_count: int):
+        # keeps max_count right without scanning usage_frequency; there are only
+        # as many distinct counts as the square root of the total usage
+        if old_count:
+            self._count_histogram[old_count] -= 1
+            if not self._count_histogram[old_count]:
+                del self._count_histogram[old_count]
+        if new_count:
+            self._count_histogram[new_count] += 1
+        if new_count > self.max_count:
+            self.max_count = new_count
+        elif old_count == self.max_count and old_count not in self._count_histogram:
+            self.max_count = max(self._count_histogram, default=0)
 
     def get_top_expressions(self, n: int = 10) -> List[tuple]:
         return self.usage_frequency.most_common(n)
@@ -174,12 +237,14 @@ class HistoryProvider:
     def clear_old_entries(self, days: int = 30):
         cutoff_timestamp = datetime.now().timestamp() - (days * 24 * 3600)
 
-        old_expressions = [
-            expr for expr, timestamp in self.recency_scores.items()
-            if timestamp < cutoff_timestamp
-        ]
-
-        for expr in old_expressions:
-            del self.recency_scores[expr]
-            if expr in self.usage_frequency:
-                del self.usage_frequency[expr]
+        # the autocomplete worker thread records usage while the sweep runs
+        with self._lock:
+            old_expressions = [
+                expr for expr, timestamp in self.recency_scores.items()
+                if timestamp < cutoff_timestamp
+            ]
+            for expr in old_expressions:
+                del self.recency_scores[expr]
+                self.decay_times.pop(expr, None)
+                if expr in self.usage_frequency:
+                    self._move_count(self.usage_frequency.pop(expr), 0)
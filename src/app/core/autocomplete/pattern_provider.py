@@ -3,7 +3,10 @@ Pattern Provider - Suggests common mathematical patterns
 """
 import json
 import re
-from typing import List, Dict, Optional
+import threading
+import time
+import warnings
+from typing import List, Dict, Optional, FrozenSet, Set
 from pathlib import Path
 from .suggestion import Suggestion, SuggestionType
 
@@ -13,6 +16,18 @@ try:
 except ImportError:
     HAS_SYMPY = False
 
+# a term of the typed text with its numbers replaced, and a term of a template
+# with its single letter placeholders replaced, are compared as these shapes
+_NUMBER = re.compile(r'\d+')
+_SINGLE_LETTER = re.compile(r'[a-z](?![a-z])')
+
+
+def _parse_quietly(text: str):
+    # some templates compile to code Python warns about ("'str' object is not callable")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", SyntaxWarning)
+        return parse_expr(text)
+
 
 class PatternProvider:
 
@@ -31,17 +46,34 @@ class PatternProvider:
         # pre-compile regex patterns for fast matching
         self.compiled_patterns = self._compile_patterns()
 
-    def get_suggestions(self, partial_text: str) -> List[Suggestion]:
+        # templates are parsed once, on the first structural match (the
+        # autocomplete worker thread, not startup); after that structural
+        # matching only parses the typed text
+        self.signatures: Dict[str, Optional[FrozenSet[str]]] = {}
+        self._term_index: Dict[str, List[str]] = {}  # term shape -> templates with that term
+        self._indexed: Set[str] = set()  # templates already in _term_index
+        self._signatures_ready = False
+        # reentrant: _build_signatures holds it while computing signatures
+        self._signatures_lock = threading.RLock()
+
+    def get_suggestions(self, partial_text: str, deadline: Optional[float] = None) -> List[Suggestion]:
+        """
+        deadline is a time.monotonic() value, matching stops there and the
+        patterns matched so far are returned
+        """
         if not partial_text or len(partial_text) < 2:
             return []
 
         suggestions = []
+        structural_scores = self._structural_scores(partial_text) if HAS_SYMPY else {}
 
         # try matching against each pattern category
         for category, pattern_list in self.patterns.items():
             for pattern_def in pattern_list:
+                if deadline is not None and time.monotonic() > deadline:
+                    return suggestions
                 # calculate how well partial matches this pattern
-                match_result = self._match_pattern(partial_text, pattern_def)
+                match_result = self._match_pattern(partial_text, pattern_def, structural_scores)
 
                 if match_result and match_result['score'] > 30:
                     suggestion = Suggestion(
@@ -55,7 +87,8 @@ class PatternProvider:
 
         return suggestions
 
-    def _match_pattern(self, partial: str, pattern_def: Dict) -> Optional[Dict]:
+    def _match_pattern(self, partial: str, pattern_def: Dict,
+                       structural_scores: Optional[Dict[str, float]] = None) -> Optional[Dict]:
         pattern_template = pattern_def['pattern']
         commonness = pattern_def.get('commonness', 50)
 
@@ -65,7 +98,10 @@ class PatternProvider:
 
         #  Structural matching uses SymPy)
         if HAS_SYMPY:
-            structural_score = self._structural_match(partial, pattern_template)
+            if structural_scores is None:
+                structural_score = self._structural_match(partial, pattern_template)
+            else:
+                structural_score = structural_scores.get(pattern_template, 0.0)
             if structural_score > 0:
                 score = structural_score + (commonness * 0.2)
                 return {'score': min(100, score), 'completion': pattern_template}
@@ -98,47 +134,75 @@ class PatternProvider:
         pattern: "x**2 + {b}*x + {c}"
         match: Yes (both are polynomials starting with x**2)
         """
-        try:
-            partial_expr = parse_expr(partial.replace('^', '**'))
-
-            pattern_for_parse = re.sub(r'\{([a-z])\}', r'\1', pattern)
-            pattern_expr = parse_expr(pattern_for_parse.replace('^', '**'))
-
-    
-            partial_terms = str(partial_expr).split('+')
-            pattern_terms = str(pattern_expr).split('+')
-
-            # Check if partial's terms are subset of pattern's terms
-            matching_terms = 0
-            for p_term in partial_terms:
-                p_term = p_term.strip()
-                for pat_term in pattern_terms:
-                    pat_term = pat_term.strip()
-                    # Check if structure matches (ignore coefficient values)
-                    if self._terms_structurally_similar(p_term, pat_term):
-                        matching_terms += 1
-                        break
-
-            if matching_terms > 0:
-                score = (matching_terms / len(partial_terms)) * 80
-                return score
-
-        except Exception:
-            pass
+        partial_terms = self._partial_terms(partial)
+        signature = self._signature(pattern)
+        if not partial_terms or not signature:
+            return 0.0
 
+        # how many of partial's terms appear in the pattern (ignoring coefficient values)
+        matching_terms = sum(1 for term in partial_terms if term in signature)
+        if matching_terms > 0:
+            return (matching_terms / len(partial_terms)) * 80
         return 0.0
 
-    def _terms_structurally_similar(self, term1: str, term2: str) -> bool:
+    def _structural_scores(self, partial: str) -> Dict[str, float]:
         """
-        Check if two terms have similar structure
-
-        Example: "5*x" is similar to "b*x"
+        _structural_match of partial against every template at once, through
+        the term index: template -> score, templates that don't match are left out
         """
-        # remove numeric coefficients and compare
-        term1_stripped = re.sub(r'\d+', 'N', term1)
-        term2_stripped = re.sub(r'[a-z](?![a-z])', 'N', term2)  # single letters become N
+        partial_terms = self._partial_terms(partial)
+        if not partial_terms:
+            return {}
+        self._ensure_signatures()
+
+        matching: Dict[str, int] = {}
+        for term in partial_terms:
+            for pattern in self._term_index.get(term, ()):
+                matching[pattern] = matching.get(pattern, 0) + 1
+        return {pattern: (count / len(partial_terms)) * 80 for pattern, count in matching.items()}
+
+    def _partial_terms(self, partial: str) -> List[str]:
+        """the term shapes of the typed text, empty when it doesn't parse (yet)"""
+        try:
+            partial_expr = _parse_quietly(partial.replace('^', '**'))
+        except Exception:
+            return []
+        return [_NUMBER.sub('N', term.strip()) for term in str(partial_expr).split('+')]
 
-        return term1_stripped == term2_stripped
+    def _signature(self, pattern: str) -> Optional[FrozenSet[str]]:
+        """
+        the set of term shapes of a template, None if it can't be parsed
+        Example: "x**2 + {b}*x + {c}" -> {"N**2", "N*N", "N"}
+        """
+        with self._signatures_lock:
+            if pattern not in self.signatures:
+                try:
+                    pattern_for_parse = re.sub(r'\{([a-z])\}', r'\1', pattern)
+                    pattern_expr = _parse_quietly(pattern_for_parse.replace('^', '**'))
+                    self.signatures[pattern] = frozenset(
+                        _SINGLE_LETTER.sub('N', term.strip()) for term in str(pattern_expr).split('+'))
+                except Exception:
+                    self.signatures[pattern] = None
+            return self.signatures[pattern]
+
+    def _ensure_signatures(self):
+        if self._signatures_ready:
+            return
+        with self._signatures_lock:
+            if not self._signatures_ready:
+                self._build_signatures()
+                self._signatures_ready = True
+
+    def _build_signatures(self):
+        for pattern_list in self.patterns.values():
+            for pattern_def in pattern_list:
+                pattern = pattern_def['pattern']
+                # a signature may already be cached by an earlier match, without being indexed
+                if pattern in self._indexed:
+                    continue
+                self._indexed.add(pattern)
+                for term in self._signature(pattern) or ():
+                    self._term_index.setdefault(term, []).append(pattern)
 
     def _token_match(self, partial: str, pattern: str) -> float:
         partial_tokens = self._extract_tokens(partial)
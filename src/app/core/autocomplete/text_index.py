@@ -0,0 +1,91 @@
+"""
+Text Index - finds the entries that start with or contain a query
+Built once from a list of strings (function names, pattern templates...), so
+a lookup only touches the entries that can match instead of every entry.
+"""
+from typing import Dict, Iterable, List
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: List[int] = []  # every entry below this node, in insertion order
+
+
+class TextIndex:
+    """
+    Prefix trie plus n-gram postings, case insensitive.
+    Entries are identified by their position in the order they were added, and
+    lookups return ids in that order so callers keep their original tie order.
+    """
+
+    # the trie stops here, longer prefixes are checked on the entries of the deepest node
+    max_depth = 12
+    # 1, 2 and 3 character substrings have postings; longer queries use the
+    # rarest of their trigrams as the shortlist
+    ngram_size = 3
+
+    def __init__(self, texts: Iterable[str] = ()):
+        self.texts: List[str] = []
+        self._root = _TrieNode()
+        self._postings: Dict[str, List[int]] = {}
+        for text in texts:
+            self.add(text)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def add(self, text: str) -> int:
+        entry_id = len(self.texts)
+        lowered = text.lower()
+        self.texts.append(lowered)
+
+        node = self._root
+        node.ids.append(entry_id)
+        for char in lowered[:self.max_depth]:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            child.ids.append(entry_id)
+            node = child
+
+        postings = self._postings
+        grams = {lowered[start:start + size]
+                 for size in range(1, self.ngram_size + 1)
+                 for start in range(len(lowered) - size + 1)}
+        for gram in grams:
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = [entry_id]
+            else:
+                posting.append(entry_id)
+        return entry_id
+
+    def starting_with(self, query: str) -> List[int]:
+        query = query.lower()
+        node = self._root
+        for char in query[:self.max_depth]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        if len(query) <= self.max_depth:
+            return list(node.ids)
+        return [entry_id for entry_id in node.ids if self.texts[entry_id].startswith(query)]
+
+    def containing(self, query: str) -> List[int]:
+        query = query.lower()
+        if not query:
+            return list(range(len(self.texts)))
+        if len(query) <= self.ngram_size:
+            return list(self._postings.get(query, ()))
+
+        shortlist = None
+        for start in range(len(query) - self.ngram_size + 1):
+            posting = self._postings.get(query[start:start + self.ngram_size])
+            if posting is None:
+                return []
+            if shortlist is None or len(posting) < len(shortlist):
+                shortlist = posting
+        return [entry_id for entry_id in shortlist if query in self.texts[entry_id]]
@@ -0,0 +1,151 @@
+"""
+Background evaluation of symbolic operations.
+Jobs run in a separate worker process so a runaway simplify/integrate can be
+killed without freezing (or crashing) the Qt window. Results come back through
+Qt signals, polled from the GUI thread with a QTimer.
+"""
+
+import multiprocessing
+import time
+from typing import Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+
+from .operation_runner import WARMUP, worker_loop
+
+
+class EvaluationExecutor(QObject):
+
+    job_started = pyqtSignal(int)
+    progress = pyqtSignal(int, float)  # job id, seconds elapsed
+    result_ready = pyqtSignal(int, str, dict)  # job id, result, evaluation info (strategy, partial)
+    job_failed = pyqtSignal(int, str)
+    job_cancelled = pyqtSignal(int)
+
+    def __init__(self, result_cache_path: Optional[str] = None, poll_interval: int = 50, parent=None):
+        super().__init__(parent)
+        self.result_cache_path = result_cache_path
+        # spawn instead of fork, forking a process that runs Qt threads is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._next_job_id = 0
+        self.current_job_id: Optional[int] = None
+        self._job_started_at = 0.0
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(poll_interval)
+        self.poll_timer.timeout.connect(self._poll)
+
+    def submit(self, operation: str, expression, optional_expression=None, raw_optional_expression=None) -> int:
+        # only one job runs at a time, a new request replaces the running one
+        if self.is_busy():
+            self.cancel()
+        self._ensure_worker()
+
+        self._next_job_id += 1
+        job_id = self._next_job_id
+        self._conn.send((job_id, operation, expression, optional_expression, raw_optional_expression))
+        self.current_job_id = job_id
+        self._job_started_at = time.monotonic()
+        self.poll_timer.start()
+        self.job_started.emit(job_id)
+        return job_id
+
+    def warm_up(self, expressions):
+        # start the worker now instead of on the first job, and let it run the
+        # corpus while idle; its answer is dropped like any stale reply
+        if self.is_busy():
+            return
+        self._ensure_worker()
+        self._conn.send((0, WARMUP, list(expressions), None, None))
+
+    def cancel(self):
+        job_id = self.current_job_id
+        if job_id is None:
+            return
+        # the only way to stop sympy mid-computation is to kill the worker,
+        # a fresh one is started for the next job
+        self._stop_worker(graceful=False)
+        self._finish_job()
+        self.job_cancelled.emit(job_id)
+
+    def is_busy(self) -> bool:
+        return self.current_job_id is not None
+
+    def shutdown(self):
+        if self.is_busy():
+            self.cancel()
+        self._stop_worker(graceful=True)
+
+    def _ensure_worker(self):
+        if self._process is not None and self._process.is_alive():
+            return
+        parent_conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(
+            target=worker_loop,
+            args=(child_conn, self.result_cache_path),
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+    def _stop_worker(self, graceful: bool):
+        process, conn = self._process, self._conn
+        self._process, self._conn = None, None
+        if process is None:
+            return
+        if graceful and process.is_alive():
+            try:
+                conn.send(None)  # lets the worker save its result cache
+                process.join(2)
+            except (BrokenPipeError, OSError):
+                pass
+        if process.is_alive():
+            process.terminate()
+            process.join(1)
+            if process.is_alive():
+                process.kill()
+        if conn is not None:
+            conn.close()
+
+    def _finish_job(self):
+        self.current_job_id = None
+        self.poll_timer.stop()
+
+    def _poll(self):
+        if self.current_job_id is None:
+            self.poll_timer.stop()
+            return
+        job_id = self.current_job_id
+
+        try:
+            has_message = self._conn.poll()
+        except (EOFError, OSError):
+            has_message = False
+
+        if not has_message:
+            if self._process is None or not self._process.is_alive():
+                self._stop_worker(graceful=False)
+                self._finish_job()
+                self.job_failed.emit(job_id, "Evaluation worker stopped unexpectedly.")
+                return
+            self.progress.emit(job_id, time.monotonic() - self._job_started_at)
+            return
+
+        try:
+            finished_id, status, payload, info = self._conn.recv()
+        except (EOFError, OSError) as e:
+            self._stop_worker(graceful=False)
+            self._finish_job()
+            self.job_failed.emit(job_id, f"Evaluation worker stopped unexpectedly: {e}")
+            return
+
+        if finished_id != job_id:
+            return  # leftover answer of a job that was replaced
+        self._finish_job()
+        if status == 'ok':
+            self.result_ready.emit(job_id, payload, info)
+        else:
+            self.job_failed.emit(job_id, payload)
@@ -0,0 +1,496 @@
+"""
+History Export - writes a calculation history to a file one entry at a time,
+so any iterable works (a list, or SessionManager.iter_history() for the whole
+journal) and the entries never have to be in memory together. Exports report
+progress and can be cancelled, HistoryWindow runs them on a worker thread.
+
+Besides the text and PDF documents there are machine-readable exports of
+HistoryEntry.to_dict(): JSON lines, CSV, a LaTeX document, and columns for
+analytics (NumPy .npz, or Parquet when pyarrow is installed).
+"""
+import contextlib
+import csv
+import json
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import sympy as sp
+from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
+
+from ..utils.lazy_import import lazy_import, optional_import
+from .math_formatter import MathFormatter
+from .parser_validator import FUNCTION_NAMES
+
+# reportlab is only needed for PDF export, it is imported on first use
+canvas = lazy_import("reportlab.pdfgen.canvas")
+colors = lazy_import("reportlab.lib.colors")
+pdfmetrics = lazy_import("reportlab.pdfbase.pdfmetrics")
+
+# progress is reported after this many entries
+PROGRESS_EVERY = 200
+
+PDF_TITLE = 'Calculation History'
+PDF_FONT = "Times-Roman"
+PDF_FONT_SIZE = 12
+PDF_LEADING = 20
+PDF_LEFT = 40
+PDF_TOP = 720  # first line on the first page, below the title
+PDF_PAGE_TOP = 790  # first line on the other pages
+PDF_BOTTOM = 50
+PDF_MAX_WIDTH = 500
+
+# the fields of HistoryEntry.to_dict(), the columns of the structured exports
+FIELDS = ('operation', 'input_expr', 'optional_input_expr', 'result', 'timestamp', 'variables')
+# rows written to the .npz spool files / Parquet row groups at a time
+CHUNK_ROWS = 4096
+# buffer of the text based exports
+WRITE_BUFFER = 1024 * 1024
+
+Progress = Callable[[int], None]
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def counted(items: Iterable, progress: Optional[Progress] = None, cancel=None) -> Iterator[Tuple[int, Any]]:
+    """
+    (number, item) for every item; calls progress(entries done) every
+    PROGRESS_EVERY entries and at the end, raises ExportCancelled once
+    cancel (a threading.Event) is set
+    """
+    done = 0
+    for done, item in enumerate(items, start=1):
+        if done % PROGRESS_EVERY == 0:
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            if progress is not None:
+                progress(done)
+        yield done, item
+    if cancel is not None and cancel.is_set():
+        raise ExportCancelled()
+    if progress is not None:
+        progress(done)
+
+
+def numbered(items: Iterable, progress: Optional[Progress] = None, cancel=None) -> Iterator[Tuple[int, str]]:
+    """(number, "number. item") for every item, see counted()"""
+    for done, item in counted(items, progress, cancel):
+        yield done, f"{done}. {item}"
+
+
+def entry_record(item) -> Dict[str, Any]:
+    """
+    item as a HistoryEntry.to_dict() record; items can be HistoryEntry
+    objects, such dicts, or history lines, which become the input
+    """
+    if hasattr(item, 'to_dict'):
+        return item.to_dict()
+    if isinstance(item, dict):
+        return item
+    return {'operation': None, 'input_expr': str(item), 'optional_input_expr': None,
+            'result': None, 'timestamp': None, 'variables': {}}
+
+
+@contextlib.contextmanager
+def _removed_if_cancelled(path: str):
+    # a cancelled export leaves no half written file behind
+    try:
+        yield
+    except ExportCancelled:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+
+class LineWrapper:
+    """
+    wraps text to a width in points; every distinct word is measured once,
+    a line is as wide as its words and the spaces between them
+    """
+
+    # distinct words remembered, the cache starts over beyond this
+    max_cached_words = 50000
+
+    def __init__(self, font: str = PDF_FONT, font_size: float = PDF_FONT_SIZE, max_width: float = PDF_MAX_WIDTH):
+        self.font = font
+        self.font_size = font_size
+        self.max_width = max_width
+        self._widths = {}
+        self.space = self.width(" ")
+
+    def width(self, word: str) -> float:
+        width = self._widths.get(word)
+        if width is None:
+            if len(self._widths) >= self.max_cached_words:
+                self._widths.clear()
+            width = self._widths[word] = pdfmetrics.stringWidth(word, self.font, self.font_size)
+        return width
+
+    def wrap(self, text: str) -> List[str]:
+        lines = []
+        current: List[str] = []
+        current_width = 0.0
+        for word in text.split():
+            width = self.width(word)
+            if width > self.max_width:
+                # a word wider than the page is broken up instead of running off it
+                if current:
+                    lines.append(" ".join(current))
+                pieces = self._break_word(word)
+                lines.extend(pieces[:-1])
+                current, current_width = [pieces[-1]], self.width(pieces[-1])
+            elif not current:
+                current, current_width = [word], width
+            elif current_width + self.space + width <= self.max_width:
+                current.append(word)
+                current_width += self.space + width
+            else:
+                lines.append(" ".join(current))
+                current, current_width = [word], width
+        if current:
+            lines.append(" ".join(current))
+        return lines
+
+    def _break_word(self, word: str) -> List[str]:
+        pieces = []
+        piece = ""
+        piece_width = 0.0
+        for char in word:
+            width = self.width(char)
+            if piece and piece_width + width > self.max_width:
+                pieces.append(piece)
+                piece, piece_width = "", 0.0
+            piece += char
+            piece_width += width
+        pieces.append(piece)
+        return pieces
+
+
+def export_pdf(path: str, items: Iterable, progress: Optional[Progress] = None, cancel=None,
+               title: str = PDF_TITLE) -> int:
+    """
+    writes the items to a paginated PDF, returns how many were written;
+    pages are finished (and compressed) as they fill up, nothing is written
+    to path when the export is cancelled
+    """
+    wrapper = LineWrapper()
+    pdf = canvas.Canvas(path, pageCompression=1)
+    pdf.drawCentredString(300, 770, title)
+    pdf.setFillColorRGB(0, 0, 255)
+    pdf.line(30, 750, 550, 750)
+
+    page = 1
+    text = _begin_page_text(pdf, PDF_TOP)
+    y = PDF_TOP
+    written = 0
+    for written, numbered_line in numbered(items, progress, cancel):
+        for line in wrapper.wrap(numbered_line):
+            if y < PDF_BOTTOM:
+                pdf.drawText(text)
+                _draw_page_number(pdf, page)
+                pdf.showPage()
+                page += 1
+                text = _begin_page_text(pdf, PDF_PAGE_TOP)
+                y = PDF_PAGE_TOP
+            text.textLine(line)
+            y -= PDF_LEADING
+    pdf.drawText(text)
+    _draw_page_number(pdf, page)
+    pdf.save()
+    return written
+
+
+def _begin_page_text(pdf, top: float):
+    text = pdf.beginText(PDF_LEFT, top)
+    text.setFont(PDF_FONT, PDF_FONT_SIZE)
+    text.setLeading(PDF_LEADING)
+    text.setFillColor(colors.black)
+    return text
+
+
+def _draw_page_number(pdf, page: int):
+    pdf.setFont(PDF_FONT, 9)
+    pdf.setFillColor(colors.gray)
+    pdf.drawCentredString(300, 25, str(page))
+
+
+def export_text(path: str, items: Iterable, progress: Optional[Progress] = None, cancel=None) -> int:
+    """writes the items as numbered lines, returns how many; a cancelled export leaves no file"""
+    written = 0
+    with _removed_if_cancelled(path):
+        with open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER) as file:
+            for written, numbered_line in numbered(items, progress, cancel):
+                file.write(numbered_line + "\n")
+    return written
+
+
+def export_jsonl(path: str, items: Iterable, progress: Optional[Progress] = None, cancel=None) -> int:
+    """one HistoryEntry.to_dict() record per line, returns how many"""
+    written = 0
+    with _removed_if_cancelled(path):
+        with open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER) as file:
+            for written, item in counted(items, progress, cancel):
+                file.write(json.dumps(entry_record(item), default=str, ensure_ascii=False) + "\n")
+    return written
+
+
+def export_csv(path: str, items: Iterable, progress: Optional[Progress] = None, cancel=None) -> int:
+    """a header row of FIELDS and one row per entry, variables as JSON; returns how many"""
+    written = 0
+    with _removed_if_cancelled(path):
+        with open(path, "w", encoding="utf-8", newline="", buffering=WRITE_BUFFER) as file:
+            writer = csv.writer(file)
+            writer.writerow(FIELDS)
+            for written, item in counted(items, progress, cancel):
+                writer.writerow(_flat_row(entry_record(item)))
+    return written
+
+
+def _flat_row(record: Dict[str, Any]) -> List[str]:
+    row = []
+    for field in FIELDS:
+        value = record.get(field)
+        if field == 'variables':
+            row.append(json.dumps(value or {}, ensure_ascii=False))
+        else:
+            row.append('' if value is None else str(value))
+    return row
+
+
+LATEX_PREAMBLE = r"""\documentclass{article}
+\usepackage[utf8]{inputenc}
+\usepackage{amsmath}
+\usepackage[margin=2cm]{geometry}
+\begin{document}
+\section*{%s}
+\begin{enumerate}
+"""
+LATEX_END = "\\end{enumerate}\n\\end{document}\n"
+_LATEX_SPECIALS = {
+    '\\': r'\textbackslash{}', '{': r'\{', '}': r'\}', '$': r'\$', '&': r'\&', '#': r'\#',
+    '^': r'\textasciicircum{}', '_': r'\_', '%': r'\%', '~': r'\textasciitilde{}',
+}
+
+
+def latex_escape(text: str) -> str:
+    return "".join(_LATEX_SPECIALS.get(char, char) for char in text)
+
+
+# results are parsed back the way SymbolicEngine parses input, 2x and (x - 2)(x + 2) included
+TRANSFORMATIONS = standard_transformations + (implicit_multiplication_application,)
+# functions a result can call; to_display runs a product into them, "-ycos(x)" is -y*cos(x)
+RESULT_FUNCTIONS = set(FUNCTION_NAMES) | {"cot", "sec", "csc", "asinh", "acosh", "atanh", "Abs", "factorial"}
+_CALL = re.compile(r"([A-Za-z]+)\(")
+# letters on both sides of a space: words of a message ("No solution"), not an expression
+_WORDS = re.compile(r"[A-Za-z]\s+[A-Za-z]")
+
+
+def _split_calls(text: str) -> str:
+    def split(match):
+        name = match.group(1)
+        if name in RESULT_FUNCTIONS:
+            return match.group(0)
+        for start in range(1, len(name)):
+            if name[start:] in RESULT_FUNCTIONS:
+                return f"{name[:start]}*{name[start:]}("
+        return match.group(0)
+    return _CALL.sub(split, text)
+
+
+@lru_cache(maxsize=4096)
+def result_latex(result: str) -> Optional[str]:
+    """
+    sp.latex of a result as the history shows it (MathFormatter.to_display,
+    "x² + 2x + 1") or as str() of a SymPy object, None when it isn't an
+    expression; cached, the same results come back in a history again and again
+    """
+    text = _split_calls(MathFormatter.to_internal(result))
+    if _WORDS.search(text):
+        return None
+    try:
+        return sp.latex(parse_expr(text, transformations=TRANSFORMATIONS, evaluate=False))
+    except Exception:
+        return None
+
+
+def export_latex(path: str, items: Iterable, progress: Optional[Progress] = None, cancel=None,
+                 title: str = PDF_TITLE) -> int:
+    """
+    a LaTeX document with one enumerate item per entry: the operation and the
+    input as typed, the result typeset with sp.latex; returns how many
+    """
+    written = 0
+    with _removed_if_cancelled(path):
+        with open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER) as file:
+            file.write(LATEX_PREAMBLE % latex_escape(title))
+            for written, item in counted(items, progress, cancel):
+                file.write(_latex_item(entry_record(item)))
+            file.write(LATEX_END)
+    return written
+
+
+def _latex_item(record: Dict[str, Any]) -> str:
+    parts = []
+    if record.get('operation'):
+        parts.append(r"\textbf{%s}:" % latex_escape(str(record['operation'])))
+    expression = str(record.get('input_expr') or '')
+    if record.get('optional_input_expr'):
+        expression += f", {record['optional_input_expr']}"
+    parts.append(r"\texttt{%s}" % latex_escape(expression))
+    result = record.get('result')
+    if result is not None:
+        typeset = result_latex(str(result))
+        parts.append(r"$\Rightarrow$")
+        parts.append(f"${typeset}$" if typeset is not None else r"\texttt{%s}" % latex_escape(str(result)))
+    if record.get('variables'):
+        assignments = ", ".join(f"{name} = {value}" for name, value in record['variables'].items())
+        parts.append(r"\quad[\texttt{%s}]" % latex_escape(assignments))
+    return "  \\item " + " ".join(parts) + "\n"
+
+
+# Columnar exports. Text columns are stored the way Arrow stores strings: the
+# UTF-8 bytes of all values one after the other ("<field>_data"), where each
+# value ends ("<field>_offsets", one more than there are rows, starting at 0)
+# and whether it is set ("<field>_valid"). "timestamp" is datetime64[us].
+TEXT_COLUMNS = ('operation', 'input_expr', 'optional_input_expr', 'result', 'variables')
+_NOT_A_TIME = np.datetime64('NaT', 'us')
+
+
+class _ColumnSpool:
+    """a column appended to temporary files a chunk at a time, then copied into an .npz"""
+
+    def __init__(self):
+        self.data = tempfile.TemporaryFile()
+        self.offsets = tempfile.TemporaryFile()
+        self.valid = tempfile.TemporaryFile()
+        self.size = 0
+        self.rows = 0
+        self.offsets.write(np.zeros(1, dtype=np.int64).tobytes())
+
+    def append(self, values: List[Optional[str]]):
+        encoded = [value.encode('utf-8') if value is not None else b'' for value in values]
+        self.data.write(b''.join(encoded))
+        ends = np.cumsum([len(value) for value in encoded], dtype=np.int64) + self.size
+        self.offsets.write(ends.tobytes())
+        self.valid.write(np.array([value is not None for value in values], dtype=np.bool_).tobytes())
+        if len(ends):
+            self.size = int(ends[-1])
+        self.rows += len(values)
+
+    def close(self):
+        for spool in (self.data, self.offsets, self.valid):
+            spool.close()
+
+
+def _text_value(record: Dict[str, Any], field: str) -> Optional[str]:
+    value = record.get(field)
+    if field == 'variables':
+        return json.dumps(value or {}, ensure_ascii=False)
+    return None if value is None else str(value)
+
+
+def _timestamps(records: List[Dict[str, Any]]) -> np.ndarray:
+    return np.array([np.datetime64(record['timestamp'], 'us') if record.get('timestamp') else _NOT_A_TIME
+                     for record in records], dtype='datetime64[us]')
+
+
+def _write_npy(archive: zipfile.ZipFile, name: str, dtype, length: int, source):
+    # an .npy member written from a spool file, without loading the column
+    with archive.open(f"{name}.npy", 'w', force_zip64=True) as member:
+        np.lib.format.write_array_header_1_0(member, {
+            'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': (length,)})
+        source.seek(0)
+        shutil.copyfileobj(source, member, WRITE_BUFFER)
+
+
+def export_npz(path: str, items: Iterable, progress: Optional[Progress] = None, cancel=None) -> int:
+    """
+    the history as columns in a compressed .npz (see TEXT_COLUMNS), written
+    CHUNK_ROWS entries at a time to temporary files; read it with read_npz()
+    """
+    spools = {field: _ColumnSpool() for field in TEXT_COLUMNS}
+    timestamps = tempfile.TemporaryFile()
+    written = 0
+    try:
+        with _removed_if_cancelled(path):
+            for chunk in _chunks(items, progress, cancel):
+                for field, spool in spools.items():
+                    spool.append([_text_value(record, field) for record in chunk])
+                timestamps.write(_timestamps(chunk).tobytes())
+                written += len(chunk)
+
+            with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                _write_npy(archive, 'timestamp', 'datetime64[us]', written, timestamps)
+                for field, spool in spools.items():
+                    _write_npy(archive, f"{field}_data", np.uint8, spool.size, spool.data)
+                    _write_npy(archive, f"{field}_offsets", np.int64, written + 1, spool.offsets)
+                    _write_npy(archive, f"{field}_valid", np.bool_, written, spool.valid)
+    finally:
+        timestamps.close()
+        for spool in spools.values():
+            spool.close()
+    return written
+
+
+def _chunks(items: Iterable, progress: Optional[Progress], cancel) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for _, item in counted(items, progress, cancel):
+        chunk.append(entry_record(item))
+        if len(chunk) == CHUNK_ROWS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_npz(path: str) -> Dict[str, Any]:
+    """
+    the columns of an export_npz() file: "timestamp" as an array, the text
+    columns as lists with None for missing values (variables decoded)
+    """
+    columns: Dict[str, Any] = {}
+    with np.load(path) as archive:
+        columns['timestamp'] = archive['timestamp']
+        for field in TEXT_COLUMNS:
+            data = archive[f"{field}_data"].tobytes()
+            offsets = archive[f"{field}_offsets"]
+            valid = archive[f"{field}_valid"]
+            values = [data[start:end].decode('utf-8') if is_set else None
+                      for start, end, is_set in zip(offsets[:-1].tolist(), offsets[1:].tolist(), valid.tolist())]
+            if field == 'variables':
+                values = [json.loads(value) if value is not None else {} for value in values]
+            columns[field] = values
+    return columns
+
+
+def parquet_available() -> bool:
+    return optional_import("pyarrow.parquet") is not None
+
+
+def export_parquet(path: str, items: Iterable, progress: Optional[Progress] = None, cancel=None) -> int:
+    """
+    the history as a Parquet file with a row group per CHUNK_ROWS entries;
+    needs pyarrow, see parquet_available()
+    """
+    pa = optional_import("pyarrow")
+    parquet = optional_import("pyarrow.parquet")
+    if pa is None or parquet is None:
+        raise RuntimeError("Parquet export needs pyarrow, export .npz instead")
+    schema = pa.schema([(field, pa.string()) for field in TEXT_COLUMNS] + [('timestamp', pa.timestamp('us'))])
+    written = 0
+    with _removed_if_cancelled(path):
+        with parquet.ParquetWriter(path, schema) as writer:
+            for chunk in _chunks(items, progress, cancel):
+                columns = [pa.array([_text_value(record, field) for record in chunk], pa.string())
+                           for field in TEXT_COLUMNS]
+                columns.append(pa.array(_timestamps(chunk), pa.timestamp('us')))
+                writer.write_batch(pa.record_batch(columns, schema=schema))
+                written += len(chunk)
+    return written
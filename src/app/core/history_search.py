@@ -0,0 +1,193 @@
+"""
+History Search - an inverted index over calculation history entries, for
+full-text and structural queries. Entries are added one at a time as they
+are recorded, a query only reads the postings of its terms.
+
+Query syntax, every term has to match:
+    sin x**2            words: tokens of the operation, input or result starting with them
+    op:integrate        the operation
+    fn:sin              a function called in the input or the result
+    sym:y               a free symbol of the input or the result
+    input.fn:sin  input.sym:y  result.fn:sin  result.sym:y
+                        the same, for one side only
+"""
+import re
+from array import array
+from bisect import bisect_left, insort
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(
+    r"(?P<name>[A-Za-z_\u0370-\u03ff][A-Za-z0-9_\u0370-\u03ff]*)(?P<call>\s*\()?"
+    r"|(?P<number>\d+(?:\.\d+)?)"
+)
+# names that are not free symbols, including the display forms of MathFormatter
+CONSTANTS = {"pi", "π", "E", "e", "I", "oo", "zoo", "nan"}
+# display names of functions -> the names they are searched by
+FUNCTION_ALIASES = {"ln": "log"}
+SIDES = ("input", "result")
+# more new words than this since the last query and the vocabulary is sorted again instead of inserted into
+_RESORT = 1000
+
+
+@lru_cache(maxsize=4096)
+def analyse(text: str) -> Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]:
+    """
+    (words, functions, symbols) of an expression as typed or as displayed;
+    cached, the same expressions come back in a history again and again
+    """
+    words: Set[str] = set()
+    functions: Set[str] = set()
+    symbols: Set[str] = set()
+    for name, call, number in _TOKEN.findall(text):
+        if not name:
+            words.add(number)
+            continue
+        words.add(name.lower())
+        if call:
+            functions.add(FUNCTION_ALIASES.get(name, name).lower())
+        elif name not in CONSTANTS:
+            symbols.add(name)
+    if 'e^(' in text:
+        functions.add('exp')  # MathFormatter shows exp(x) as e^(x)
+    return frozenset(words), frozenset(functions), frozenset(symbols)
+
+
+def _intersect(id_arrays: List[np.ndarray]) -> np.ndarray:
+    # the ids in every one of the sorted arrays, looking up the smallest in the others
+    if not id_arrays:
+        return np.empty(0, dtype=np.int64)
+    id_arrays = sorted(id_arrays, key=len)
+    found = id_arrays[0]
+    for ids in id_arrays[1:]:
+        if not len(found):
+            break
+        positions = np.searchsorted(ids, found)
+        positions[positions == len(ids)] = 0
+        found = found[ids[positions] == found]
+    return found
+
+
+def is_structural(query: str) -> bool:
+    """whether query has a term with a qualifier (op:, fn:, sym: ...)"""
+    for term in query.split():
+        qualifier = term.rpartition(':')[0].lower()
+        if qualifier == 'op' or qualifier.rpartition('.')[2] in ('fn', 'sym'):
+            return True
+    return False
+
+
+class HistorySearchIndex:
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self) -> int:
+        return self._documents
+
+    def clear(self):
+        # key -> ids of the entries with it, in the order they were added
+        self._postings: Dict[str, array] = {}
+        self._vocabulary: List[str] = []  # sorted words, for prefix matching
+        self._new_words: List[str] = []
+        self._documents = 0
+
+    def add(self, entry_id: int, entry: dict):
+        """
+        entry is HistoryEntry.to_dict(); ids must grow with every entry added
+        (journal offsets or positions in the history)
+        """
+        operation = (entry.get('operation') or '').strip().lower()
+        words, functions, symbols = analyse(self._input_text(entry))
+        result_words, result_functions, result_symbols = analyse(str(entry.get('result') or ''))
+        words = words | result_words
+        keys = [f"fn:{name}" for name in functions | result_functions]
+        keys += [f"sym:{name}" for name in symbols | result_symbols]
+        keys += [f"input.fn:{name}" for name in functions]
+        keys += [f"input.sym:{name}" for name in symbols]
+        keys += [f"result.fn:{name}" for name in result_functions]
+        keys += [f"result.sym:{name}" for name in result_symbols]
+        if operation:
+            keys.append(f"op:{operation}")
+            words = words | analyse(operation)[0]
+
+        postings = self._postings
+        for word in words:
+            posting = postings.get(word)
+            if posting is None:
+                postings[word] = array('q', (entry_id,))
+                self._new_words.append(word)
+            else:
+                posting.append(entry_id)
+        for key in keys:
+            posting = postings.get(key)
+            if posting is None:
+                postings[key] = array('q', (entry_id,))
+            else:
+                posting.append(entry_id)
+        self._documents += 1
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """
+        ids of the entries matching every term of query, newest first; terms
+        without a word or a qualifier ("+", "=") don't narrow the search
+        """
+        terms = [ids for ids in map(self._term_ids, query.split()) if ids is not None]
+        if not terms:
+            return []
+        found = _intersect(terms)[::-1]
+        if limit is not None:
+            found = found[:limit]
+        return found.tolist()
+
+    def _term_ids(self, term: str) -> Optional[np.ndarray]:
+        qualifier, _, value = term.rpartition(':')
+        if qualifier:
+            qualifier = qualifier.lower()
+            if qualifier == 'op':
+                return self._ids([f"op:{value.lower()}"])
+            side, _, kind = qualifier.rpartition('.')
+            if kind in ('fn', 'sym') and side in ('',) + SIDES:
+                if kind == 'fn':
+                    value = FUNCTION_ALIASES.get(value, value).lower()
+                return self._ids([f"{qualifier}:{value}"])
+            term = value  # not a known qualifier, search the words
+
+        # words of the term, each of them has to start a word of the entry
+        words, _, _ = analyse(term)
+        if not words:
+            return None  # only operators, they are not indexed
+        return _intersect([self._ids(self._words_starting_with(word)) for word in words])
+
+    def _ids(self, keys: Iterable[str]) -> np.ndarray:
+        postings = [self._postings[key] for key in keys if key in self._postings]
+        if not postings:
+            return np.empty(0, dtype=np.int64)
+        if len(postings) == 1:
+            return np.frombuffer(postings[0], dtype=np.int64)
+        return np.unique(np.concatenate([np.frombuffer(posting, dtype=np.int64) for posting in postings]))
+
+    def _words_starting_with(self, prefix: str) -> List[str]:
+        vocabulary = self._vocabulary
+        if len(self._new_words) > _RESORT:
+            vocabulary.extend(self._new_words)
+            vocabulary.sort()
+        else:
+            for word in self._new_words:
+                insort(vocabulary, word)
+        self._new_words.clear()
+
+        found = []
+        for position in range(bisect_left(vocabulary, prefix), len(vocabulary)):
+            if not vocabulary[position].startswith(prefix):
+                break
+            found.append(vocabulary[position])
+        return found
+
+    @staticmethod
+    def _input_text(entry: dict) -> str:
+        optional = entry.get('optional_input_expr')
+        text = str(entry.get('input_expr') or '')
+        return f"{text}, {optional}" if optional else text
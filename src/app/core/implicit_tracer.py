@@ -0,0 +1,175 @@
+"""
+Implicit curve tracing for f(x, y) = 0.
+A coarse grid of cells is subdivided like a quadtree, but only where the zero
+set can be: cells whose corners change sign, or whose corner values are small
+enough that a zero could hide between them (a Lipschitz bound estimated from
+the coarse grid). The surviving leaf cells are turned into line segments with
+marching squares. Evaluations end up concentrated along the curve instead of
+being spread over a uniform grid.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Tuple
+
+import numpy as np
+
+from .progressive_plot import evaluate_grid
+
+
+@dataclass
+class ImplicitCurve:
+    segments: np.ndarray  # shape (n, 2, 2): n segments of two (x, y) points
+    evaluations: int
+    cells: int  # leaf cells that contain part of the curve
+
+
+def _lipschitz_estimate(values: np.ndarray, hx: float, hy: float) -> float:
+    with np.errstate(all="ignore"):
+        slopes = np.concatenate([
+            (np.abs(np.diff(values, axis=1)) / hx).ravel(),
+            (np.abs(np.diff(values, axis=0)) / hy).ravel(),
+        ])
+    slopes = slopes[np.isfinite(slopes)]
+    if slopes.size == 0:
+        return 1.0
+    # a high percentile rather than the max, poles would make every cell a candidate
+    return max(2.0 * float(np.percentile(slopes, 90)), 1e-12)
+
+
+def trace_implicit(
+    f: Callable,
+    x_range: Tuple[float, float],
+    y_range: Tuple[float, float],
+    max_evaluations: int = 40000,
+    initial_cells: int = 32,
+    max_depth: int = 6,
+) -> ImplicitCurve:
+    """
+    f must accept numpy arrays (x, y). max_evaluations bounds the number of
+    points at which f is evaluated, the initial grid included.
+    """
+    x0, x1 = float(x_range[0]), float(x_range[1])
+    y0, y1 = float(y_range[0]), float(y_range[1])
+    n = max(2, min(initial_cells, int(np.sqrt(max_evaluations)) - 1))
+    xs = np.linspace(x0, x1, n + 1)
+    ys = np.linspace(y0, y1, n + 1)
+    X, Y = np.meshgrid(xs, ys)
+    V = evaluate_grid(f, X, Y)
+    evaluations = V.size
+    hx, hy = (x1 - x0) / n, (y1 - y0) / n
+    lipschitz = _lipschitz_estimate(V, hx, hy)
+
+    # one row per cell: lower-left corner, size, and the four corner values
+    # in the order (x0, y0), (x1, y0), (x1, y1), (x0, y1)
+    cx = X[:-1, :-1].ravel()
+    cy = Y[:-1, :-1].ravel()
+    w = np.full(cx.shape, hx)
+    h = np.full(cx.shape, hy)
+    corners = np.stack([V[:-1, :-1], V[:-1, 1:], V[1:, 1:], V[1:, :-1]], axis=-1).reshape(-1, 4)
+
+    leaves = []
+    for depth in range(max_depth + 1):
+        sign_change, may_contain = _classify(corners, w, h, lipschitz)
+        keep = sign_change | may_contain
+        cx, cy, w, h, corners = cx[keep], cy[keep], w[keep], h[keep], corners[keep]
+        sign_change = sign_change[keep]
+        if cx.size == 0:
+            break
+
+        # every split costs five new points: four edge midpoints and the centre
+        affordable = (max_evaluations - evaluations) // 5
+        if depth == max_depth or affordable <= 0:
+            leaves.append((cx, cy, w, h, corners, depth == max_depth))
+            break
+
+        split = np.ones(cx.size, dtype=bool)
+        if cx.size > affordable:
+            # sign changes first, then the cells most likely to hide a zero
+            closeness = np.min(np.abs(corners), axis=1) / (lipschitz * np.hypot(w, h))
+            closeness = np.where(sign_change, -1.0, np.nan_to_num(closeness, nan=np.inf))
+            order = np.argsort(closeness, kind="stable")
+            split[:] = False
+            split[order[:affordable]] = True
+        leaves.append((cx[~split], cy[~split], w[~split], h[~split], corners[~split], False))
+
+        cx, cy, w, h, corners = cx[split], cy[split], w[split], h[split], corners[split]
+        cx, cy, w, h, corners, used = _subdivide(f, cx, cy, w, h, corners)
+        evaluations += used
+
+    segments = []
+    cells = 0
+    for cx, cy, w, h, corners, at_max_depth in leaves:
+        cell_segments, count = _march(cx, cy, w, h, corners, lipschitz, at_max_depth)
+        segments.extend(cell_segments)
+        cells += count
+    segments = np.array(segments, dtype=float).reshape(-1, 2, 2)
+    return ImplicitCurve(segments, evaluations, cells)
+
+
+def _classify(corners, w, h, lipschitz):
+    finite = np.isfinite(corners).all(axis=1)
+    with np.errstate(invalid="ignore"):
+        sign_change = finite & (corners.min(axis=1) <= 0) & (corners.max(axis=1) >= 0)
+        # no sign change, but the values are within reach of zero over half a cell
+        reach = lipschitz * np.hypot(w, h) / 2
+        may_contain = finite & ~sign_change & (np.abs(corners).min(axis=1) <= reach)
+    return sign_change, may_contain
+
+
+def _subdivide(f, cx, cy, w, h, corners):
+    hw, hh = w / 2, h / 2
+    # bottom, right, top, left edge midpoints and the centre
+    px = np.stack([cx + hw, cx + w, cx + hw, cx, cx + hw], axis=1)
+    py = np.stack([cy, cy + hh, cy + h, cy + hh, cy + hh], axis=1)
+    new = evaluate_grid(f, px, py)
+    bottom, right, top, left, centre = (new[:, i] for i in range(5))
+    c00, c10, c11, c01 = (corners[:, i] for i in range(4))
+
+    child_x = np.concatenate([cx, cx + hw, cx + hw, cx])
+    child_y = np.concatenate([cy, cy, cy + hh, cy + hh])
+    child_corners = np.concatenate([
+        np.stack([c00, bottom, centre, left], axis=1),
+        np.stack([bottom, c10, right, centre], axis=1),
+        np.stack([centre, right, c11, top], axis=1),
+        np.stack([left, centre, top, c01], axis=1),
+    ])
+    return (child_x, child_y, np.tile(hw, 4), np.tile(hh, 4), child_corners, new.size)
+
+
+def _march(cx, cy, w, h, corners, lipschitz, at_max_depth):
+    """Marching squares on independent cells, linear interpolation along the edges."""
+    segments = []
+    count = 0
+    for i in range(cx.size):
+        v = corners[i]
+        if not np.isfinite(v).all() or v.min() > 0 or v.max() < 0:
+            continue
+        x, y, cw, ch = cx[i], cy[i], w[i], h[i]
+        if at_max_depth and np.abs(v).min() > 10 * lipschitz * np.hypot(cw, ch):
+            # a sign change with large values on both sides is a pole, not a zero
+            continue
+        points = [(x, y), (x + cw, y), (x + cw, y + ch), (x, y + ch)]
+        crossings = []
+        for a in range(4):
+            b = (a + 1) % 4
+            va, vb = v[a], v[b]
+            if (va < 0) != (vb < 0):
+                t = va / (va - vb)
+                crossings.append((
+                    points[a][0] + t * (points[b][0] - points[a][0]),
+                    points[a][1] + t * (points[b][1] - points[a][1]),
+                ))
+        if len(crossings) == 2:
+            segments.append(crossings)
+        elif len(crossings) == 4:
+            # saddle: the centre value decides which corners are connected
+            if (np.mean(v) < 0) == (v[0] < 0):
+                segments.append([crossings[0], crossings[1]])
+                segments.append([crossings[2], crossings[3]])
+            else:
+                segments.append([crossings[0], crossings[3]])
+                segments.append([crossings[1], crossings[2]])
+        else:
+            continue
+        count += 1
+    return segments, count
@@ -0,0 +1,150 @@
+"""
+Runs one symbolic operation (simplify, solve, integrate, ...) by name.
+This is the same dispatch the main window uses, kept free of any Qt code so it
+can also run inside a worker process.
+"""
+
+from typing import Dict, Optional
+
+import sympy as sp
+
+from .symbolic_engine import SymbolicEngine
+from .perform_substitution import Substitution
+from .algebraic_expressions import AlgebraicExpressions
+from .two_linear_equations import TwoLinearEquations
+from .warmup import warm_up
+
+OPERATIONS = (
+    'simplify', 'expand', 'factor', 'solve', 'substitute',
+    'solve 2 equations', 'differentiate', 'integrate',
+)
+# worker message that carries a warm-up corpus instead of an expression
+WARMUP = 'warmup'
+# live preview of the expression being typed, not offered as a button
+PREVIEW = 'preview'
+PREVIEW_DIGITS = 12
+# seconds the worker must sit idle before it writes new results to the cache file
+RESULT_CACHE_FLUSH_DELAY = 1.0
+# messages the solvers return instead of raising, they are failures rather than results
+ERROR_RESULTS = frozenset({
+    "Error: Enter only one variable.",
+    "Error occured",
+    "Error in input equation",
+    "Error in input equations",
+    "Error: No expression provided.",
+    "Invalid substitution format",
+    "Invalid substitution symbol",
+    "Invalid mathematical expression",
+    "Error: An expected error occured.",
+})
+
+
+def parse_substitutions(subs_str: Optional[str]) -> Dict[str, str]:
+    # "x=3, y=5" -> {"x": "3", "y": "5"}
+    subs_dict = {}
+    try:
+        for part in subs_str.split(','):
+            key, value = part.split('=')
+            subs_dict[key.strip()] = value.strip()
+        return subs_dict
+    except Exception:
+        return {}
+
+
+class OperationRunner:
+    def __init__(self, engine: Optional[SymbolicEngine] = None):
+        self.engine = engine or SymbolicEngine()
+        self.substitution = Substitution()
+        self.equation_solver = AlgebraicExpressions()
+        self.two_equations_solver = TwoLinearEquations()
+
+    def run(self, operation: str, expression, optional_expression=None, raw_optional_expression: Optional[str] = None) -> str:
+        """
+        expression / optional_expression are the inputs after variable replacement,
+        raw_optional_expression is the text the user typed (used for substitution).
+        """
+        self.engine.last_evaluation = {}
+        return self._dispatch(operation, expression, optional_expression, raw_optional_expression)
+
+    @property
+    def last_evaluation(self) -> Dict:
+        # strategy / partial flag of the last engine operation, empty for the solvers
+        return dict(self.engine.last_evaluation)
+
+    def _dispatch(self, operation, expression, optional_expression, raw_optional_expression) -> str:
+        if operation == 'simplify':
+            return str(self.engine.simplify(expression))
+        if operation == 'expand':
+            return str(self.engine.expand(expression))
+        if operation == 'factor':
+            return str(self.engine.factor(expression))
+        if operation == 'solve':
+            return str(self.equation_solver.solve_algerbraic_equation(expression))
+        if operation == 'substitute':
+            substituted_values = parse_substitutions(raw_optional_expression)
+            return str(self.substitution.perform_substitution(expression, substituted_values))
+        if operation == 'solve 2 equations':
+            return str(self.two_equations_solver.solve_two_linear_equations(expression, optional_expression))
+        if operation == 'differentiate':
+            return str(self.engine.differentiate(expression, optional_expression))
+        if operation == 'integrate':
+            return str(self.engine.integrate(expression, optional_expression))
+        if operation == PREVIEW:
+            return self.preview(expression)
+        raise ValueError(f"Unsupported operation: {operation}")
+
+    def preview(self, expression: str) -> str:
+        # numeric value when the input is a constant, otherwise how it was parsed;
+        # both sides of an equation are previewed separately
+        return " = ".join(self._preview_side(side) for side in expression.split("="))
+
+    def _preview_side(self, text: str) -> str:
+        expr = self.engine.parse_expression(text.strip())
+        if expr.free_symbols or expr.is_Integer:
+            return str(expr)
+        value = expr.evalf(PREVIEW_DIGITS)
+        text = str(value)
+        if isinstance(value, sp.Float) and "." in text and "e" not in text:
+            text = text.rstrip("0").rstrip(".")  # 0.750000000000 -> 0.75
+        return text
+
+
+def worker_loop(conn, result_cache_path: Optional[str] = None):
+    """
+    Entry point of the evaluation worker process.
+    Receives (job_id, operation, expression, optional, raw_optional) tuples and
+    answers with (job_id, status, payload, evaluation info). None asks the worker to stop.
+    A WARMUP message carries a list of expressions instead; the warm-up gives way
+    as soon as a real job is waiting on the pipe.
+    """
+    runner = OperationRunner(SymbolicEngine(result_cache_path=result_cache_path))
+    while True:
+        try:
+            # cancelling a job kills the worker, so new results are saved as soon
+            # as it goes idle instead of only on the way out
+            if result_cache_path and runner.engine.result_memo.dirty and not conn.poll(RESULT_CACHE_FLUSH_DELAY):
+                _save_result_cache(runner)
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        job_id, operation, expression, optional_expression, raw_optional = message
+        if operation == WARMUP:
+            stats = warm_up(runner.engine, expression, should_stop=conn.poll)
+            conn.send((job_id, 'ok', '', stats))
+            continue
+        try:
+            result = runner.run(operation, expression, optional_expression, raw_optional)
+            conn.send((job_id, 'ok', result, runner.last_evaluation))
+        except Exception as e:
+            conn.send((job_id, 'error', str(e), {}))
+    _save_result_cache(runner)
+    conn.close()
+
+
+def _save_result_cache(runner: OperationRunner):
+    try:
+        runner.engine.save_result_cache()
+    except OSError:
+        pass
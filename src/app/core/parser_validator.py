@@ -1,120 +1,316 @@
-def validate_characters(expr):
-    allowed = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789+-*/^.()_ ²³√"
-    for ch in expr:
-        if ch not in allowed:
-            return f"Invalid character: '{ch}'"
-    return None
-
-
-def validate_parentheses(expr):
-    count = 0
-    for ch in expr:
-        if ch == "(":
-            count += 1
-        elif ch == ")":
-            count -= 1
-            if count < 0:
-                return "Closing parenthesis without opening one"
-    if count != 0:
-        return "Unmatched parentheses"
-    return None
-
-
-def validate_operators(expr):
-    bad_sequences = ["++", "--", "**", "//", "..", "+*", "+/", "*-", "*/"]
-    for seq in bad_sequences:
-        if seq in expr:
-            return f"Invalid operator sequence: '{seq}'"
-    stripped = expr.strip()
-    if stripped[0] in "*/.^":
-        return "Expression cannot start with operator"
-    if stripped[-1] in "+-*/^.":
-        return "Expression cannot end with operator"
-    return None
-
-
-def handle_powers(expr):
-    expr = expr.replace("x²", "x^2")
-    expr = expr.replace("x³", "x^3")
-    expr = expr.replace("²", "^2")
-    expr = expr.replace("³", "^3")
-    expr = expr.replace("^", "**")
-    return expr
-
-
-def handle_roots(expr):
-    expr = expr.replace("√(", "sqrt(")
-    expr = expr.replace("**(1/2)", ")__SQRT__")
-    expr = expr.replace("(1/2)", "__SQRT__")
-    expr = expr.replace("(1/3)", "__CBRT__")
-    expr = expr.replace("**(1/", "__ROOT__(")
-    return expr
-
-
-def handle_implicit_multiplication(expr):
-    result = ""
-    for i in range(len(expr) - 1):
-        a, b = expr[i], expr[i+1]
-        if a.isdigit() and b.isalpha():
-            result += a + "*"
-            continue
-        if a.isalpha() and b.isdigit():
-            result += a + "*"
-            continue
-        if a == ")" and (b.isalpha() or b.isdigit()):
-            result += a + "*"
-            continue
-        if a.isalpha() and b == "(":
-            result += a + "*"
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import List, NamedTuple, Optional, Tuple
+
+
+# ---------- token level validation ----------
+# One scan over the input produces tokens with their offsets and the
+# diagnostics for them. IncrementalValidator keeps both between edits and only
+# rescans from the first token the edit can have changed.
+
+NUMBER = "number"
+NAME = "name"
+OPERATOR = "operator"
+LPAREN = "lparen"
+RPAREN = "rparen"
+SUPERSCRIPT = "superscript"
+ROOT = "root"
+INVALID = "invalid"
+
+# group names are the token kinds; spaces are matched so they can be skipped
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<number>[0-9]+\.?[0-9]*|\.[0-9]+)
+  | (?P<name>[A-Za-z_]+)
+  | (?P<operator>[-+*/^.])
+  | (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<superscript>[²³])
+  | (?P<root>√)
+  | (?P<space>\ +)
+  | (?P<invalid>.)
+""", re.VERBOSE | re.DOTALL)
+
+BAD_SEQUENCES = ("++", "--", "**", "//", "..", "+*", "+/", "*-", "*/")
+_BAD_SEQUENCE_RANK = {seq: rank for rank, seq in enumerate(BAD_SEQUENCES)}
+
+FUNCTION_NAMES = {
+    "sin": "SIN", "cos": "COS", "tan": "TAN",
+    "sinh": "SINH", "cosh": "COSH", "tanh": "TANH",
+    "asin": "ASIN", "acos": "ACOS", "atan": "ATAN",
+    "ln": "LN", "log": "LOG", "exp": "EXP", "sqrt": "sqrt",
+}
+CONSTANT_NAMES = {"pi": "PI", "e": "E"}
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    start: int
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.text)
+
+
+@dataclass(frozen=True)
+class Diagnostic:
+    kind: str  # invalid_character, unmatched_close, unclosed_paren, operator_sequence, leading_operator, trailing_operator, empty
+    message: str
+    offset: int
+    length: int = 1
+
+
+def _scan(text: str, position: int = 0) -> List[Token]:
+    return [Token(match.lastgroup, match.group(), match.start())
+            for match in _TOKEN_PATTERN.finditer(text, position) if match.lastgroup != "space"]
+
+
+def tokenize(text: str) -> List[Token]:
+    return _scan(text)
+
+
+# state between tokens: open parenthesis offsets, last character and its offset
+_State = Tuple[Tuple[int, ...], Optional[str], int]
+_START_STATE: _State = ((), None, -1)
+
+
+def _check_token(token: Token, state: _State, diagnostics: List[Diagnostic]) -> _State:
+    open_parens, last_char, last_offset = state
+    kind, text, start = token
+    first = text[0]
+    if kind == INVALID:
+        diagnostics.append(Diagnostic("invalid_character", f"Invalid character: '{first}'", start))
+    if last_char is None:
+        if first in "*/.^":
+            diagnostics.append(Diagnostic("leading_operator", "Expression cannot start with operator", start))
+    elif last_char + first in _BAD_SEQUENCE_RANK:
+        diagnostics.append(Diagnostic("operator_sequence", f"Invalid operator sequence: '{last_char + first}'",
+                                      last_offset, start - last_offset + 1))
+    if kind == LPAREN:
+        open_parens = open_parens + (start,)
+    elif kind == RPAREN:
+        if open_parens:
+            open_parens = open_parens[:-1]
+        else:
+            diagnostics.append(Diagnostic("unmatched_close", "Closing parenthesis without opening one", start))
+    return open_parens, text[-1], start + len(text) - 1
+
+
+def _check_end(tokens: List[Token], state: _State) -> List[Diagnostic]:
+    if not tokens:
+        return [Diagnostic("empty", "Expression is empty", 0, 0)]
+    open_parens, last_char, last_offset = state
+    diagnostics = [Diagnostic("unclosed_paren", "Unmatched parentheses", offset) for offset in open_parens]
+    if last_char in "+-*/^.":
+        diagnostics.append(Diagnostic("trailing_operator", "Expression cannot end with operator", last_offset))
+    return diagnostics
+
+
+def _common_prefix(a: str, b: str) -> int:
+    # binary search on slice comparisons, which run in C
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _legacy_rank(diagnostic: Diagnostic):
+    # which problem the old parse_expression reported first: characters,
+    # then parentheses, then operator sequences in BAD_SEQUENCES order
+    if diagnostic.kind == "invalid_character":
+        return (0, 0, diagnostic.offset)
+    if diagnostic.kind == "unmatched_close":
+        return (1, 0, diagnostic.offset)
+    if diagnostic.kind == "unclosed_paren":
+        return (1, 1, diagnostic.offset)
+    if diagnostic.kind == "operator_sequence":
+        return (2, _BAD_SEQUENCE_RANK[diagnostic.message[-3:-1]], diagnostic.offset)
+    return (2, {"leading_operator": 100, "trailing_operator": 101}.get(diagnostic.kind, 102), diagnostic.offset)
+
+
+class IncrementalValidator:
+    """
+    Validates the text of an input field as it is edited. update() only rescans
+    from the first token that ends inside or right before the edited part, so
+    typing at the end of a long expression costs one or two tokens.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.tokens: List[Token] = []
+        self.diagnostics: List[Diagnostic] = []
+        self.rescanned = 0  # tokens scanned by the last update, for tests and benchmarks
+        self._ends: List[int] = []
+        # one entry per token plus one for the end: the state before the token
+        # and how many diagnostics the tokens before it produced
+        self._states: List[_State] = [_START_STATE]
+        self._diagnostic_counts: List[int] = [0]
+        self._token_diagnostics: List[Diagnostic] = []
+
+    def update(self, text: str) -> List[Diagnostic]:
+        old = self.text
+        prefix = len(old) if text.startswith(old) else _common_prefix(old, text)
+        # a token is kept if it, and the character it looked ahead at, are unchanged
+        keep = bisect_left(self._ends, prefix)
+        del self.tokens[keep:], self._ends[keep:], self._states[keep + 1:], self._diagnostic_counts[keep + 1:]
+        del self._token_diagnostics[self._diagnostic_counts[keep]:]
+
+        state = self._states[keep]
+        position = self.tokens[-1].end if self.tokens else 0
+        found = self._token_diagnostics
+        self.rescanned = 0
+        for token in _scan(text, position):
+            state = _check_token(token, state, found)
+            self.tokens.append(token)
+            self._ends.append(token.end)
+            self._states.append(state)
+            self._diagnostic_counts.append(len(found))
+            self.rescanned += 1
+
+        self.text = text
+        self.diagnostics = found + _check_end(self.tokens, state)
+        return self.diagnostics
+
+
+def validate(text: str) -> Tuple[List[Token], List[Diagnostic]]:
+    tokens, diagnostics = [], []
+    state = _START_STATE
+    for token in _scan(text):
+        state = _check_token(token, state, diagnostics)
+        tokens.append(token)
+    return tokens, diagnostics + _check_end(tokens, state)
+
+
+def _implicit_multiplication(left: Token, right: Token, left_is_call: bool) -> bool:
+    if left.kind in (NUMBER, RPAREN, SUPERSCRIPT) or (left.kind == NAME and not left_is_call):
+        if right.kind in (NAME, LPAREN, ROOT):
+            return True
+        return right.kind == NUMBER and left.kind != NUMBER
+    return False
+
+
+def _emit(text: str, tokens: List[Token]) -> str:
+    parts = []
+    previous = None
+    previous_is_call = False
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        following = tokens[index + 1] if index + 1 < len(tokens) else None
+        index += 1
+        if previous is not None and _implicit_multiplication(previous, token, previous_is_call):
+            parts.append("*")
+
+        is_call = token.kind == NAME and token.text in FUNCTION_NAMES and following is not None and following.kind == LPAREN
+        if token.kind == NAME:
+            parts.append(FUNCTION_NAMES[token.text] if is_call else CONSTANT_NAMES.get(token.text, token.text))
+        elif token.kind == SUPERSCRIPT:
+            parts.append("**2" if token.text == "²" else "**3")
+        elif token.text == "^":
+            parts.append("**")
+        elif token.kind == ROOT and following is not None and following.kind in (NAME, NUMBER):
+            # √x is sqrt(x), the operand behaves like a closing parenthesis afterwards
+            parts.append(f"sqrt({CONSTANT_NAMES.get(following.text, following.text)})")
+            previous, previous_is_call = Token(RPAREN, ")", following.end - 1), False
+            index += 1
             continue
-        result += a
-    result += expr[-1]
-    return result
-
-
-def handle_functions(expr):
-    repl = {
-        "sin(": "SIN(",
-        "cos(": "COS(",
-        "tan(": "TAN(",
-        "sinh(": "SINH(",
-        "cosh(": "COSH(",
-        "tanh(": "TANH(",
-        "asin(": "ASIN(",
-        "acos(": "ACOS(",
-        "atan(": "ATAN(",
-        "ln(": "LN(",
-        "log(": "LOG(",
-        "exp(": "EXP("
-    }
-    for k, v in repl.items():
-        expr = expr.replace(k, v)
-    return expr
-
-
-def handle_constants(expr):
-    expr = expr.replace("pi", "PI")
-    expr = expr.replace("e", "E")
-    return expr
+        elif token.kind == ROOT:
+            is_call = True
+            parts.append("sqrt")
+        else:
+            parts.append(token.text)
+        previous, previous_is_call = token, is_call
+    return "".join(parts)
+
+
+# ---------- one-shot fast path ----------
+# parse_expression has no use for the tokens of a valid expression, so it
+# first checks the whole string with C level string and regex operations and
+# rewrites it with a few regex passes that make the same decisions as _emit.
+# Anything these checks reject goes through validate() for the diagnostics.
+
+_INVALID_CHARACTER = re.compile(r"[^0-9A-Za-z_+\-*/^.()²³√]")
+# numbers with more than one dot ("1.2.3") are split into tokens in ways the passes don't follow
+_DOTTED_RUN = re.compile(r"\.[0-9]*\.")
+# everything but the parentheses, as UTF-8 bytes
+_NOT_PARENS = bytes(byte for byte in range(256) if byte not in b"()")
+_PAREN_STEP = {ord("("): 1, ord(")"): -1}
+
+# √ followed by a name or a number; \x00 stands for sqrt until the end so it
+# can't run into a neighbouring name
+_ROOT_OPERAND = re.compile(r"√([A-Za-z_]+|[0-9]+\.?[0-9]*|\.[0-9]+)")
+_ROOT = "\x00"
+# implicit multiplication, the "*" goes right before the second token.
+# A number, ) or superscript before a name, ( or root
+_NUMBER_BEFORE_NAME = re.compile(r"(?<=[0-9)²³])(?=[A-Za-z_(\x00])")
+_DOT_BEFORE_NAME = re.compile(r"(?<=[0-9]\.)(?=[A-Za-z_(\x00])")  # "2." is a number
+# a name, ) or superscript before a number
+_BEFORE_NUMBER = re.compile(r"(?<=[A-Za-z_)²³])(?=[0-9]|\.[0-9])")
+_NAME_BEFORE_ROOT = re.compile(r"(?<=[A-Za-z_])(?=\x00)")
+# a name before (, a call when it is a function name; a match always starts
+# at the beginning of a name, the one starting there would have matched too
+_NAME_BEFORE_PAREN = re.compile(r"([A-Za-z_]+)\(")
+_CONSTANTS = [(name, re.compile(rf"(?<![A-Za-z_]){name}(?![A-Za-z_])"), replacement)
+              for name, replacement in CONSTANT_NAMES.items()]
+
+
+def _is_valid(text: str) -> bool:
+    """True when validate(text) has no diagnostics, for a text without spaces, without tokenizing"""
+    if not text or _INVALID_CHARACTER.search(text):
+        return False
+    if text[0] in "*/.^" or text[-1] in "+-*/^.":
+        return False
+    if "(" in text or ")" in text:
+        parens = text.encode().translate(None, _NOT_PARENS)
+        # balanced, and never more closing than opening ones on the way
+        if text.count("(") != text.count(")") or min(accumulate(map(_PAREN_STEP.__getitem__, parens))) < 0:
+            return False
+    return not any(sequence in text for sequence in BAD_SEQUENCES)
+
+
+def _root_call(match) -> str:
+    return f"{_ROOT}({match.group(1)})"
+
+
+def _call_or_product(match) -> str:
+    name = match.group(1)
+    if name in FUNCTION_NAMES:
+        return f"{FUNCTION_NAMES[name]}("
+    return f"{CONSTANT_NAMES.get(name, name)}*("
+
+
+def _emit_valid(text: str) -> str:
+    """_emit(text, tokenize(text)) for a valid text without spaces or dotted runs"""
+    if "√" in text:
+        text = _ROOT_OPERAND.sub(_root_call, text).replace("√", _ROOT)
+        text = _NAME_BEFORE_ROOT.sub("*", text)
+    text = _NUMBER_BEFORE_NAME.sub("*", text)
+    if "." in text:
+        text = _DOT_BEFORE_NAME.sub("*", text)
+    text = _BEFORE_NUMBER.sub("*", text)
+    if "(" in text:
+        text = _NAME_BEFORE_PAREN.sub(_call_or_product, text)
+    for name, pattern, replacement in _CONSTANTS:
+        if name in text:
+            text = pattern.sub(replacement, text)
+    text = text.replace("²", "**2").replace("³", "**3").replace("^", "**")
+    return text.replace(_ROOT, "sqrt")
 
 
 def parse_expression(expr):
-    expr = expr.replace(" ", "")
-    err = validate_characters(expr)
-    if err: 
-        return {"error": err}
-    err = validate_parentheses(expr)
-    if err: 
-        return {"error": err}
-    err = validate_operators(expr)
-    if err: 
-        return {"error": err}
-    expr = handle_powers(expr)
-    expr = handle_roots(expr)
-    expr = handle_implicit_multiplication(expr)
-    expr = handle_functions(expr)
-    expr = handle_constants(expr)
-    expr = expr.replace("__SQRT__", "SQRT(")
-    expr = expr.replace("__CBRT__", "CBRT(")
-    expr = expr.replace("__ROOT__(", "ROOT(")
-    return {"parsed": expr}
+    # spaces are dropped before anything else, as the old pipeline did: "2 3" is 23
+    compact = expr.replace(" ", "")
+    if _is_valid(compact) and not _DOTTED_RUN.search(compact):
+        return {"parsed": _emit_valid(compact)}
+    # diagnostics are found on the text as typed, so their offsets match it
+    _, diagnostics = validate(expr)
+    if diagnostics:
+        first = min(diagnostics, key=_legacy_rank)
+        return {"error": first.message, "diagnostics": sorted(diagnostics, key=lambda d: d.offset)}
+    return {"parsed": _emit(compact, tokenize(compact))}
@@ -2,20 +2,56 @@ from typing import Union, Tuple, Optional, Dict, List
 import sympy as sp
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 from matplotlib.figure import Figure
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg, NavigationToolbar2QT
-from mpl_toolkits.mplot3d import Axes3D  
 from sympy.parsing.sympy_parser import (
     parse_expr,
     standard_transformations,
     implicit_multiplication_application,
 )
+from .cache import LRUCache
+from .adaptive_sampler import SampleResult, sample_function
+from .progressive_plot import ProgressiveRefinement, lod_levels, make_grid, evaluate_grid
+from .implicit_tracer import trace_implicit
+from .viewport_resampler import ViewportResampler
+
+# Compiled numeric functions shared by every plotter and plot type.
+# sp.lambdify generates and execs Python source, so re-plotting the same
+# expression (new range, pan, another plot type) reuses the compiled callable.
+COMPILED_CACHE = LRUCache(max_size=128)
+
+
+def compile_expression(args, expr: sp.Expr, module: str = "numpy"):
+    arg_key = tuple(args) if isinstance(args, (tuple, list)) else (args,)
+    # SymPy hashes expressions structurally, so equal trees share an entry
+    key = (expr, arg_key, module)
+    try:
+        compiled = COMPILED_CACHE.get(key)
+    except TypeError:  # unhashable input such as a mutable matrix
+        return sp.lambdify(args, expr, module)
+    if compiled is None:
+        compiled = sp.lambdify(args, expr, module)
+        COMPILED_CACHE.put(key, compiled)
+    return compiled
+
+
+def _load_3d_toolkit():
+    # registers the "3d" projection, only the 3D plots need it
+    from mpl_toolkits.mplot3d import Axes3D  # noqa: F401
 
 
 class ExpressionPlotter:
     def __init__(self, variables: Optional[Dict[str, str]] = None):
         self.default_range = (-10, 10)
         self.default_points = 1000
+        # "adaptive" spends the point budget where the curve bends,
+        # "uniform" is the plain linspace
+        self.default_sampling = "adaptive"
+        self.last_sample_stats: Dict[str, int] = {}
+        # implicit plots: "contour" evaluates a uniform grid, "quadtree" traces
+        # the curve with implicit_tracer within an evaluation budget
+        self.implicit_strategy = "contour"
+        self.implicit_max_evaluations = 40000
         self.variables = variables or {}
         self.transformations = (
             standard_transformations + (implicit_multiplication_application,)
@@ -52,6 +88,27 @@ class ExpressionPlotter:
 
         return expr.subs(substitutions) if substitutions else expr
 
+    def _lambdify(self, args, expr: sp.Expr):
+        return compile_expression(args, expr, "numpy")
+
+    def compiled_cache_stats(self) -> Dict[str, int]:
+        return COMPILED_CACHE.stats()
+
+    def _curve_function(self, expr: sp.Expr, x: sp.Symbol):
+        if len(expr.free_symbols) == 0:
+            value = float(expr.evalf())
+            return lambda xs: np.full_like(xs, value, dtype=float)
+        return self._lambdify(x, expr)
+
+    def _sample_curve(self, f, x_range, num_points: int, sampling: str) -> SampleResult:
+        result = sample_function(f, x_range[0], x_range[1], num_points, sampling)
+        self.last_sample_stats = {
+            "evaluations": result.evaluations,
+            "points": len(result.xs),
+            "discontinuities": result.discontinuities,
+        }
+        return result
+
     def _parse(self, expr: Union[str, sp.Expr]) -> sp.Expr:
         if isinstance(expr, str):
             return parse_expr(
@@ -69,6 +126,7 @@ class ExpressionPlotter:
         title: Optional[str] = None,
         num_points: int = None,
         substitute_vars: bool = True,
+        sampling: Optional[str] = None,
     ) -> Figure:
         try:
             expr = self._parse(expr)
@@ -79,7 +137,6 @@ class ExpressionPlotter:
 
             x_range = x_range or self.default_range
             num_points = num_points or self.default_points
-            xs = np.linspace(float(x_range[0]), float(x_range[1]), num_points)
 
             free_vars = expr.free_symbols
             if len(free_vars) > 1:
@@ -89,16 +146,17 @@ class ExpressionPlotter:
                     "2D plotting requires a single variable."
                 )
 
-            if len(free_vars) == 0:
-                const_value = float(expr.evalf())
-                ys = np.full_like(xs, const_value)
-            else:
-                f = sp.lambdify(x, expr, "numpy")
-                with np.errstate(divide="ignore", invalid="ignore"):
-                    ys = f(xs)
+            sampling = sampling or self.default_sampling
+            f = self._curve_function(expr, x)
+            curve = self._sample_curve(f, x_range, num_points, sampling)
 
             fig, ax = plt.subplots(figsize=(8, 6))
-            ax.plot(xs, ys, label=str(expr), linewidth=2)
+            (line,) = ax.plot(curve.xs, curve.ys, label=str(expr), linewidth=2)
+            if curve.y_limits:
+                ax.set_ylim(*curve.y_limits)
+            fig.viewport_resampler = ViewportResampler(
+                ax, [(line, f)], x_range, num_points, sampling
+            )
             ax.set_xlabel(variable, fontsize=12)
             ax.set_ylabel(f"f({variable})", fontsize=12)
             ax.set_title(title or f"Plot of {expr}", fontsize=14)
@@ -145,8 +203,8 @@ class ExpressionPlotter:
                     "Parametric plotting requires a single parameter."
                 )
 
-            fx = sp.lambdify(t, x_expr, "numpy")
-            fy = sp.lambdify(t, y_expr, "numpy")
+            fx = self._lambdify(t, x_expr)
+            fy = self._lambdify(t, y_expr)
 
             param_range = param_range or self.default_range
             num_points = num_points or self.default_points
@@ -176,14 +234,18 @@ class ExpressionPlotter:
         title: Optional[str] = None,
         num_points: int = None,
         substitute_vars: bool = True,
+        sampling: Optional[str] = None,
     ) -> Figure:
         try:
             x = sp.symbols(variable)
             x_range = x_range or self.default_range
             num_points = num_points or self.default_points
-            xs = np.linspace(float(x_range[0]), float(x_range[1]), num_points)
+            sampling = sampling or self.default_sampling
 
             fig, ax = plt.subplots(figsize=(10, 6))
+            curve_limits = []
+            clipped = False
+            curves = []
 
             for i, expr in enumerate(expressions):
                 expr = self._parse(expr)
@@ -198,16 +260,25 @@ class ExpressionPlotter:
                         "Please use single‑variable expressions only."
                     )
 
-                if len(expr.free_symbols) == 0:
-                    const_value = float(expr.evalf())
-                    ys = np.full_like(xs, const_value)
+                f = self._curve_function(expr, x)
+                curve = self._sample_curve(f, x_range, num_points, sampling)
+                if curve.y_limits:
+                    clipped = True
+                    curve_limits.append(curve.y_limits)
                 else:
-                    f = sp.lambdify(x, expr, "numpy")
-                    with np.errstate(divide="ignore", invalid="ignore"):
-                        ys = f(xs)
+                    finite = curve.ys[np.isfinite(curve.ys)]
+                    if finite.size:
+                        curve_limits.append((finite.min(), finite.max()))
 
                 label = labels[i] if labels and i < len(labels) else str(expr)
-                ax.plot(xs, ys, label=label, linewidth=2)
+                (line,) = ax.plot(curve.xs, curve.ys, label=label, linewidth=2)
+                curves.append((line, f))
+
+            if clipped:
+                # the shared view fits the well-behaved curves and the
+                # suggested view of the ones that blow up
+                ax.set_ylim(min(low for low, _ in curve_limits), max(high for _, high in curve_limits))
+            fig.viewport_resampler = ViewportResampler(ax, curves, x_range, num_points, sampling)
 
             ax.set_xlabel(variable, fontsize=12)
             ax.set_ylabel(f"f({variable})", fontsize=12)
@@ -250,7 +321,7 @@ class ExpressionPlotter:
                 float(angle_range[0]), float(angle_range[1]), num_points
             )
 
-            f_r = sp.lambdify(t, r_expr, "numpy")
+            f_r = self._lambdify(t, r_expr)
             with np.errstate(divide="ignore", invalid="ignore"):
                 r_vals = f_r(theta_vals)
 
@@ -275,6 +346,7 @@ class ExpressionPlotter:
         num_points: int = 50,
         substitute_vars: bool = True,
         title: Optional[str] = None,
+        progressive: bool = False,
     ) -> Figure:
         try:
             expr = self._parse(expr)
@@ -289,14 +361,14 @@ class ExpressionPlotter:
                     f"Surface expression must depend only on x and y; extra variables: {names}"
                 )
 
-            xs = np.linspace(float(x_range[0]), float(x_range[1]), num_points)
-            ys = np.linspace(float(y_range[0]), float(y_range[1]), num_points)
-            X, Y = np.meshgrid(xs, ys)
-
-            f = sp.lambdify((x, y), expr, "numpy")
-            with np.errstate(divide="ignore", invalid="ignore"):
-                Z = f(X, Y)
+            f = self._lambdify((x, y), expr)
+            # progressive: draw the coarsest level now, the rest is refined
+            # in the background once the plot window is open
+            levels = lod_levels(num_points) if progressive else [num_points]
+            X, Y = make_grid(x_range, y_range, levels[0])
+            Z = evaluate_grid(f, X, Y)
 
+            _load_3d_toolkit()
             fig = plt.figure(figsize=(8, 6))
             ax = fig.add_subplot(111, projection="3d")
             surf = ax.plot_surface(X, Y, Z, cmap="viridis", edgecolor="none")
@@ -304,7 +376,19 @@ class ExpressionPlotter:
             ax.set_ylabel("y")
             ax.set_zlabel("z")
             ax.set_title(title or f"z = {expr}", fontsize=14)
-            fig.colorbar(surf, shrink=0.5, aspect=10)
+            colorbar = fig.colorbar(surf, shrink=0.5, aspect=10)
+
+            if len(levels) > 1:
+                drawn = {"surface": surf}
+
+                def draw_level(X, Y, Z):
+                    drawn["surface"].remove()
+                    drawn["surface"] = ax.plot_surface(X, Y, Z, cmap="viridis", edgecolor="none")
+                    colorbar.update_normal(drawn["surface"])
+
+                fig.progressive_refinement = ProgressiveRefinement(
+                    f, x_range, y_range, levels[1:], draw_level
+                )
             return fig
         except Exception as e:
             raise ValueError(f"Error plotting 3D surface: {e}")
@@ -343,15 +427,16 @@ class ExpressionPlotter:
             num_points = num_points or self.default_points
             ts = np.linspace(float(param_range[0]), float(param_range[1]), num_points)
 
-            fx = sp.lambdify(t, x_expr, "numpy")
-            fy = sp.lambdify(t, y_expr, "numpy")
-            fz = sp.lambdify(t, z_expr, "numpy")
+            fx = self._lambdify(t, x_expr)
+            fy = self._lambdify(t, y_expr)
+            fz = self._lambdify(t, z_expr)
 
             with np.errstate(divide="ignore", invalid="ignore"):
                 xs = fx(ts)
                 ys = fy(ts)
                 zs = fz(ts)
 
+            _load_3d_toolkit()
             fig = plt.figure(figsize=(8, 6))
             ax = fig.add_subplot(111, projection="3d")
             ax.plot(xs, ys, zs, linewidth=2, label=f"({x_expr}, {y_expr}, {z_expr})")
@@ -373,8 +458,15 @@ class ExpressionPlotter:
         num_points: int = 400,
         substitute_vars: bool = True,
         title: Optional[str] = None,
+        progressive: bool = False,
+        strategy: Optional[str] = None,
+        max_evaluations: Optional[int] = None,
     ) -> Figure:
         try:
+            strategy = strategy or self.implicit_strategy
+            if strategy not in ("contour", "quadtree"):
+                raise ValueError(f"Unknown implicit plot strategy: {strategy}")
+
             parsed = self._parse(expr) if isinstance(expr, str) else expr
 
             if isinstance(parsed, sp.Equality):
@@ -393,17 +485,33 @@ class ExpressionPlotter:
                     f"Implicit expression must depend only on x and/or y; extra variables: {names}"
                 )
 
-            xs = np.linspace(float(x_range[0]), float(x_range[1]), num_points)
-            ys = np.linspace(float(y_range[0]), float(y_range[1]), num_points)
-            X, Y = np.meshgrid(xs, ys)
+            f = self._lambdify((x, y), f_expr)
+            if strategy == "quadtree":
+                # the tracer already spends its budget along the curve,
+                # there is nothing to refine progressively
+                fig, ax = plt.subplots(figsize=(8, 6))
+                self._draw_traced_curve(ax, f, x_range, y_range, max_evaluations)
+                levels = []
+            else:
+                levels = lod_levels(num_points) if progressive else [num_points]
+                X, Y = make_grid(x_range, y_range, levels[0])
+                Z = evaluate_grid(f, X, Y)
 
-            f = sp.lambdify((x, y), f_expr, "numpy")
-            with np.errstate(divide="ignore", invalid="ignore"):
-                Z = f(X, Y)
+                fig, ax = plt.subplots(figsize=(8, 6))
+                cs = ax.contour(X, Y, Z, levels=[0], colors="blue", linewidths=2)
+                ax.clabel(cs, inline=True, fontsize=8)
 
-            fig, ax = plt.subplots(figsize=(8, 6))
-            cs = ax.contour(X, Y, Z, levels=[0], colors="blue", linewidths=2)
-            ax.clabel(cs, inline=True, fontsize=8)
+            if len(levels) > 1:
+                drawn = {"contour": cs}
+
+                def draw_level(X, Y, Z):
+                    drawn["contour"].remove()  # also removes its labels
+                    drawn["contour"] = ax.contour(X, Y, Z, levels=[0], colors="blue", linewidths=2)
+                    ax.clabel(drawn["contour"], inline=True, fontsize=8)
+
+                fig.progressive_refinement = ProgressiveRefinement(
+                    f, x_range, y_range, levels[1:], draw_level
+                )
             ax.set_xlabel("x", fontsize=12)
             ax.set_ylabel("y", fontsize=12)
             ax.set_title(title or f"Implicit plot of {f_expr} = 0", fontsize=14)
@@ -414,12 +522,27 @@ class ExpressionPlotter:
             return fig
         except Exception as e:
             raise ValueError(f"Error creating implicit plot: {e}")
+
+    def _draw_traced_curve(self, ax, f, x_range, y_range, max_evaluations: Optional[int] = None):
+        curve = trace_implicit(
+            f, x_range, y_range,
+            max_evaluations=max_evaluations or self.implicit_max_evaluations,
+        )
+        self.last_sample_stats = {
+            "evaluations": curve.evaluations,
+            "segments": len(curve.segments),
+            "cells": curve.cells,
+        }
+        ax.add_collection(LineCollection(curve.segments, colors="blue", linewidths=2))
+        ax.set_xlim(float(x_range[0]), float(x_range[1]))
+        ax.set_ylim(float(y_range[0]), float(y_range[1]))
         
 class PlotWindowManager:
     
     @staticmethod
     def create_plot_window(parent_widget, figure: Figure, window_title: str = "Plot"):
         from PyQt6.QtWidgets import QDialog, QVBoxLayout, QPushButton
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg, NavigationToolbar2QT
     
         dialog = QDialog(parent_widget)
         dialog.setWindowTitle(window_title)
@@ -436,7 +559,73 @@ class PlotWindowManager:
         layout.addWidget(toolbar)
         layout.addWidget(close_button)
         dialog.setLayout(layout)
-        
+
+        refinement = getattr(figure, "progressive_refinement", None)
+        if refinement is not None:
+            PlotWindowManager._attach_refinement(dialog, canvas, refinement)
+        resampler = getattr(figure, "viewport_resampler", None)
+        if resampler is not None:
+            PlotWindowManager._attach_resampler(dialog, canvas, resampler)
+
         dialog.exec()
     
-        return dialog
\ No newline at end of file
+        return dialog
+
+    @staticmethod
+    def _attach_refinement(dialog, canvas, refinement: ProgressiveRefinement, poll_interval: int = 30):
+        from PyQt6.QtCore import QTimer
+
+        # finer levels are swapped in as they arrive, the window stays usable
+        # with the coarse plot in the meantime
+        timer = QTimer(dialog)
+        timer.setInterval(poll_interval)
+
+        def poll():
+            if refinement.poll():
+                canvas.draw_idle()
+            if refinement.finished:
+                timer.stop()
+
+        timer.timeout.connect(poll)
+        dialog.finished.connect(lambda _result: refinement.cancel())
+        # start once the event loop runs, so the first paint is not delayed
+        QTimer.singleShot(0, refinement.start)
+        timer.start()
+
+    @staticmethod
+    def _attach_resampler(dialog, canvas, resampler: ViewportResampler,
+                          debounce_interval: int = 150, poll_interval: int = 30):
+        from PyQt6.QtCore import QTimer
+
+        # zoom and pan change the limits many times per second, the view is
+        # only re-sampled once it has been still for debounce_interval
+        debounce = QTimer(dialog)
+        debounce.setSingleShot(True)
+        debounce.setInterval(debounce_interval)
+        poll_timer = QTimer(dialog)
+        poll_timer.setInterval(poll_interval)
+
+        def start():
+            resampler.start_pending()
+            if resampler.busy:
+                poll_timer.start()
+
+        def poll():
+            if resampler.poll():
+                canvas.draw_idle()
+            if not resampler.busy:
+                poll_timer.stop()
+
+        def on_xlim_changed(ax):
+            if resampler.request(*ax.get_xlim()):
+                debounce.start()
+
+        debounce.timeout.connect(start)
+        poll_timer.timeout.connect(poll)
+        callback_id = resampler.ax.callbacks.connect("xlim_changed", on_xlim_changed)
+
+        def close(_result):
+            resampler.close()
+            resampler.ax.callbacks.disconnect(callback_id)
+
+        dialog.finished.connect(close)
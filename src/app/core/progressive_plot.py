@@ -0,0 +1,114 @@
+"""
+Level-of-detail rendering for grid based plots (surfaces, implicit curves).
+The plotter draws a coarse grid straight away; a ProgressiveRefinement then
+evaluates finer grids in a background thread, tile by tile, and hands each
+finished level back to a draw callback on the GUI thread, which swaps it into
+the open figure.
+"""
+
+import queue
+import threading
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+
+def lod_levels(num_points: int, coarsest: int = 24) -> List[int]:
+    # grid sizes from coarse to the requested resolution, doubling each step
+    num_points = max(2, int(num_points))
+    level = min(num_points, max(coarsest, num_points // 8))
+    levels = []
+    # a last step that would barely add points is skipped
+    while level * 2 <= num_points:
+        levels.append(level)
+        level *= 2
+    levels.append(num_points)
+    return levels
+
+
+def make_grid(x_range, y_range, num_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    xs = np.linspace(float(x_range[0]), float(x_range[1]), num_points)
+    ys = np.linspace(float(y_range[0]), float(y_range[1]), num_points)
+    return np.meshgrid(xs, ys)
+
+
+def evaluate_grid(f: Callable, X: np.ndarray, Y: np.ndarray) -> np.ndarray:
+    with np.errstate(all="ignore"):
+        Z = np.asarray(f(X, Y))
+    if Z.shape != X.shape:  # constant expressions come back as a scalar
+        Z = np.broadcast_to(Z, X.shape)
+    if np.iscomplexobj(Z):
+        Z = np.where(np.abs(Z.imag) < 1e-12, Z.real, np.nan)
+    return Z.astype(float)
+
+
+class ProgressiveRefinement:
+    """
+    levels are the grid sizes still to compute, coarse first. draw(X, Y, Z) is
+    only ever called from poll(), i.e. on the thread that owns the figure.
+    """
+
+    def __init__(self, f: Callable, x_range, y_range, levels: List[int],
+                 draw: Callable, tile_rows: int = 32):
+        self.f = f
+        self.x_range = x_range
+        self.y_range = y_range
+        self.levels = list(levels)
+        self.draw = draw
+        self.tile_rows = tile_rows
+        self.current_level = None
+        self.error = None
+        self._results = queue.Queue()
+        self._cancelled = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None or not self.levels:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def finished(self) -> bool:
+        # every level drawn, or nothing more is coming
+        if self._cancelled.is_set() or self.error is not None:
+            return True
+        return bool(self.levels) and self.current_level == self.levels[-1]
+
+    def poll(self) -> bool:
+        """Draws the finest level that is ready. Returns True if the figure changed."""
+        latest = None
+        while True:
+            try:
+                latest = self._results.get_nowait()
+            except queue.Empty:
+                break
+        if latest is None or self._cancelled.is_set():
+            return False
+        level, X, Y, Z = latest
+        self.draw(X, Y, Z)
+        self.current_level = level
+        return True
+
+    def wait(self, timeout: float = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        for level in self.levels:
+            X, Y = make_grid(self.x_range, self.y_range, level)
+            Z = np.empty_like(X)
+            # row tiles keep cancellation responsive on large grids
+            for start in range(0, level, self.tile_rows):
+                if self._cancelled.is_set():
+                    return
+                rows = slice(start, start + self.tile_rows)
+                try:
+                    Z[rows] = evaluate_grid(self.f, X[rows], Y[rows])
+                except Exception as e:
+                    self.error = e
+                    return
+            self._results.put((level, X, Y, Z))
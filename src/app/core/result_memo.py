@@ -0,0 +1,121 @@
+"""
+Memoization of expensive symbolic results (simplify, integrate, ...).
+Entries are keyed on the SymPy srepr of the input so that equal expressions
+share a result no matter how they were typed. The memo is bounded by an
+approximate memory budget and can be persisted to a JSON file between runs.
+"""
+
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import sympy as sp
+
+MemoKey = Tuple[str, str, str]
+
+
+class ResultMemo:
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, persist_path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.persist_path = persist_path
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self.dirty = False  # entries added since the last save
+        # key -> (result, result srepr, approximate size in bytes)
+        self._entries: "OrderedDict[MemoKey, Tuple[Any, str, int]]" = OrderedDict()
+        if persist_path:
+            self.load()
+
+    def make_key(self, operation: str, expr: Any, variable: Any = None) -> MemoKey:
+        return (operation, sp.srepr(expr), str(variable) if variable is not None else "")
+
+    def get(self, key: MemoKey) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: MemoKey, result: Any):
+        # only real SymPy results are memoized, error strings are not
+        if not isinstance(result, sp.Basic):
+            return
+        self._store(key, result, sp.srepr(result))
+        self.dirty = True
+
+    def _store(self, key: MemoKey, result: Any, result_srepr: str):
+        size = sum(len(part) for part in key) + len(result_srepr)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.total_bytes -= self._entries.pop(key)[2]
+        self._entries[key] = (result, result_srepr, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+        self.dirty = True
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self._entries),
+            'bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def save(self, path: Optional[str] = None) -> Optional[str]:
+        path = path or self.persist_path
+        if not path:
+            return None
+        data = {
+            'version': 1,
+            'entries': [
+                [operation, expr_srepr, variable, result_srepr]
+                for (operation, expr_srepr, variable), (_, result_srepr, _) in self._entries.items()
+            ],
+        }
+        # write to a temporary file first so a crash never leaves half a cache behind
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        if path == self.persist_path:
+            self.dirty = False
+        return path
+
+    def load(self, path: Optional[str] = None) -> int:
+        path = path or self.persist_path
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"warning: could not read result cache {path}: {e}")
+            return 0
+
+        loaded = 0
+        for item in data.get('entries', []):
+            try:
+                operation, expr_srepr, variable, result_srepr = item
+                result = sp.sympify(result_srepr)
+            except Exception:
+                continue
+            self._store((operation, expr_srepr, variable), result, result_srepr)
+            loaded += 1
+        return loaded
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -2,10 +2,10 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 import sympy as sp
 import os
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.pdfbase.pdfmetrics import stringWidth
 from .math_formatter import MathFormatter
+from . import history_export
+from .session_journal import SessionJournal
+from .history_search import HistorySearchIndex
 
 class HistoryEntry:
     def __init__(self, operation: str, input_expr: str, result: sp.Expr, optional_input_expr=None, timestamp: Optional[datetime] = None, variables: Optional[Dict[str, str]] = None):
@@ -29,12 +29,14 @@ class HistoryEntry:
 
     @classmethod
     def from_dict(cls, data):
+        timestamp = data.get("timestamp")
         return cls(
             data["operation"],
             data["input_expr"],
             data["result"],
             data.get("optional_input_expr"),
-            data.get("variables") # Load from JSON
+            timestamp=datetime.fromisoformat(timestamp) if timestamp else None,
+            variables=data.get("variables") # Load from JSON
         )
 
     def __str__(self) -> str:
@@ -52,10 +54,149 @@ class HistoryEntry:
             
         return MathFormatter.to_display(base)
 class SessionManager:
-    def __init__(self, max_history: int = 100):
+    def __init__(self, max_history: int = 100, journal_path: Optional[str] = None):
+        """
+        with a journal_path every entry is also written to a session journal,
+        and the history of earlier sessions is read back from it. Only the
+        newest max_history entries are kept in memory, older ones are read
+        with load_older() when they are needed
+        """
         self.history: List[HistoryEntry] = []
         self.max_history = max_history
         self.session_start = datetime.now()
+        self.journal: Optional[SessionJournal] = None
+        self._offsets: List[int] = []  # journal offset of every entry in history
+        self._older_offset = 0  # entries before this offset are not loaded
+        self._has_older = False
+        # entries kept in memory, grows when older entries are loaded
+        self._window = max_history
+        # journal offset where the entries of this session start
+        self.session_offset = 0
+        self._session_entries = 0
+        # built on the first search, then kept up to date by add_entry
+        self.search_index = HistorySearchIndex()
+        self._search_ready = False
+        if journal_path:
+            self.journal = SessionJournal(journal_path)
+            self.session_offset = self._older_offset = self.journal.end_offset()
+            self._has_older = True
+            self.load_older(max_history)
+
+    def add_entry(self, entry: HistoryEntry):
+        self.history.append(entry)
+        if self.journal is None:
+            if self._search_ready:
+                self.search_index.add(len(self.history) - 1, entry.to_dict())
+            return
+        data = entry.to_dict()
+        offset = self.journal.append(data)
+        self._offsets.append(offset)
+        if self._search_ready:
+            self.search_index.add(offset, data)
+        self._session_entries += 1
+        # the oldest entries are safe in the journal, they can leave memory
+        extra = len(self.history) - self._window
+        if extra > 0:
+            del self.history[:extra]
+            del self._offsets[:extra]
+            self._older_offset = self._offsets[0]
+            self._has_older = True
+
+    def has_older(self) -> bool:
+        return self._has_older
+
+    def load_older(self, count: Optional[int] = None) -> List[HistoryEntry]:
+        """
+        reads up to count (max_history by default) entries older than the
+        ones in history from the journal and puts them in front of history
+        """
+        if self.journal is None or not self._has_older:
+            return []
+        records, reached_start = self.journal.read_before(self._older_offset, count or self.max_history)
+        entries = []
+        offsets = []
+        for offset, data in records:
+            try:
+                entries.append(HistoryEntry.from_dict(data))
+            except (KeyError, TypeError, ValueError):
+                continue
+            offsets.append(offset)
+        if records:
+            self._older_offset = records[0][0]
+        self._has_older = not reached_start
+        self.history[:0] = entries
+        self._offsets[:0] = offsets
+        self._window = max(self._window, len(self.history))
+        return entries
+
+    def iter_history(self):
+        """every entry of the session history, oldest first, including the ones not in memory"""
+        if self.journal is None:
+            yield from list(self.history)
+            return
+        for _, data in self.journal.entries():
+            try:
+                yield HistoryEntry.from_dict(data)
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    def search(self, query: str, limit: Optional[int] = 100) -> List[HistoryEntry]:
+        """
+        the entries matching query, newest first, from every session in the
+        journal; see history_search for the query syntax, e.g. "op:integrate fn:sin"
+        """
+        found = self.search_ids(query, limit)
+        if self.journal is None:
+            return [self.history[position] for position in found]
+        return [HistoryEntry.from_dict(data) for data in self.journal.read_at(found) if data is not None]
+
+    def search_ids(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """
+        like search(), as journal offsets (positions in history without a
+        journal), for readers that only want some of the entries
+        """
+        if not self._search_ready:
+            self._build_search_index()
+        return self.search_index.search(query, limit)
+
+    def _build_search_index(self):
+        self.search_index.clear()
+        if self.journal is None:
+            for position, entry in enumerate(self.history):
+                self.search_index.add(position, entry.to_dict())
+        else:
+            for offset, data in self.journal.entries():
+                self.search_index.add(offset, data)
+        self._search_ready = True
+
+    def compact_journal(self, keep_last: Optional[int] = None) -> int:
+        """
+        rewrites the journal without the entries removed by clear_history,
+        and keeps only the newest keep_last entries; returns how many are kept
+        """
+        if self.journal is None:
+            return 0
+        kept = self.journal.compact(keep_last)
+        self._search_ready = False
+        # offsets changed, find where this session starts and read the entries in memory back
+        session_entries = []
+        if self._session_entries:
+            session_entries, _ = self.journal.read_before(self.journal.end_offset(), self._session_entries)
+        self.session_offset = session_entries[0][0] if session_entries else self.journal.end_offset()
+        count = min(len(self.history), kept)
+        self.history.clear()
+        self._offsets.clear()
+        self._older_offset = self.journal.end_offset()
+        self._has_older = True
+        self.load_older(count or self.max_history)
+        return kept
+
+    def close(self):
+        if self.journal is None:
+            return
+        if self.journal.dead_bytes:
+            self.journal.compact()
+        self.journal.close()
         
     def get_history(self, limit: Optional[int] = None) -> List[HistoryEntry]:
         if limit:
@@ -72,69 +213,64 @@ class SessionManager:
     
     def clear_history(self):
         self.history.clear()
+        self.search_index.clear()
+        self._search_ready = True
+        if self.journal is not None:
+            self.journal.clear()
+            self._offsets.clear()
+            self.session_offset = self._older_offset = self.journal.end_offset()
+            self._session_entries = 0
+            self._has_older = False
         
-    def export_history(self, format, name, calculation_list):
+    # structured formats -> (file extension, history_export writer)
+    STRUCTURED_EXPORTS = {
+        'jsonl': ('jsonl', history_export.export_jsonl),
+        'csv': ('csv', history_export.export_csv),
+        'latex': ('tex', history_export.export_latex),
+        'npz': ('npz', history_export.export_npz),
+        'parquet': ('parquet', history_export.export_parquet),
+    }
+
+    def export_history(self, format, name, calculation_list, progress=None, cancel=None):
+        """
+        calculation_list can be any iterable, e.g. iter_history(); progress
+        and cancel are passed on to history_export. The structured formats
+        (jsonl, csv, latex, npz, parquet) write HistoryEntry.to_dict() of
+        every entry to HistoryFiles
+        """
         if format == 'txt':
-            return self.export_text(name, calculation_list)
+            return self.export_text(name, calculation_list, progress, cancel)
         elif format == 'pdf':
-            return self.export_pdf(name, calculation_list)
+            return self.export_pdf(name, calculation_list, progress, cancel)
+        elif format in self.STRUCTURED_EXPORTS:
+            extension, export = self.STRUCTURED_EXPORTS[format]
+            filepath = self.create_export_file(name, extension)
+            export(filepath, calculation_list, progress, cancel)
+            return filepath
         else:
             raise ValueError(f"Unsupported export format: {format}")
     
-    def export_text(self, name, calculation_list):
+    def export_text(self, name, calculation_list, progress=None, cancel=None):
         filepath = self.create_text_file(name)
-        self.write_text_file(filepath, calculation_list)
+        history_export.export_text(filepath, calculation_list, progress, cancel)
         return filepath
     
     def create_text_file(self, name):
+        return self.create_export_file(name, "txt")
+
+    def create_export_file(self, name, extension):
         os.makedirs("HistoryFiles", exist_ok = True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{name}_{timestamp}.txt"
+        filename = f"{name}_{timestamp}.{extension}"
         return os.path.join("HistoryFiles", filename)
     
     def write_text_file(self, filepath, calculation_list):
-        with open(filepath, "w", encoding = "utf-8") as file:
-            for index, item in enumerate(calculation_list):
-                file.write(str(index + 1) + ". " + str(item) + "\n")
+        history_export.export_text(filepath, calculation_list)
     
-    def export_pdf(self, name, calculation_list):
+    def export_pdf(self, name, calculation_list, progress=None, cancel=None):
         pdf_file_name = f'{name}.pdf'
-        title = 'Calculation History'
-        max_width = 500
-        font = "Times-Roman"
-        font_size = 12
-
-        pdf = canvas.Canvas(pdf_file_name)
-        pdf.drawCentredString(300, 770, title)
-        pdf.setFillColorRGB(0, 0, 255)
-        pdf.line(30, 750, 550, 750)
-
-        text = pdf.beginText(40, 720)
-        text.setFont(font, font_size)
-        text.setLeading(20)
-        text.setFillColor(colors.black)
-
-        for index, line in enumerate(calculation_list):
-            numbered_line = f"{index + 1}. {str(line)}"
-            wrapped_lines = self.wrap_text(numbered_line, font, font_size, max_width)
-            for wrapped_line in wrapped_lines:
-                text.textLine(wrapped_line)
-            
-        pdf.drawText(text)
-        pdf.save()
+        history_export.export_pdf(pdf_file_name, calculation_list, progress, cancel)
         return pdf_file_name
     
     def wrap_text(self, text, font, font_size, max_width):
-        words = text.split()
-        lines = []
-        current = ""
-        for word in words:
-            test = current + (" " if current else "") + word
-            if stringWidth(test, font, font_size) <= max_width:
-                current = test
-            else:
-                lines.append(current)
-                current = word
-        if current:
-            lines.append(current)
-        return lines
\ No newline at end of file
+        return history_export.LineWrapper(font, font_size, max_width).wrap(text)
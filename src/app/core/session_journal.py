@@ -0,0 +1,216 @@
+"""
+Session Journal - the calculation history as an append-only JSON lines file.
+Every record is flushed to the OS as it is appended, fsync is batched. Reads
+go backwards from a byte offset, so a session only has to read its newest
+entries on startup and the older ones when they are asked for. Clearing the
+history appends a "clear" record that hides everything before it until
+compact() rewrites the file without the dead records.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+ADD = "add"
+CLEAR = "clear"
+
+
+class SessionJournal:
+
+    # bytes read at a time when reading backwards
+    block_size = 64 * 1024
+
+    def __init__(self, path: str, sync_every: int = 32, sync_interval: float = 1.0):
+        """
+        fsync after sync_every records or sync_interval seconds, whichever
+        comes first; a crash of the app loses nothing, a power cut at most
+        the records since the last fsync
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        # the records before this offset are hidden by a clear record
+        self.dead_bytes = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._truncate_torn_tail()
+        self._file = open(path, 'ab')
+
+    def end_offset(self) -> int:
+        """size of the journal in bytes, the offset the next record is written at"""
+        return self._file.tell()
+
+    def append(self, entry: Dict[str, Any]) -> int:
+        """writes one history entry (HistoryEntry.to_dict()), returns its offset"""
+        return self._write({'op': ADD, 'entry': entry})
+
+    def clear(self):
+        self._write({'op': CLEAR})
+        self.dead_bytes = self.end_offset()
+        self.sync()
+
+    def sync(self):
+        self._file.flush()
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def _write(self, record: Dict[str, Any]) -> int:
+        offset = self.end_offset()
+        line = json.dumps(record, default=str, ensure_ascii=False) + '\n'
+        self._file.write(line.encode('utf-8'))
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+        return offset
+
+    def read_before(self, offset: int, count: int) -> Tuple[List[Tuple[int, Dict[str, Any]]], bool]:
+        """
+        up to count entries that end at or before offset, as (offset, entry)
+        oldest first, and whether there is nothing older: the start of the
+        file or a clear record was reached
+        """
+        self._file.flush()
+        found = []
+        reached_start = False
+        with open(self.path, 'rb') as f:
+            for line_offset, line in self._lines_backwards(f, offset):
+                record = self._decode(line)
+                if record is None:
+                    continue
+                if record.get('op') == CLEAR:
+                    self.dead_bytes = max(self.dead_bytes, line_offset + len(line))
+                    reached_start = True
+                    break
+                if record.get('op') == ADD:
+                    if len(found) == count:
+                        break
+                    found.append((line_offset, record['entry']))
+            else:
+                reached_start = True
+        found.reverse()
+        return found, reached_start
+
+    def read_at(self, offsets: Iterable[int]) -> List[Optional[Dict[str, Any]]]:
+        """the entries at offsets returned by append() or read_before(), None where there is none"""
+        self._file.flush()
+        found = []
+        with open(self.path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                record = self._decode(f.readline())
+                found.append(record['entry'] if record is not None and record.get('op') == ADD else None)
+        return found
+
+    def entries(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """(offset, entry) for every entry after the last clear record, oldest first, read a line at a time"""
+        self._file.flush()
+        offset = self._last_clear_end()
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                record = self._decode(line)
+                if record is not None and record.get('op') == ADD:
+                    yield offset, record['entry']
+                offset += len(line)
+
+    def compact(self, keep_last: Optional[int] = None) -> int:
+        """
+        rewrites the journal with only the entries after the last clear
+        record, and only the newest keep_last of those; returns how many are kept
+        """
+        self.sync()
+        start = self._last_clear_end()
+        skip = 0
+        if keep_last is not None:
+            total = sum(1 for _ in self.entries())
+            skip = max(0, total - keep_last)
+
+        kept = 0
+        # write to a temporary file first so a crash never leaves half a journal behind
+        tmp_path = f"{self.path}.tmp"
+        with open(self.path, 'rb') as source, open(tmp_path, 'wb') as target:
+            source.seek(start)
+            for line in source:
+                record = self._decode(line)
+                if record is None or record.get('op') != ADD:
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                target.write(line)
+                kept += 1
+            target.flush()
+            os.fsync(target.fileno())
+
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'ab')
+        self.dead_bytes = 0
+        self._unsynced = 0
+        return kept
+
+    def _last_clear_end(self) -> int:
+        # the offset after the newest clear record, 0 if there is none
+        with open(self.path, 'rb') as f:
+            for line_offset, line in self._lines_backwards(f, self.end_offset()):
+                if CLEAR.encode() not in line:
+                    continue
+                record = self._decode(line)
+                if record is not None and record.get('op') == CLEAR:
+                    return line_offset + len(line)
+        return 0
+
+    def _lines_backwards(self, f, end: int) -> Iterator[Tuple[int, bytes]]:
+        """(offset, line) for the complete lines before end, newest first"""
+        position = end
+        buffer = b''
+        stop = 0  # buffer[:stop] is bytes position..end not yielded yet, it ends with a newline
+        while True:
+            cut = buffer.rfind(b'\n', 0, stop - 1) if stop else -1
+            while cut == -1 and position > 0:
+                step = min(self.block_size, position)
+                position -= step
+                f.seek(position)
+                buffer = f.read(step) + buffer[:stop]
+                stop = len(buffer)
+                cut = buffer.rfind(b'\n', 0, stop - 1)
+            if not stop:
+                return
+            yield position + cut + 1, buffer[cut + 1:stop]
+            stop = cut + 1
+
+    @staticmethod
+    def _decode(line: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        return record if isinstance(record, dict) else None
+
+    def _truncate_torn_tail(self):
+        # a record cut short by a crash is dropped, so the next one starts on its own line
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            end = size
+            while end > 0:
+                step = min(self.block_size, end)
+                f.seek(end - step)
+                block = f.read(step)
+                newline = block.rfind(b'\n')
+                if newline != -1:
+                    end = end - step + newline + 1
+                    break
+                end -= step
+            if end != size:
+                f.truncate(end)
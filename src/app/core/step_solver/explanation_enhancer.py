@@ -3,13 +3,7 @@ import json
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from .explanation_text_library import ExplanationTexts
-
-try:
-    # modern OpenAI SDK
-    from openai import OpenAI
-    _openai_available = True
-except Exception:
-    _openai_available = False
+from ...utils.lazy_import import optional_import
 
 
 @dataclass
@@ -31,10 +25,17 @@ class ExplanationEnhancer:
         self.api_key = api_key or os.getenv(f"{api_type.upper()}_API_KEY") if api_type else None
         self.use_api = (self.api_type in {"openai"} and (self.api_key or os.getenv("OPENAI_API_KEY")))
         self.model = model
-        self._client = OpenAI(api_key=(self.api_key or os.getenv("OPENAI_API_KEY"))) if (self.use_api and _openai_available) else None
+        self._client = self._create_client() if self.use_api else None
         self._cache: Dict[Tuple, Dict] = {}
         self.library = ExplanationTexts()
 
+    def _create_client(self):
+        # the OpenAI SDK is slow to import, only load it when the API is actually used
+        openai = optional_import("openai")
+        if openai is None:
+            return None
+        return openai.OpenAI(api_key=(self.api_key or os.getenv("OPENAI_API_KEY")))
+
     # ---------- Public ----------
     def enhance_all_steps(self, steps: List[Dict], context: Dict) -> List[Dict]:
         out = []
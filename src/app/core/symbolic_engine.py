@@ -3,40 +3,151 @@ This file handles all the math calculations using SymPy library.
 Think of it as the brain that does all the symbolic math work.
 """
 
-from typing import Union, Dict, Any
+from typing import Union, Dict, Any, Optional
 import sympy as sp
 from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
 from sympy import Derivative 
 from sympy import diff, sin, exp 
 from sympy.abc import x,y 
 from sympy import Symbol, sympify
+from .cache import LRUCache
+from .result_memo import ResultMemo
+from .time_budget import BudgetExceeded, run_with_budget
+
+# Seconds each operation may run before the engine switches to a cheaper strategy.
+DEFAULT_TIME_BUDGETS = {
+    'simplify': 5.0,
+    'expand': 5.0,
+    'factor': 5.0,
+    'integrate': 10.0,
+}
+FALLBACK_TIME_BUDGET = 2.0
+
 class SymbolicEngine:
     # This is our main calculator class that does all the symbolic math.
-    def __init__(self):
+    def __init__(self, parse_cache_size: int = 256, result_cache_bytes: int = 8 * 1024 * 1024, result_cache_path: Optional[str] = None,
+                 time_budgets: Optional[Dict[str, float]] = None):
         
         self.variables: Dict[str, sp.Expr] = {}  # Store user-defined variables
         self.transformations = (standard_transformations + (implicit_multiplication_application,)) # Allow implicit multiplication like 2x
+        # Parsed expressions are reused when the same text comes back (history, learning mode)
+        self.parse_cache = LRUCache(parse_cache_size)
+        self.variables_version = 0  # bumped whenever the variable table changes
+        # Finished simplify/integrate/... results, optionally kept on disk between runs
+        self.result_memo = ResultMemo(result_cache_bytes, result_cache_path)
+        # None or 0 for an operation means no limit
+        self.time_budgets: Dict[str, Optional[float]] = dict(DEFAULT_TIME_BUDGETS if time_budgets is None else time_budgets)
+        self.fallback_time_budget = FALLBACK_TIME_BUDGET
+        # How the last simplify/integrate/... result was obtained, see _record_evaluation
+        self.last_evaluation: Dict[str, Any] = {}
         
     def parse_expression(self, expr_str: str) -> sp.Expr:
+        key = ('parse', self._normalize_input(expr_str), self._transformations_key(), self.variables_version)
+        cached = self.parse_cache.get(key)
+        if cached is not None:
+            return cached
         try:
-            return parse_expr(expr_str, transformations=self.transformations)
+            expr = parse_expr(expr_str, transformations=self.transformations)
         except Exception as e:
             raise ValueError(f"Failed to parse expression: {str(e)}")
+        self.parse_cache.put(key, expr)
+        return expr
+
+    def _normalize_input(self, expr_str: str) -> str:
+        # Only whitespace is normalised, "x y" and "xy" can parse differently
+        return " ".join(expr_str.split())
+
+    def _transformations_key(self) -> tuple:
+        return tuple(getattr(t, '__name__', repr(t)) for t in self.transformations)
+
+    @property
+    def parse_cache_hits(self) -> int:
+        return self.parse_cache.hits
+
+    @property
+    def parse_cache_misses(self) -> int:
+        return self.parse_cache.misses
+
+    def parse_cache_stats(self) -> Dict[str, int]:
+        return self.parse_cache.stats()
+
+    def clear_parse_cache(self):
+        self.parse_cache.clear()
+
+    def _memoized(self, operation: str, expr, variable, compute, fallbacks=()):
+        key = self.result_memo.make_key(operation, expr, variable)
+        cached = self.result_memo.get(key)
+        if cached is not None:
+            self._record_evaluation(operation, 'cached', False)
+            return cached
+        result, strategy, partial = self._run_with_fallbacks(operation, compute, fallbacks)
+        self._record_evaluation(operation, strategy, partial)
+        # partial answers are not remembered, a later run may have more time
+        if not partial:
+            self.result_memo.put(key, result)
+        return result
+
+    def _run_with_fallbacks(self, operation: str, compute, fallbacks):
+        """
+        Runs compute within the operation's time budget. When the budget runs out the
+        fallbacks (name, callable) are tried in order, each with the fallback budget;
+        the last one runs without a limit so there is always an answer.
+        Returns (result, strategy name, partial flag).
+        """
+        budget = self.time_budgets.get(operation)
+        if not budget or not fallbacks:
+            return compute(), 'full', False
+        try:
+            return run_with_budget(compute, budget), 'full', False
+        except BudgetExceeded:
+            pass
+        for index, (name, fallback) in enumerate(fallbacks):
+            is_last = index == len(fallbacks) - 1
+            try:
+                result = fallback() if is_last else run_with_budget(fallback, self.fallback_time_budget)
+                return result, name, True
+            except BudgetExceeded:
+                continue
+
+    def _record_evaluation(self, operation: str, strategy: str, partial: bool):
+        self.last_evaluation = {
+            'operation': operation,
+            'strategy': strategy,
+            'partial': partial,
+        }
+
+    def set_time_budget(self, operation: str, seconds: Optional[float]):
+        self.time_budgets[operation] = seconds
+
+    def result_cache_stats(self) -> Dict[str, int]:
+        return self.result_memo.stats()
+
+    def save_result_cache(self) -> Optional[str]:
+        return self.result_memo.save()
 
     def simplify(self, expr: Union[str, sp.Expr]) -> sp.Expr:
         if isinstance(expr, str):
             expr = self.parse_expression(expr)
-        return sp.simplify(expr)
+        return self._memoized('simplify', expr, None, lambda: sp.simplify(expr), fallbacks=(
+            ('ratsimp', lambda: sp.ratsimp(expr)),
+            ('cancel', lambda: sp.cancel(expr)),
+        ))
     
     def expand(self, expr: Union[str, sp.Expr]) -> sp.Expr:
         if isinstance(expr, str):
             expr = self.parse_expression(expr)
-        return sp.expand(expr)
+        return self._memoized('expand', expr, None, lambda: sp.expand(expr), fallbacks=(
+            ('shallow expand', lambda: sp.expand(expr, deep=False)),
+            ('unevaluated', lambda: expr),
+        ))
     
     def factor(self, expr: Union[str, sp.Expr]) -> sp.Expr:
         if isinstance(expr, str):
             expr = self.parse_expression(expr)
-        return sp.factor(expr)
+        return self._memoized('factor', expr, None, lambda: sp.factor(expr), fallbacks=(
+            ('factor_terms', lambda: sp.factor_terms(expr)),
+            ('unevaluated', lambda: expr),
+        ))
     
     def substitute(self, expr: Union[str, sp.Expr], substitutions: Dict[str, Any]) -> sp.Expr:
         if isinstance(expr, str):
@@ -70,7 +181,14 @@ class SymbolicEngine:
         if isinstance(expr, str):
             expr = self.parse_expression(expr)
         self.variables[name] = expr
+        self.variables_version += 1
         return expr
+
+    def remove_variable(self, name: str) -> Optional[sp.Expr]:
+        if name not in self.variables:
+            return None
+        self.variables_version += 1
+        return self.variables.pop(name)
     
     def get_variable(self, name: str) -> sp.Expr:
         if name not in self.variables:
@@ -86,7 +204,12 @@ class SymbolicEngine:
         for name, value in self.variables.items():
             expression = expression.replace(name, f"({value})")
         if action in ["expand", "simplify", "factor"]:
-            return sp.sympify(expression, locals=self.variables)
+            key = ('sympify', self._normalize_input(expression), self.variables_version)
+            cached = self.parse_cache.get(key)
+            if cached is None:
+                cached = sp.sympify(expression, locals=self.variables)
+                self.parse_cache.put(key, cached)
+            return cached
         return expression
     
     def integrate(self, expr, optional_expression_input):
@@ -94,15 +217,23 @@ class SymbolicEngine:
             sympy_expr = sympify(expr)
             if not optional_expression_input:
                 var = self._infer_variable(sympy_expr)
-                return sp.integrate(sympy_expr, var)
+                return self._integrate_with_budget(sympy_expr, var)
             if optional_expression_input.isalpha() and len(optional_expression_input) == 1:
                 var = Symbol(optional_expression_input)
-                return sp.integrate(sympy_expr, var)
+                return self._integrate_with_budget(sympy_expr, var)
             return "Error: Enter only one variable."
 
         except Exception as e:
             return "Error occured"
 
+    def _integrate_with_budget(self, sympy_expr, var):
+        # indefinite integrals have no interval for numeric quadrature, so the last
+        # resort is to leave the integral unevaluated
+        return self._memoized('integrate', sympy_expr, var, lambda: sp.integrate(sympy_expr, var), fallbacks=(
+            ('risch', lambda: sp.integrate(sympy_expr, var, risch=True)),
+            ('unevaluated', lambda: sp.Integral(sympy_expr, var)),
+        ))
+
     def _infer_variable(self, sympy_expr):
         free_vars = list(sympy_expr.free_symbols)
         if len(free_vars) == 1:
@@ -115,10 +246,10 @@ class SymbolicEngine:
     def differentiate(self, expr, optional_expression_input):
             if not optional_expression_input:
                 var = Symbol(self.find_symbol(expr))
-                return diff(expr, var)
+                return self._memoized('differentiate', sympify(expr), var, lambda: diff(expr, var))
             elif optional_expression_input.isalpha() and len(optional_expression_input) == 1:
                 var = Symbol(optional_expression_input)
-                return diff(expr, var)
+                return self._memoized('differentiate', sympify(expr), var, lambda: diff(expr, var))
             else:
                 return "Error: Enter only one variable."
         
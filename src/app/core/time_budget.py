@@ -0,0 +1,66 @@
+"""
+Run a callable with a wall-clock time budget.
+In the main thread of a Unix process (the GUI, the evaluation worker, batch
+workers) the budget is enforced with SIGALRM, which interrupts SymPy wherever it
+is. Elsewhere the call runs in a helper thread and is abandoned when the budget
+runs out, since Python threads cannot be stopped from outside.
+"""
+
+import signal
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+class BudgetExceeded(BaseException):
+    # BaseException so that SymPy's internal "except Exception" blocks do not swallow it
+    pass
+
+
+def _can_use_alarm() -> bool:
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+def run_with_budget(func: Callable[[], Any], seconds: Optional[float]) -> Any:
+    if not seconds or seconds <= 0:
+        return func()
+    if _can_use_alarm():
+        return _run_with_alarm(func, seconds)
+    return _run_in_thread(func, seconds)
+
+
+def _run_with_alarm(func: Callable[[], Any], seconds: float) -> Any:
+    def on_alarm(signum, frame):
+        raise BudgetExceeded(f"time budget of {seconds:g}s exceeded")
+
+    started = time.monotonic()
+    previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+    previous_delay, previous_interval = signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return func()
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+        # put back an outer budget if one was running
+        if previous_delay > 0:
+            remaining = max(previous_delay - (time.monotonic() - started), 0.001)
+            signal.setitimer(signal.ITIMER_REAL, remaining, previous_interval)
+
+
+def _run_in_thread(func: Callable[[], Any], seconds: float) -> Any:
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = func()
+        except BaseException as e:
+            outcome['error'] = e
+
+    worker = threading.Thread(target=target, daemon=True)
+    worker.start()
+    worker.join(seconds)
+    if worker.is_alive():
+        raise BudgetExceeded(f"time budget of {seconds:g}s exceeded")
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('result')
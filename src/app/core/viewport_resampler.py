@@ -0,0 +1,99 @@
+"""
+Re-sampling of 2D plots for the visible x range.
+A plot is sampled once for its x_range; after zooming or panning the plot
+window asks the ViewportResampler for the new view. The curves are re-sampled
+in a background thread with the same compiled functions, over the view plus a
+margin so that small pans do not need another pass. Only the newest request
+is drawn, older ones are dropped.
+"""
+
+import queue
+import threading
+from typing import Callable, List, Tuple
+
+from .adaptive_sampler import sample_function
+
+
+class ViewportResampler:
+
+    def __init__(self, ax, curves: List[Tuple[object, Callable]], x_range, num_points: int,
+                 sampling: str = "adaptive", margin: float = 0.25):
+        self.ax = ax
+        self.curves = curves  # (matplotlib line, compiled function) pairs
+        self.num_points = num_points
+        self.sampling = sampling
+        self.margin = margin
+        self.sampled_range = (float(x_range[0]), float(x_range[1]))
+        self.pending_range = None
+        self.generation = 0
+        self.applied_generation = 0
+        self._results = queue.Queue()
+        self._closed = threading.Event()
+
+    def needs_resample(self, x_min: float, x_max: float) -> bool:
+        low, high = self.sampled_range
+        if x_min < low or x_max > high:
+            return True
+        # zoomed in far enough that the samples look coarse
+        return (high - low) > 2 * (x_max - x_min)
+
+    def request(self, x_min: float, x_max: float) -> bool:
+        """Records the visible range. Returns True if it has to be re-sampled."""
+        x_min, x_max = sorted((float(x_min), float(x_max)))
+        if self.needs_resample(x_min, x_max):
+            self.pending_range = (x_min, x_max)
+            return True
+        self.pending_range = None
+        return False
+
+    def start_pending(self):
+        if self.pending_range is None or self._closed.is_set():
+            return
+        x_min, x_max = self.pending_range
+        self.pending_range = None
+        width = x_max - x_min
+        low, high = x_min - self.margin * width, x_max + self.margin * width
+
+        self.generation += 1
+        worker = threading.Thread(target=self._run, args=(self.generation, low, high), daemon=True)
+        worker.start()
+
+    @property
+    def busy(self) -> bool:
+        return self.applied_generation != self.generation
+
+    def poll(self) -> bool:
+        """Draws the newest finished re-sample. Returns True if the lines changed."""
+        latest = None
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            # results of views that moved on since can arrive in any order
+            if result[0] == self.generation:
+                latest = result
+        if latest is None or self._closed.is_set():
+            return False
+        generation, low, high, samples = latest
+        for (line, _f), sample in zip(self.curves, samples):
+            line.set_data(sample.xs, sample.ys)
+        self.sampled_range = (low, high)
+        self.applied_generation = generation
+        return True
+
+    def close(self):
+        self._closed.set()
+
+    def _run(self, generation: int, low: float, high: float):
+        samples = []
+        for _line, f in self.curves:
+            if generation != self.generation or self._closed.is_set():
+                return
+            try:
+                samples.append(sample_function(f, low, high, self.num_points, self.sampling))
+            except Exception:
+                # keep showing the old samples
+                self._results.put((generation, *self.sampled_range, []))
+                return
+        self._results.put((generation, low, high, samples))
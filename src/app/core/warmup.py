@@ -0,0 +1,88 @@
+"""
+Background warm-up of SymPy.
+The first parse and the first simplify in a process are much slower than the
+rest: SymPy loads modules lazily, builds the parser transformations and fills
+its caches on first use. Running a small corpus (the autocomplete templates)
+through an engine right after start-up moves that cost off the user's first
+real operation.
+"""
+
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .symbolic_engine import SymbolicEngine
+
+PATTERNS_FILE = Path(__file__).parent / "autocomplete" / "patterns.json"
+WARMUP_OPERATIONS = ("simplify", "expand", "factor")
+
+
+def load_corpus(patterns_file: Optional[Path] = None, limit: int = 50) -> List[str]:
+    """Most common templates first, placeholders such as {a} become plain symbols."""
+    try:
+        with open(patterns_file or PATTERNS_FILE, "r", encoding="utf-8") as f:
+            patterns = json.load(f)
+    except (OSError, ValueError):
+        return []
+    definitions = [definition for group in patterns.values() for definition in group]
+    definitions.sort(key=lambda definition: -definition.get("commonness", 0))
+    return [re.sub(r"\{(\w+)\}", r"\1", definition["pattern"]) for definition in definitions[:limit]]
+
+
+def warm_up(engine: SymbolicEngine, expressions: List[str], budget: float = 3.0,
+            should_stop: Optional[Callable[[], bool]] = None) -> Dict:
+    """
+    Parses every expression and runs a cheap operation on it, cycling through
+    WARMUP_OPERATIONS. Stops after budget seconds or when should_stop() says so.
+    Failures are expected (some templates are not valid input) and ignored.
+    """
+    started = time.monotonic()
+    stats = {"parsed": 0, "evaluated": 0, "failed": 0}
+    for index, text in enumerate(expressions):
+        if time.monotonic() - started > budget or (should_stop and should_stop()):
+            break
+        try:
+            expr = engine.parse_expression(text)
+            stats["parsed"] += 1
+            getattr(engine, WARMUP_OPERATIONS[index % len(WARMUP_OPERATIONS)])(expr)
+            stats["evaluated"] += 1
+        except Exception:
+            stats["failed"] += 1
+    stats["seconds"] = time.monotonic() - started
+    return stats
+
+
+class BackgroundWarmup:
+    """
+    Runs warm_up in a daemon thread. It uses its own engine, the caches that
+    matter (SymPy's) are process wide and the GUI engine is not thread safe.
+    """
+
+    def __init__(self, expressions: Optional[List[str]] = None, budget: float = 3.0):
+        self.expressions = expressions
+        self.budget = budget
+        self.stats: Optional[Dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.stats is not None
+
+    def _run(self):
+        expressions = self.expressions if self.expressions is not None else load_corpus()
+        # no time budgets or persistent memo here, this engine is thrown away
+        engine = SymbolicEngine(time_budgets={})
+        self.stats = warm_up(engine, expressions, self.budget, self._stop.is_set)
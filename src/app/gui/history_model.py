@@ -0,0 +1,194 @@
+"""
+History list model - the rows of HistoryPanel as a virtual list: the
+calculations of this session, newest first, followed by the ones of earlier
+sessions from the session journal. Earlier entries are only kept as journal
+offsets, read from disk a page at a time when they are drawn, and more of
+them are found as the view scrolls down (canFetchMore / fetchMore).
+A filter with structural terms (op:integrate fn:sin ...) is answered by the
+search index of the session manager instead.
+"""
+from array import array
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
+
+from ..core.history_search import is_structural
+
+# line, expression, optional expression
+Row = Tuple[str, str, Optional[str]]
+
+
+def format_history_line(expression: str, result: str, operation=None, optional_expression=None) -> str:
+    if operation:
+        if optional_expression:
+            return f"{operation}: {expression}, {optional_expression} => {result}"
+        return f"{operation}: {expression} => {result}"
+    return f"{expression} = {result}"
+
+
+def journal_row(entry: dict) -> Row:
+    expression = entry.get('input_expr', '')
+    optional_expression = entry.get('optional_input_expr')
+    line = format_history_line(expression, entry.get('result', ''), entry.get('operation'), optional_expression)
+    return line, expression, optional_expression
+
+
+class HistoryListModel(QAbstractListModel):
+
+    # journal entries looked at per fetchMore
+    fetch_size = 200
+    # journal rows read from disk at a time, and how many such pages are kept
+    page_size = 100
+    cached_pages = 8
+
+    def __init__(self, session_manager=None, parent=None):
+        super().__init__(parent)
+        self.session_manager = session_manager
+        self.journal = getattr(session_manager, 'journal', None)
+        self._session_offset = getattr(session_manager, 'session_offset', 0)
+        self.query = ""
+        self.filter_text = ""
+
+        self._added: List[Row] = []  # this session, oldest first
+        self._shown_added = array('q')  # indexes into _added that pass the filter, oldest first
+        self._offsets = array('q')  # earlier entries that pass the filter, newest first
+        self._older_offset = 0  # where the next fetch continues in the journal
+        self._has_older = False
+        self._pages: "OrderedDict[int, List[Row]]" = OrderedDict()
+
+        # with a filter, fetching goes on in slices until a screen worth of rows matched
+        self._matched_in_fetch = 0
+        self._fetch_timer = QTimer(self)
+        self._fetch_timer.setSingleShot(True)
+        self._fetch_timer.timeout.connect(self._fetch_batch)
+        self._restart_journal()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._shown_added) + len(self._offsets)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        row = self.row(index.row()) if index.isValid() else None
+        if row is None:
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return row[0]
+        if role == Qt.ItemDataRole.UserRole:
+            return {'expression': row[1], 'optional_expression': row[2]}
+        return None
+
+    def row(self, position: int) -> Optional[Row]:
+        added = len(self._shown_added)
+        if position < 0 or position >= self.rowCount():
+            return None
+        if position < added:
+            return self._added[self._shown_added[added - 1 - position]]
+        position -= added
+        page_number, position_in_page = divmod(position, self.page_size)
+        page = self._pages.get(page_number)
+        if page is None:
+            page = self._read_page(page_number)
+        else:
+            self._pages.move_to_end(page_number)
+        return page[position_in_page]
+
+    def add_row(self, line: str, expression: str, optional_expression: Optional[str] = None):
+        self._added.append((line, expression, optional_expression))
+        if self._matches(line) and not self._searching():
+            self.beginInsertRows(QModelIndex(), 0, 0)
+            self._shown_added.append(len(self._added) - 1)
+            self.endInsertRows()
+
+    def clear(self):
+        # clearing the session history hides the journal entries too
+        self.beginResetModel()
+        self._added.clear()
+        self._shown_added = array('q')
+        self._session_offset = 0
+        self._restart_journal()
+        self.endResetModel()
+
+    def set_filter(self, text: str):
+        """
+        shows only the lines containing text (case insensitive); the earlier
+        sessions are searched again from the newest entry, as the view scrolls
+        """
+        query = text.strip()
+        if query == self.query:
+            return
+        self.beginResetModel()
+        self.query = query
+        self.filter_text = query.lower()
+        if self.journal is not None and is_structural(query):
+            # every session is in the journal, this one included
+            self._restart_journal()
+            self._shown_added = array('q')
+            self._offsets = array('q', self.session_manager.search_ids(query))
+            self._has_older = False
+            self.endResetModel()
+            return
+        self._shown_added = array('q', (i for i, row in enumerate(self._added) if self._matches(row[0])))
+        self._restart_journal()
+        self.endResetModel()
+        if self.filter_text:
+            self._matched_in_fetch = 0
+            self._fetch_batch()
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_older
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        self._matched_in_fetch = 0
+        self._fetch_batch()
+
+    def _fetch_batch(self):
+        if not self._has_older:
+            return
+        records, reached_start = self.journal.read_before(self._older_offset, self.fetch_size)
+        if records:
+            self._older_offset = records[0][0]
+        self._has_older = not reached_start
+
+        matching = array('q')
+        for offset, entry in reversed(records):
+            if self._matches(journal_row(entry)[0]):
+                matching.append(offset)
+        if matching:
+            first = self.rowCount()
+            self.beginInsertRows(QModelIndex(), first, first + len(matching) - 1)
+            # the page the new rows start in may be cached without them
+            self._pages.pop(len(self._offsets) // self.page_size, None)
+            self._offsets.extend(matching)
+            self.endInsertRows()
+        self._matched_in_fetch += len(matching)
+        # a filter may match nothing for a long way back; keep looking without blocking the UI
+        if self.filter_text and self._has_older and self._matched_in_fetch < self.fetch_size:
+            self._fetch_timer.start(0)
+
+    def _restart_journal(self):
+        self._fetch_timer.stop()
+        self._offsets = array('q')
+        self._pages.clear()
+        self._older_offset = self._session_offset
+        self._has_older = self.journal is not None and self._session_offset > 0
+
+    def _read_page(self, page_number: int) -> List[Row]:
+        start = page_number * self.page_size
+        offsets = self._offsets[start:start + self.page_size]
+        page = [journal_row(entry) if entry is not None else ("", "", None)
+                for entry in self.journal.read_at(offsets)]
+        self._pages[page_number] = page
+        while len(self._pages) > self.cached_pages:
+            self._pages.popitem(last=False)
+        return page
+
+    def _searching(self) -> bool:
+        # results of the search index, they don't change as rows are added
+        return self.journal is not None and is_structural(self.query)
+
+    def _matches(self, line: str) -> bool:
+        return not self.filter_text or self.filter_text in line.lower()
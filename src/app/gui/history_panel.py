@@ -1,20 +1,23 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QPushButton, QListWidget, QListWidgetItem
+    QPushButton, QListView, QLineEdit
 )
 
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QModelIndex
 from PyQt6.QtGui import QFont 
 from ..gui.history_window import HistoryWindow
+from .history_model import HistoryListModel, format_history_line
 
 class HistoryPanel(QWidget):
     history_item_selected = pyqtSignal(dict)
+    calculation_added = pyqtSignal(str)  # the history line, as appended to calculation_history
     
     def __init__(self, session_manager=None, parent=None):
         super().__init__(parent)
         self.setObjectName("historyPanel")
         self.session_manager = session_manager
         self.calculation_history = []
+        self.history_model = HistoryListModel(session_manager, self)
         self.initialise_ui()
         
     def initialise_ui(self):
@@ -25,6 +28,13 @@ class HistoryPanel(QWidget):
         header_layout = self.create_header()
         layout.addLayout(header_layout)
 
+        self.filter_input = QLineEdit()
+        self.filter_input.setObjectName("historyFilter")
+        self.filter_input.setPlaceholderText("Filter history, e.g. sin or op:integrate fn:sin")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.history_model.set_filter)
+        layout.addWidget(self.filter_input)
+
         self.history_list = self.create_history_list()
         layout.addWidget(self.history_list)
 
@@ -51,9 +61,13 @@ class HistoryPanel(QWidget):
         return header_layout
     
     def create_history_list(self):
-        history_list = QListWidget()
+        # a view over history_model, only the visible rows are ever materialised
+        history_list = QListView()
         history_list.setObjectName("historyList")
-        history_list.itemDoubleClicked.connect(self.on_item_clicked)
+        history_list.setModel(self.history_model)
+        history_list.setUniformItemSizes(True)
+        history_list.setEditTriggers(QListView.EditTrigger.NoEditTriggers)
+        history_list.doubleClicked.connect(self.on_item_clicked)
         return history_list
         
     def create_instructions_label(self):
@@ -63,27 +77,13 @@ class HistoryPanel(QWidget):
         return instructions
         
     def add_calculation(self, expression: str, result: str, operation=None, optional_expression=None):
-        if operation:
-            item_text = f"{operation}: {expression} => {result}"
-            if optional_expression:
-                item_text = f"{operation}: {expression}, {optional_expression} => {result}"
-        else:
-            item_text = f"{expression} = {result}"
-
+        item_text = format_history_line(expression, result, operation, optional_expression)
         self.calculation_history.append(item_text)
-
-        item = QListWidgetItem(item_text)
-        item.setData(Qt.ItemDataRole.UserRole, {
-            'expression': expression,
-            'optional_expression': optional_expression
-        })
-        self.history_list.insertItem(0, item)
-
-        while self.history_list.count() > 20:
-            self.history_list.takeItem(self.history_list.count() - 1)
+        self.history_model.add_row(item_text, expression, optional_expression)
+        self.calculation_added.emit(item_text)
             
-    def on_item_clicked(self, item: QListWidgetItem):
-        data = item.data(Qt.ItemDataRole.UserRole)
+    def on_item_clicked(self, index: QModelIndex):
+        data = index.data(Qt.ItemDataRole.UserRole)
         if isinstance(data, dict):
             self.history_item_selected.emit(data)
         else:
@@ -92,12 +92,15 @@ class HistoryPanel(QWidget):
                 'optional_expression': None
             })
     def clear_history(self):
-        self.history_list.clear()
+        self.history_model.clear()
         if self.session_manager:
             self.session_manager.clear_history()
 
     def export_history(self):
-        if self.session_manager:
+        if self.session_manager and self.session_manager.journal is not None:
+            # every session, streamed from the journal while the file is written
+            data_to_export = self.session_manager.iter_history
+        elif self.session_manager:
             data_to_export = self.session_manager.get_history()
         else:
             data_to_export = self.calculation_history           
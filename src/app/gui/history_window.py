@@ -1,20 +1,36 @@
+import queue
+import threading
+
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
-    QPushButton, QListWidget, QListWidgetItem, QMessageBox, QWidget
+    QPushButton, QListWidget, QListWidgetItem, QMessageBox, QWidget, QProgressBar
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtGui import QFont
 from src.app.core.session import SessionManager
+from src.app.core.history_export import ExportCancelled, parquet_available
 
 class HistoryWindow(QDialog):
     """dialog for saving calculation history"""
     def __init__(self, calculation_history, parent=None):
+        """
+        calculation_history is a list, or a function returning an iterable
+        (e.g. SessionManager.iter_history) for histories too long for a list
+        """
         super().__init__(parent)
         self.calculation_history = calculation_history
         self.session_manager = SessionManager()
 
+        # exports run on a worker thread, which posts (kind, value) to export_updates
+        self.export_thread = None
+        self.export_cancel = threading.Event()
+        self.export_updates = queue.Queue()
+        self.export_timer = QTimer(self)
+        self.export_timer.setInterval(50)
+        self.export_timer.timeout.connect(self.poll_export)
+
         self.setWindowTitle("History Window")
-        self.setGeometry(400, 300, 500, 200)
+        self.setGeometry(400, 300, 560, 260)
 
         self.apply_stylesheet()
         self.initialise_ui()
@@ -67,16 +83,115 @@ class HistoryWindow(QDialog):
 
         layout.addLayout(button_layout)
 
+        # machine-readable exports, for analysis outside the app
+        data_layout = QHBoxLayout()
+        self.data_export_btns = {}
+        formats = [('jsonl', "JSONL"), ('csv', "CSV"), ('latex', "LaTeX"), ('npz', "NumPy")]
+        if parquet_available():
+            formats.append(('parquet', "Parquet"))
+        for file_type, label in formats:
+            button = QPushButton(label)
+            button.clicked.connect(lambda checked=False, file_type=file_type: self.export_file(file_type))
+            data_layout.addWidget(button)
+            self.data_export_btns[file_type] = button
+        layout.addLayout(data_layout)
+
+        progress_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setTextVisible(False)
+        progress_layout.addWidget(self.progress_bar)
+        self.progress_label = QLabel()
+        progress_layout.addWidget(self.progress_label)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel_export)
+        progress_layout.addWidget(self.cancel_btn)
+        layout.addLayout(progress_layout)
+        self.set_exporting(False)
+
+    def history_size(self):
+        # None when the history is only known by iterating over it
+        if callable(self.calculation_history):
+            return None
+        return len(self.calculation_history)
+
     def export_file(self, file_type):
         name = self.name_input.text().strip()
-        if name and len(self.calculation_history) != 0:
-            file_name = self.session_manager.export_history(file_type, name, self.calculation_history)
-            if file_name:
-                self.name_input.clear()
-                QMessageBox.information(self, "Info", f"'{file_name}' successfully saved!")
-            else:
-                QMessageBox.critical(self, "Error", "Error in saving text file.")
+        if name and self.history_size() != 0:
+            self.start_export(file_type, name)
         elif not name:
             QMessageBox.critical(self, "Error", "Please type the file name.")
         else:
-            QMessageBox.critical(self, "Error", "Calculation history is empty.")
\ No newline at end of file
+            QMessageBox.critical(self, "Error", "Calculation history is empty.")
+
+    def start_export(self, file_type, name):
+        if self.export_thread is not None:
+            return
+        total = self.history_size()
+        # a busy indicator when the number of entries isn't known
+        self.progress_bar.setRange(0, total or 0)
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("Exporting...")
+        self.set_exporting(True)
+
+        items = self.calculation_history() if callable(self.calculation_history) else self.calculation_history
+        self.export_cancel.clear()
+        self.export_thread = threading.Thread(target=self.run_export, args=(file_type, name, items), daemon=True)
+        self.export_thread.start()
+        self.export_timer.start()
+
+    def run_export(self, file_type, name, items):
+        # worker thread: nothing here touches widgets
+        try:
+            file_name = self.session_manager.export_history(
+                file_type, name, items,
+                progress=lambda done: self.export_updates.put(('progress', done)),
+                cancel=self.export_cancel)
+            self.export_updates.put(('done', file_name))
+        except ExportCancelled:
+            self.export_updates.put(('cancelled', None))
+        except Exception as e:
+            self.export_updates.put(('error', str(e)))
+
+    def poll_export(self):
+        while True:
+            try:
+                kind, value = self.export_updates.get_nowait()
+            except queue.Empty:
+                return
+            if kind == 'progress':
+                self.progress_bar.setValue(value)
+                self.progress_label.setText(f"{value} entries")
+                continue
+            self.finish_export()
+            if kind == 'done':
+                self.name_input.clear()
+                QMessageBox.information(self, "Info", f"'{value}' successfully saved!")
+            elif kind == 'error':
+                QMessageBox.critical(self, "Error", f"Error in saving file: {value}")
+            return
+
+    def finish_export(self):
+        self.export_timer.stop()
+        if self.export_thread is not None:
+            self.export_thread.join()
+            self.export_thread = None
+        self.set_exporting(False)
+
+    def cancel_export(self):
+        self.export_cancel.set()
+
+    def set_exporting(self, exporting):
+        self.export_text_btn.setEnabled(not exporting)
+        self.export_pdf_btn.setEnabled(not exporting)
+        for button in self.data_export_btns.values():
+            button.setEnabled(not exporting)
+        self.progress_bar.setVisible(exporting)
+        self.progress_label.setVisible(exporting)
+        self.cancel_btn.setVisible(exporting)
+
+    def reject(self):
+        # closing the dialog stops a running export
+        if self.export_thread is not None:
+            self.export_cancel.set()
+            self.finish_export()
+        super().reject()
\ No newline at end of file
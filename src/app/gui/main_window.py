@@ -1,14 +1,15 @@
+import os
+
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
     QLabel, QPushButton, QLineEdit, QScrollArea, QSizePolicy, QMessageBox,
-    QDialog
+    QDialog, QProgressBar
 
 )
 
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer, QStandardPaths
 
 from ..core.symbolic_engine import SymbolicEngine
-from ..core.plotter import ExpressionPlotter
 from ..core.math_formatter import MathFormatter
 from ..gui.calculator_buttons import CalculatorButton
 from ..gui.styles import get_calculator_stylesheet
@@ -19,37 +20,74 @@ from ..gui.calculator_operations import CalculatorOperations
 from ..gui.plotting_panel import PlottingPanel
 from ..gui.autocomplete_widget import AutoCompleteWidget
 from ..core.autocomplete.autocomplete_manager import AutocompleteManager
-from src.app.core.perform_substitution import Substitution
-from src.app.core.algebraic_expressions import AlgebraicExpressions
-from src.app.core.two_linear_equations import TwoLinearEquations
 from src.app.core.symbolic_to_decimal import toggle_format
 from ..core.session import SessionManager, HistoryEntry
+from ..core.evaluation_executor import EvaluationExecutor
+from ..core.operation_runner import PREVIEW, parse_substitutions
+from ..core.parser_validator import IncrementalValidator
+from ..utils.startup_profile import PROFILER
+from ..core.warmup import BackgroundWarmup, load_corpus
 from sympy import sympify
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QKeyEvent
 
+RESULT_CACHE_FILE = "result_cache.json"
+SESSION_JOURNAL_FILE = "session_journal.jsonl"
+PREVIEW_DELAY = 300  # ms without typing before the preview is evaluated
+PREVIEW_TIMEOUT = 3.0  # seconds, a preview is not worth more than that
+# problems the preview reports straight away instead of asking sympy
+PREVIEW_LOCAL_CHECKS = ("unmatched_close", "unclosed_paren")
+PREVIEW_STYLE = "color: #A0A0A0; font-size: 11pt; font-family: 'Courier';"
+PREVIEW_ERROR_STYLE = "color: #FF6B6B; font-size: 11pt; font-family: 'Courier';"
+
+
+def user_data_path(filename: str) -> str:
+    """per-user application data directory, so the files do not depend on where the app is started"""
+    directory = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+    directory = directory or os.path.join(os.path.expanduser("~"), ".slyest")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, filename)
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("SLYEST - Scientific Calculator")
         self.setGeometry(100, 100, 1100, 900)
 
-        self.session = SessionManager()
-        self.engine = SymbolicEngine()
-        self.substitution = Substitution()
-        self.equation_solver = AlgebraicExpressions()
-        self.two_equations_solver = TwoLinearEquations()
+        with PROFILER.stage("engine and session"):
+            self.session = SessionManager(journal_path=user_data_path(SESSION_JOURNAL_FILE))
+            self.engine = SymbolicEngine()
 
         self.operations = CalculatorOperations(self.engine)
-        self.plotter = ExpressionPlotter()
+        self._plotter = None
         self.current_expression = ""
         self.operation = ""
         self.used_vars = dict()
+        self.pending_operation = None
+        self.warmup = None
+        self.executor = EvaluationExecutor(result_cache_path=user_data_path(RESULT_CACHE_FILE), parent=self)
+        self.executor.progress.connect(self.show_operation_progress)
+        self.executor.result_ready.connect(self.finish_symbolic_operation)
+        self.executor.job_failed.connect(self.fail_symbolic_operation)
+        self.executor.job_cancelled.connect(self.cancel_symbolic_operation)
+        self.live_preview_enabled = True
         self.setStyleSheet(get_calculator_stylesheet())
         self.autocomplete_manager = None
         self.autocomplete_widget = None
-        self.initialise_ui()
-        self.setup_autocomplete()
+        with PROFILER.stage("widgets"):
+            self.initialise_ui()
+        with PROFILER.stage("autocomplete"):
+            self.setup_autocomplete()
+        self.setup_live_preview()
+
+    @property
+    def plotter(self):
+        # matplotlib is only imported once something is plotted
+        if self._plotter is None:
+            from ..core.plotter import ExpressionPlotter
+            self._plotter = ExpressionPlotter()
+        return self._plotter
 
     def _set_formatted_text(self, widget: QLineEdit, text: str):
         widget.setText(MathFormatter.to_display(text))
@@ -90,6 +128,10 @@ class MainWindow(QMainWindow):
 
         variable_layout.addWidget(self.create_new_button("Manage", "manageVarsBtn", self.open_variable_manager))
         top_bar_layout.addWidget(variable_container)
+        self.live_preview_toggle = self.create_new_button("Live preview", "livePreviewToggle", self.set_live_preview)
+        self.live_preview_toggle.setCheckable(True)
+        self.live_preview_toggle.setChecked(self.live_preview_enabled)
+        top_bar_layout.addWidget(self.live_preview_toggle)
         top_bar_layout.addWidget(self.create_new_button("History ▼", "historyToggle", self.toggle_history))
         parent_layout.addWidget(top_bar)
 
@@ -106,6 +148,11 @@ class MainWindow(QMainWindow):
         self.expression_input.returnPressed.connect(self.handle_expression_input)
         parent_layout.addWidget(self.expression_input)
 
+        self.preview_label = QLabel("")
+        self.preview_label.setObjectName("livePreview")
+        self.preview_label.setStyleSheet(PREVIEW_STYLE)
+        parent_layout.addWidget(self.preview_label)
+
         self.optional_expression_input.setMinimumHeight(40)
         self.optional_expression_input.returnPressed.connect(self.handle_optional_expression_input)
         parent_layout.addWidget(self.optional_expression_input)
@@ -130,6 +177,27 @@ class MainWindow(QMainWindow):
         help_btn.setFixedSize(30, 30)
         display_layout.addWidget(help_btn)
         parent_layout.addWidget(container)
+        self.create_progress_row(parent_layout)
+
+    def create_progress_row(self, parent_layout):
+        """busy indicator and cancel button shown while an operation runs in the background"""
+        self.progress_container = QWidget()
+        progress_layout = QHBoxLayout(self.progress_container)
+        progress_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)  # busy indicator, sympy cannot report real progress
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setMaximumHeight(8)
+        progress_layout.addWidget(self.progress_bar)
+
+        self.progress_label = QLabel("")
+        self.progress_label.setStyleSheet("color: #A0A0A0; font-size: 10pt;")
+        progress_layout.addWidget(self.progress_label)
+
+        progress_layout.addWidget(self.create_new_button("Cancel", "cancelBtn", self.executor.cancel))
+        self.progress_container.setVisible(False)
+        parent_layout.addWidget(self.progress_container)
 
     def handle_expression_input(self):
         pass
@@ -609,70 +677,116 @@ class MainWindow(QMainWindow):
             return {}
         
     def handle_symbolic_operation(self, operation: str):
-        self.operation = operation
         try:
             expression_string = self._get_internal_text(self.expression_input)
             optional_expression_string = self._get_internal_text(self.optional_expression_input)
             if not expression_string:
                 return
-            self.used_vars = self.get_relevant_variables(expression_string)
+            used_vars = self.get_relevant_variables(expression_string)
             expression_string_processed = self.engine.replace_variables(expression_string, operation)
             if optional_expression_string:
                 optional_expression_string_processed = self.engine.replace_variables(optional_expression_string, operation)
             else:
                 optional_expression_string_processed = None
+        except Exception as e:
+            print(f"Error: {e}")
+            return
+
+        # remember what was asked, the inputs may change while the job is running
+        pending = {
+            'operation': operation,
+            'expression_text': self.expression_input.text(),
+            'optional_text': self.optional_expression_input.text() if optional_expression_string else None,
+            'optional_expression': optional_expression_string,
+            'used_vars': used_vars,
+        }
+        # submit() cancels a job that is still running, its job_cancelled arrives
+        # before the new operation becomes the pending one
+        pending['job_id'] = self.executor.submit(
+            operation,
+            expression_string_processed,
+            optional_expression_string_processed,
+            optional_expression_string,
+        )
+        self.pending_operation = pending
+        self.progress_label.setText(f"{operation.capitalize()}...")
+        self.progress_container.setVisible(True)
+
+    def is_preview_job(self, job_id: int) -> bool:
+        return job_id is not None and job_id == self.preview_job_id
 
-            if operation == "simplify":
-                result = str(self.engine.simplify(expression_string_processed))
-            elif operation == 'expand':
-                result = str(self.engine.expand(expression_string_processed))
-            elif operation == 'factor':
-                result = str(self.engine.factor(expression_string_processed))
-            elif operation == 'solve':
-                result = str(self.equation_solver.solve_algerbraic_equation(expression_string_processed))
-            elif operation == 'substitute':
-                substituted_values = self.get_substituted_values(optional_expression_string)
-                result = str(self.substitution.perform_substitution(expression_string_processed, substituted_values))
-            elif operation == 'solve 2 equations':
-                result = str(self.two_equations_solver.solve_two_linear_equations(expression_string_processed, optional_expression_string_processed))
-            elif operation == 'differentiate':
-                result = str(self.engine.differentiate(expression_string_processed, optional_expression_string_processed))
-            elif operation == 'integrate':
-                result = str(self.engine.integrate(expression_string_processed, optional_expression_string_processed))
+    def is_pending_job(self, job_id: int) -> bool:
+        return self.pending_operation is not None and job_id == self.pending_operation['job_id']
 
+    def show_operation_progress(self, job_id: int, elapsed: float):
+        if self.is_preview_job(job_id):
+            self.check_preview_timeout(job_id, elapsed)
+            return
+        if self.is_pending_job(job_id):
+            self.progress_label.setText(f"{self.pending_operation['operation'].capitalize()}... {elapsed:.1f}s")
+
+    def finish_symbolic_operation(self, job_id: int, result: str, info: dict):
+        if self.is_preview_job(job_id):
+            self.show_preview_result(job_id, result, info)
+            return
+        if not self.is_pending_job(job_id):
+            return
+        self.progress_container.setVisible(False)
+        pending, self.pending_operation = self.pending_operation, None
+        if info.get('partial'):
+            self.statusBar().showMessage(
+                f"Partial result: {pending['operation']} ran out of time, used {info.get('strategy')} instead", 8000)
+        else:
+            self.statusBar().clearMessage()
+        try:
+            self.operation = pending['operation']
+            self.used_vars = pending['used_vars']
             self.display.setText(MathFormatter.to_display(result))
 
             self.history_panel.add_calculation(
-                self.expression_input.text(),
+                pending['expression_text'],
                 self.display.text(),
                 operation=self.operation,
-                optional_expression=self.optional_expression_input.text() if optional_expression_string else None
+                optional_expression=pending['optional_text']
             )
 
             entry = HistoryEntry(
-                operation, 
-                self.expression_input.text(), 
+                self.operation, 
+                pending['expression_text'], 
                 self.display.text(), 
-                optional_expression_string,
+                pending['optional_expression'],
                 variables=self.used_vars 
             )
             
             if hasattr(self, 'session'):
-                 self.session.history.append(entry)
+                 self.session.add_entry(entry)
 
         except Exception as e:
             print(f"Error: {e}")
             return
+
+    def fail_symbolic_operation(self, job_id: int, message: str):
+        if self.is_preview_job(job_id):
+            self.show_preview_error(job_id, message)
+            return
+        if not self.is_pending_job(job_id):
+            return
+        self.progress_container.setVisible(False)
+        self.pending_operation = None
+        print(f"Error: {message}")
+
+    def cancel_symbolic_operation(self, job_id: int):
+        if self.is_preview_job(job_id):
+            self.end_preview_job()
+            return
+        if not self.is_pending_job(job_id):
+            return
+        self.progress_container.setVisible(False)
+        self.pending_operation = None
+        self.display.setText("Cancelled")
         
     def get_substituted_values(self, subs_str):
-        subs_dict = {}
-        try:
-            for part in subs_str.split(','):
-                key, value = part.split('=')
-                subs_dict[key.strip()] = value.strip()
-            return subs_dict
-        except Exception as e:
-            return {}  
+        return parse_substitutions(subs_str)
 
     def create_new_button(self, button_name, object_name, button_function):
         manage_btn = QPushButton(button_name)
@@ -796,6 +910,105 @@ class MainWindow(QMainWindow):
             end += 1
         return start, end
 
+    def setup_live_preview(self):
+        """value or error of the expression shown under the input while typing"""
+        # previews run on the same worker as the operations, only while it is idle;
+        # the operation handlers pass the preview's signals on by job id
+        self.preview_validator = IncrementalValidator()
+        self.preview_job_id = None  # preview running on the worker, current or not
+        self.preview_stale = False  # the text changed after it was submitted
+        self.preview_waiting = False  # a newer text waits for it to finish
+
+        # same debounce as the autocomplete: only evaluate once typing pauses
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.timeout.connect(self.run_live_preview)
+        self.expression_input.textChanged.connect(self.on_preview_text_changed)
+
+    def set_live_preview(self, enabled: bool):
+        self.live_preview_enabled = enabled
+        self.on_preview_text_changed(self.expression_input.text())
+
+    def on_preview_text_changed(self, text: str):
+        # a running preview is for the old text; it is left to finish, since killing
+        # it restarts the worker, and its answer is dropped
+        if self.preview_job_id is not None:
+            self.preview_stale = True
+        self.preview_waiting = False
+        self.preview_timer.stop()
+        if not self.live_preview_enabled or not text.strip():
+            self.preview_label.setText("")
+            return
+        self.preview_timer.start(PREVIEW_DELAY)
+
+    def run_live_preview(self):
+        if self.preview_job_id is not None:
+            self.preview_waiting = True
+            return
+        # never replace an operation the user started
+        if self.executor.is_busy():
+            return
+        display_text = self.expression_input.text()
+        # parentheses are checked here, on the text as displayed so the column matches
+        problems = [d for d in self.preview_validator.update(display_text) if d.kind in PREVIEW_LOCAL_CHECKS]
+        if problems:
+            self.show_preview_error(None, f"{problems[0].message} (column {problems[0].offset + 1})")
+            return
+        try:
+            expression = self.engine.replace_variables(self._get_internal_text(self.expression_input), PREVIEW)
+        except Exception as e:
+            self.show_preview_error(None, str(e))
+            return
+        self.preview_job_id = self.executor.submit(PREVIEW, expression)
+        self.preview_stale = False
+
+    def check_preview_timeout(self, job_id: int, elapsed: float):
+        # only a preview over its budget is worth restarting the worker for
+        if elapsed > PREVIEW_TIMEOUT:
+            self.executor.cancel()
+            self.preview_label.setText("")
+
+    def end_preview_job(self) -> bool:
+        """forgets the finished preview job, returns whether its answer is for the current text"""
+        current = not self.preview_stale
+        self.preview_job_id = None
+        self.preview_stale = False
+        if self.preview_waiting:
+            # through the timer, this can run while the executor is still switching jobs
+            self.preview_waiting = False
+            self.preview_timer.start(0)
+        return current
+
+    def show_preview_result(self, job_id: int, result: str, info: dict):
+        if job_id != self.preview_job_id or not self.end_preview_job():
+            return
+        self.preview_label.setStyleSheet(PREVIEW_STYLE)
+        self.preview_label.setText(f"= {MathFormatter.to_display(result)}")
+
+    def show_preview_error(self, job_id, message: str):
+        if job_id is not None and (job_id != self.preview_job_id or not self.end_preview_job()):
+            return
+        self.preview_label.setStyleSheet(PREVIEW_ERROR_STYLE)
+        self.preview_label.setText(message)
+
+    def start_warmup(self):
+        """pre-parses the pattern templates in this process and in the evaluation worker"""
+        corpus = load_corpus()
+        self.executor.warm_up(corpus)
+        self.warmup = BackgroundWarmup(corpus)
+        self.warmup.start()
+
+    def closeEvent(self, event):
+        if self.warmup:
+            self.warmup.stop()
+        # stops the evaluation worker, which saves its result cache on the way out
+        self.executor.shutdown()
+        self.preview_timer.stop()
+        if self.autocomplete_manager:
+            self.autocomplete_manager.shutdown()
+        self.session.close()
+        super().closeEvent(event)
+
     def eventFilter(self, obj, event):
         """Handle keyboard events for autocomplete navigation"""
         if obj in [self.expression_input, self.optional_expression_input]:
@@ -577,7 +577,8 @@ class ThreeDPlotDialog(QDialog):
             figure = self.plotter.create_surface_plot(
                 self.surface_expr_input.text(),
                 x_range=(float(self.x_min_input.text()), float(self.x_max_input.text())),
-                y_range=(float(self.y_min_input.text()), float(self.y_max_input.text()))
+                y_range=(float(self.y_min_input.text()), float(self.y_max_input.text())),
+                progressive=True,
             )
             self.window_manager.create_plot_window(self, figure, "3D Surface")
             self.accept()
@@ -667,7 +668,8 @@ class ImplicitPlotDialog(QDialog):
             figure = self.plotter.create_implicit_plot(
                 self.expr_input.text(),
                 x_range=(float(self.x_min_input.text()), float(self.x_max_input.text())),
-                y_range=(float(self.y_min_input.text()), float(self.y_max_input.text()))
+                y_range=(float(self.y_min_input.text()), float(self.y_max_input.text())),
+                progressive=True,
             )
             self.window_manager.create_plot_window(self, figure, "Implicit Plot")
             self.accept()
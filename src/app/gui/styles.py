@@ -118,8 +118,18 @@ CALCULATOR_STYLESHEET = f"""
         padding: 10px;
     }}
 
-    /* History list widget */
-    QListWidget#historyList {{
+    /* History filter field */
+    QLineEdit#historyFilter {{
+        background-color: {COLORS['main_bg']};
+        color: {COLORS['text_white']};
+        border: 1px solid {COLORS['scientific_btn']};
+        border-radius: 6px;
+        padding: 4px 8px;
+        font-size: 10pt;
+    }}
+
+    /* History list view */
+    QListView#historyList {{
         background-color: {COLORS['main_bg']};
         color: {COLORS['text_white']};
         border: none;
@@ -129,16 +139,16 @@ CALCULATOR_STYLESHEET = f"""
         font-size: 11pt;
     }}
 
-    QListWidget#historyList::item {{
+    QListView#historyList::item {{
         padding: 8px;
         border-radius: 4px;
     }}
 
-    QListWidget#historyList::item:hover {{
+    QListView#historyList::item:hover {{
         background-color: {COLORS['scientific_btn']};
     }}
 
-    QListWidget#historyList::item:selected {{
+    QListView#historyList::item:selected {{
         background-color: {COLORS['number_btn']};
     }}
 
@@ -157,6 +167,21 @@ CALCULATOR_STYLESHEET = f"""
         color: {COLORS['text_white']};
     }}
 
+    /* Live preview on/off, next to the history toggle */
+    QPushButton#livePreviewToggle {{
+        background-color: transparent;
+        color: {COLORS['text_gray']};
+        border: 1px solid {COLORS['text_gray']};
+        border-radius: 8px;
+        padding: 4px 10px;
+        font-size: 10pt;
+    }}
+
+    QPushButton#livePreviewToggle:checked {{
+        color: {COLORS['operation_btn']};
+        border: 1px solid {COLORS['operation_btn']};
+    }}
+
     /* Symbolic operation buttons (simplify, expand, factor, etc) */
     QPushButton#symbolicBtn {{
         background-color: {COLORS['operation_btn']};
@@ -186,8 +186,7 @@ class VariableWindow(QDialog):
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            if var_name in self.engine.variables:
-                del self.engine.variables[var_name]
+            self.engine.remove_variable(var_name)
             self.refresh_variable_list()
             self.variables_changed.emit()
 
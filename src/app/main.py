@@ -1,21 +1,48 @@
 # Main application page
 import sys
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtGui import QPalette, QColor
-from .gui.main_window import MainWindow
+import multiprocessing
+from .utils.startup_profile import PROFILER
 
 def main():
-    app = QApplication(sys.argv)
-    app.setApplicationName("SLYEST")
-    app.setOrganizationName("Group 8")
-    app.setApplicationVersion("0.1.0")
-    
-    window = MainWindow()
-    window.show()
+    # --profile-startup prints how long each startup step took, once the window has painted
+    if "--profile-startup" in sys.argv:
+        sys.argv.remove("--profile-startup")
+        PROFILER.enable()
+    # the SymPy warm-up runs in the background once the window is up, --no-warmup skips it
+    warmup = "--no-warmup" not in sys.argv
+    if not warmup:
+        sys.argv.remove("--no-warmup")
+
+    with PROFILER.stage("import PyQt6"):
+        from PyQt6.QtWidgets import QApplication
+        from PyQt6.QtCore import QTimer
+    with PROFILER.stage("import main window"):
+        from .gui.main_window import MainWindow
+
+    with PROFILER.stage("create QApplication"):
+        app = QApplication(sys.argv)
+        app.setApplicationName("SLYEST")
+        app.setOrganizationName("Group 8")
+        app.setApplicationVersion("0.1.0")
+
+    with PROFILER.stage("build main window"):
+        window = MainWindow()
+    with PROFILER.stage("show main window"):
+        window.show()
+
+    if warmup:
+        QTimer.singleShot(0, window.start_warmup)
+
+    if PROFILER.enabled:
+        def report():
+            PROFILER.mark("first event loop pass")
+            print(PROFILER.report(), file=sys.stderr)
+        QTimer.singleShot(0, report)
 
     # Start the event loop (keeps the app running until you close it)
     sys.exit(app.exec())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    multiprocessing.freeze_support()  # evaluation runs in a worker process
+    main()
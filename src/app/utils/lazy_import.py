@@ -0,0 +1,57 @@
+"""
+Deferred imports for heavy or optional dependencies (matplotlib, reportlab,
+the OpenAI SDK). lazy_import returns a stand-in that imports the real module
+the first time one of its attributes is used, so a feature that is never
+opened never pays for its imports.
+"""
+import importlib
+import time
+from types import ModuleType
+from typing import Dict, Optional
+
+# module name -> seconds spent importing it, for the startup profile
+IMPORT_TIMES: Dict[str, float] = {}
+
+_missing = set()
+
+
+def _timed_import(name: str) -> ModuleType:
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMES.setdefault(name, time.perf_counter() - started)
+    return module
+
+
+class LazyModule(ModuleType):
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lazy_module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        if self._lazy_module is None:
+            self._lazy_module = _timed_import(self.__name__)
+        return self._lazy_module
+
+    def __getattr__(self, attribute):
+        # only called for attributes the stand-in does not have itself
+        return getattr(self._load(), attribute)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._lazy_module is not None
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def optional_import(name: str) -> Optional[ModuleType]:
+    """Imports name now, or returns None if it is not installed (checked once)."""
+    if name in _missing:
+        return None
+    try:
+        return _timed_import(name)
+    except Exception:
+        _missing.add(name)
+        return None
@@ -0,0 +1,68 @@
+"""
+Startup timing for `python -m src.app.main --profile-startup`.
+Stages are timed with the shared PROFILER; it does nothing unless enabled, so
+the stage() calls can stay in the startup code.
+"""
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+from .lazy_import import IMPORT_TIMES
+
+# heavy modules that should not be loaded before the first window paints
+DEFERRED_MODULES = ("matplotlib", "mpl_toolkits.mplot3d", "reportlab", "openai")
+
+
+class StartupProfiler:
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.stages: List[Tuple[str, float, int]] = []  # name, seconds, nesting depth
+        self._depth = 0
+
+    def enable(self):
+        self.enabled = True
+        self.started = time.perf_counter()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        index = len(self.stages)
+        self.stages.append((name, 0.0, self._depth))
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.stages[index] = (name, time.perf_counter() - started, self._depth)
+
+    def mark(self, name: str):
+        # a point in time instead of a span, e.g. the first paint
+        if self.enabled:
+            self.stages.append((name, time.perf_counter() - self.started, -1))
+
+    def report(self) -> str:
+        lines = ["startup profile"]
+        for name, seconds, depth in self.stages:
+            if depth < 0:
+                lines.append(f"  {name:<40} at {seconds * 1000:8.1f} ms")
+            else:
+                lines.append(f"  {'  ' * depth}{name:<{40 - 2 * depth}} {seconds * 1000:8.1f} ms")
+        lines.append(f"  {'total':<40} {(time.perf_counter() - self.started) * 1000:8.1f} ms")
+
+        lines.append("deferred modules")
+        for name in DEFERRED_MODULES:
+            state = "loaded" if name in sys.modules else "not loaded"
+            if name in IMPORT_TIMES:
+                state += f" (lazy import took {IMPORT_TIMES[name] * 1000:.1f} ms)"
+            lines.append(f"  {name:<40} {state}")
+        return "\n".join(lines)
+
+
+PROFILER = StartupProfiler()
@@ -0,0 +1,87 @@
+import sys
+import time
+import unittest
+
+from PyQt6.QtWidgets import QApplication
+
+from src.app.core.autocomplete.autocomplete_manager import AutocompleteManager
+from src.app.core.autocomplete.suggestion import Suggestion, SuggestionType
+from src.app.core.symbolic_engine import SymbolicEngine
+
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class TestAutocompleteSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = AutocompleteManager(SymbolicEngine(), None)
+        self.emitted = []
+        self.finished = []
+        self.manager.suggestions_ready.connect(lambda suggestions: self.emitted.append([s.text for s in suggestions]))
+        self.manager.search_finished.connect(lambda *args: self.finished.append(args))
+
+    def tearDown(self):
+        self.manager.shutdown()
+
+    def search(self, text):
+        self.manager.pending_text = text
+        self.manager._do_search()
+
+    def wait_until_finished(self, count=1, timeout=10):
+        deadline = time.monotonic() + timeout
+        while len(self.finished) < count and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.005)
+
+    def test_inline_search(self):
+        self.manager.threaded = False
+        self.search("sq")
+        self.assertEqual(self.finished, [(1, ["function", "history", "pattern"], [])])
+        self.assertIn("sqrt(variance)", self.emitted[-1])
+
+    def test_results_are_streamed_per_provider(self):
+        def slow_patterns(text, deadline=None):
+            time.sleep(0.05)
+            return [Suggestion(text="streamed pattern", type=SuggestionType.PATTERN, score=50)]
+        self.manager.pattern_provider.get_suggestions = slow_patterns
+        self.search("sin")
+        self.wait_until_finished()
+        # functions first, then again with the pattern merged in
+        self.assertEqual(len(self.emitted), 2)
+        self.assertNotIn("streamed pattern", self.emitted[0])
+        self.assertIn("streamed pattern", self.emitted[1])
+
+    def test_outdated_results_are_dropped(self):
+        def slow_patterns(text, deadline=None):
+            time.sleep(0.1)
+            return [Suggestion(text=f"pattern for {text}", type=SuggestionType.PATTERN, score=500)]
+        self.manager.pattern_provider.get_suggestions = slow_patterns
+        self.search("cos")
+        time.sleep(0.02)
+        self.search("tan")
+        self.wait_until_finished()
+        self.assertEqual([generation for generation, _, _ in self.finished], [2])
+        self.assertFalse(any("pattern for cos" in texts for texts in self.emitted))
+        self.assertIn("pattern for tan", self.emitted[-1])
+
+    def test_slow_providers_are_skipped_after_the_budget(self):
+        def stuck_history(text, max_results=5):
+            time.sleep(0.3)
+            return [Suggestion(text="late", type=SuggestionType.HISTORY, score=500)]
+        self.manager.history_provider.get_suggestions = stuck_history
+        self.manager.latency_budget = 0.05
+        started = time.monotonic()
+        self.search("sin")
+        self.wait_until_finished()
+        self.assertLess(time.monotonic() - started, 0.25)
+        self.assertEqual(self.finished[0][1:], (["function"], ["history", "pattern"]))
+        # the late answer is ignored once it arrives
+        time.sleep(0.3)
+        app.processEvents()
+        self.manager._poll_results()
+        self.assertFalse(any("late" in texts for texts in self.emitted))
+
+
+if __name__ == "__main__":
+    unittest.main()
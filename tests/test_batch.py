@@ -0,0 +1,109 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+
+from src.app.batch import main, read_items, run_inline, run_pool
+
+SLOW_INTEGRAL = '{"expression": "exp(x**7)*sin(x**5)/log(x)*tan(x**3)", "operation": "integrate", "optional": "x"}'
+
+
+class TestReadItems(unittest.TestCase):
+
+    def test_plain_lines_use_default_operation(self):
+        items = list(read_items(["x + x\n", "\n", "# note\n", "(x+1)**2\n"], "expand"))
+        self.assertEqual([item.expression for item in items], ["x + x", "(x+1)**2"])
+        self.assertEqual({item.operation for item in items}, {"expand"})
+        self.assertEqual([item.index for item in items], [0, 1])
+
+    def test_jsonl_fields(self):
+        line = '{"id": "a", "expression": "x**3", "operation": "differentiate", "optional": "x"}'
+        (item,) = read_items([line])
+        self.assertEqual((item.id, item.operation, item.optional), ("a", "differentiate", "x"))
+
+    def test_invalid_json_becomes_error_item(self):
+        (item,) = read_items(['{"expr": 1}'])
+        self.assertIsNotNone(item.error)
+
+    def test_internal_operations_are_rejected(self):
+        lines = ['{"expression": "x + 1", "operation": "warmup"}',
+                 '{"expression": "x + 1", "operation": "preview"}',
+                 '{"expression": "x + 1", "operation": "transmogrify"}']
+        items = list(read_items(lines))
+        self.assertTrue(all(item.error for item in items))
+        self.assertIn("unknown operation 'warmup'", items[0].error)
+        records = list(run_inline(items))
+        self.assertEqual([record["status"] for record in records], ["error"] * 3)
+
+
+class TestRunBatch(unittest.TestCase):
+
+    def test_inline_results(self):
+        items = read_items(["sin(x)**2 + cos(x)**2", '{"expression": "x**2 - 4", "operation": "factor"}'])
+        records = list(run_inline(items))
+        self.assertEqual([record["result"] for record in records], ["1", "(x - 2)*(x + 2)"])
+        self.assertTrue(all(record["status"] == "ok" for record in records))
+
+    def test_display_notation(self):
+        lines = ['{"expression": "2x = 4", "operation": "solve"}', "x²×x", "2π - π"]
+        records = list(run_inline(read_items(lines)))
+        self.assertEqual([record["result"] for record in records], ["[2]", "x**3", "pi"])
+        # the record shows the input as it was given
+        self.assertEqual(records[1]["expression"], "x²×x")
+
+    def test_solver_messages_are_errors(self):
+        lines = ['{"expression": "x + 1", "operation": "solve"}',
+                 '{"expression": "x*y", "operation": "differentiate", "optional": "xy"}',
+                 '{"expression": "x = 2", "operation": "solve"}']
+        records = list(run_inline(read_items(lines)))
+        self.assertEqual([record["status"] for record in records], ["error", "error", "ok"])
+        self.assertEqual(records[0]["error"], "Error in input equation")
+        self.assertNotIn("result", records[1])
+
+    def test_pool_keeps_input_order_and_times_out_slow_items(self):
+        lines = [SLOW_INTEGRAL, "x + x", '{"expression": "x + y = 3", "operation": "solve 2 equations", "optional": "x - y = 1"}',
+                 '{"expression": "x", "operation": "unknown"}']
+        records = list(run_pool(read_items(lines), workers=2, timeout=1))
+        self.assertEqual([record["status"] for record in records], ["timeout", "ok", "ok", "error"])
+        self.assertEqual(records[1]["result"], "2*x")
+        self.assertEqual(records[2]["result"], "{x: 2, y: 1}")
+
+
+class TestBatchCommandLine(unittest.TestCase):
+
+    def test_writes_jsonl_and_stats(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "in.txt")
+            target = os.path.join(tmp, "out.jsonl")
+            with open(source, "w") as f:
+                f.write("x*x*x\n2*x + 3*x\n")
+            stderr = io.StringIO()
+            with redirect_stderr(stderr):
+                code = main([source, "-o", target, "--workers", "0", "--operation", "simplify"])
+            with open(target) as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual(code, 0)
+        self.assertEqual([record["result"] for record in records], ["x**3", "5*x"])
+        self.assertIn("items: 2", stderr.getvalue())
+        self.assertIn("throughput", stderr.getvalue())
+
+    def test_stdout_only_carries_records(self):
+        # the equation solver prints a message for input without "="
+        lines = '{"expression": "x + 1", "operation": "solve"}\nx + x\n'
+        for workers in ("0", "1"):
+            finished = subprocess.run(
+                [sys.executable, "-m", "src.app.batch", "--workers", workers, "--quiet"],
+                input=lines, capture_output=True, text=True, timeout=120,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            records = [json.loads(line) for line in finished.stdout.splitlines()]
+            self.assertEqual(len(records), 2, workers)
+            self.assertIn('must include "="', finished.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import sys
+import threading
+import unittest
+
+from PyQt6.QtWidgets import QApplication
+
+from src.app.core.autocomplete.history_index import HistoryIndex, parse_history_item
+from src.app.core.autocomplete.history_provider import HistoryProvider
+from src.app.gui.history_panel import HistoryPanel
+
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class TestHistoryIndex(unittest.TestCase):
+
+    def test_parse_history_item(self):
+        self.assertEqual(parse_history_item("simplify: sin(x)**2 => 1 - cos(x)**2"), "sin(x)**2")
+        self.assertEqual(parse_history_item("substitute: x + y, x=3, y=5 => 8"), "x + y")
+        self.assertEqual(parse_history_item("2 + 2 = 4"), "2 + 2")
+
+    def test_sync_reads_only_new_items(self):
+        history = ["expand: (x+1)**2 => x**2 + 2*x + 1", "factor: x**2 - 1 => (x - 1)*(x + 1)"]
+        index = HistoryIndex()
+        index.sync(history)
+        self.assertEqual(index.expressions(), ["(x+1)**2", "x**2 - 1"])
+
+        history.append("simplify: (x+1)**2 => (x + 1)**2")
+        index.sync(history)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.get("(x+1)**2").count, 2)
+
+        # a replaced history list is indexed from scratch
+        index.sync(["2 + 2 = 4"])
+        self.assertEqual(index.expressions(), ["2 + 2"])
+
+    def test_candidates_are_capped(self):
+        index = HistoryIndex()
+        index.max_matches = 3
+        index.fuzzy_pool_size = 1
+        for number in range(10):
+            index.add_item(f"simplify: sin(x) + {number} => r")
+        index.add_item("simplify: cos(x) => r")
+        found = [entry.expression for entry in index.candidates("sin", preferred=["sin(x) + 0"])]
+        # the preferred one, the newest matches, then the newest entry for fuzzy matching
+        self.assertEqual(found, ["sin(x) + 0", "sin(x) + 9", "sin(x) + 8", "cos(x)"])
+
+
+class TestHistoryProviderIndex(unittest.TestCase):
+
+    def test_follows_history_panel(self):
+        panel = HistoryPanel()
+        provider = HistoryProvider(panel)
+        self.assertEqual(provider.get_suggestions("sin"), [])
+
+        panel.add_calculation("sin(x)**2 + cos(x)**2", "1", operation="simplify")
+        self.assertEqual(len(provider.history_index), 1)
+        self.assertEqual([s.text for s in provider.get_suggestions("sin")], ["sin(x)**2 + cos(x)**2"])
+
+
+class TestHistoryProviderScoring(unittest.TestCase):
+
+    def setUp(self):
+        self.provider = HistoryProvider()
+        self.expressions = ["sin(x)**2", "x*sin(x)", "cos(x)", "tan(x) + 1"]
+        for times, expression in zip([3, 1, 2], self.expressions):
+            for _ in range(times):
+                self.provider.record_usage(expression)
+
+    def test_max_count_is_kept_up_to_date(self):
+        self.assertEqual(self.provider.max_count, 3)
+        self.provider.record_usage("cos(x)")
+        self.provider.record_usage("cos(x)")
+        self.assertEqual(self.provider.max_count, 4)
+
+        # dropping the most used expression lowers the maximum
+        self.provider.recency_scores["cos(x)"] = 0.0
+        self.provider.clear_old_entries(days=1)
+        self.assertEqual(self.provider.max_count, 3)
+        self.provider.recency_scores["sin(x)**2"] = 0.0
+        self.provider.clear_old_entries(days=1)
+        self.assertEqual(self.provider.max_count, 1)
+
+    def test_sweep_while_another_thread_records_usage(self):
+        errors = []
+
+        def record():
+            try:
+                for i in range(20000):
+                    self.provider.record_usage(f"x + {i}")
+            except Exception as e:
+                errors.append(e)
+
+        worker = threading.Thread(target=record)
+        worker.start()
+        while worker.is_alive():
+            try:
+                self.provider.clear_old_entries(days=1)
+            except RuntimeError as e:  # dictionary changed size during iteration
+                errors.append(e)
+                break
+        worker.join()
+        self.assertEqual(errors, [])
+
+    def test_loaded_usage_rebuilds_aggregates(self):
+        self.provider.load_usage({"sin(x)": 7, "cos(x)": 2}, {"sin(x)": 100.0, "cos(x)": 200.0})
+        self.assertEqual(self.provider.max_count, 7)
+        self.assertEqual(set(self.provider.decay_times), {"sin(x)", "cos(x)"})
+
+    def test_vectorised_scores_match_the_per_expression_scores(self):
+        for partial in ["sin", "x", "Cos(", "tn"]:
+            similarity, scores = self.provider.score_candidates(partial, self.expressions)
+            for position, expression in enumerate(self.expressions):
+                expected_similarity = self.provider._calculate_similarity_score(partial, expression)
+                expected = (expected_similarity * 0.3
+                            + self.provider._calculate_frequency_score(expression) * 0.4
+                            + self.provider._calculate_recency_score(expression) * 0.3)
+                self.assertAlmostEqual(similarity[position], expected_similarity, places=6)
+                self.assertAlmostEqual(scores[position], expected, places=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
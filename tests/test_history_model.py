@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication
+
+from src.app.core.session import HistoryEntry, SessionManager
+from src.app.gui.history_model import HistoryListModel
+from src.app.gui.history_panel import HistoryPanel
+
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class TestHistoryListModel(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(self.directory.name, "journal.jsonl")
+        # an earlier session with 1000 calculations
+        earlier = SessionManager(journal_path=path)
+        for number in range(1000):
+            earlier.add_entry(HistoryEntry("expand", f"(x + {number})**2", f"x**2 + {2 * number}*x"))
+        earlier.close()
+        self.session = SessionManager(journal_path=path)
+
+    def tearDown(self):
+        self.session.close()
+        self.directory.cleanup()
+
+    def texts(self, model):
+        return [model.data(model.index(row)) for row in range(model.rowCount())]
+
+    def test_rows_are_fetched_and_read_lazily(self):
+        model = HistoryListModel(self.session)
+        model.page_size = 10
+        model.cached_pages = 2
+        model.add_row("2 + 2 = 4", "2 + 2")
+        self.assertEqual(model.rowCount(), 1)
+
+        self.assertTrue(model.canFetchMore())
+        model.fetchMore()
+        self.assertEqual(model.rowCount(), 1 + model.fetch_size)
+        self.assertEqual(model.data(model.index(1)), "expand: (x + 999)**2 => x**2 + 1998*x")
+        self.assertEqual(model.data(model.index(50), Qt.ItemDataRole.UserRole),
+                         {'expression': "(x + 950)**2", 'optional_expression': None})
+        self.assertLessEqual(len(model._pages), 2)
+
+        while model.canFetchMore():
+            model.fetchMore()
+        self.assertEqual(model.rowCount(), 1001)
+        self.assertEqual(model.data(model.index(1000)), "expand: (x + 0)**2 => x**2 + 0*x")
+
+    def test_filter(self):
+        model = HistoryListModel(self.session)
+        model.add_row("simplify: x + 12 => x + 12", "x + 12")
+        model.add_row("2 + 2 = 4", "2 + 2")
+        model.set_filter("12")
+        # keeps searching the earlier sessions until a screen worth matched or all were read
+        while model._fetch_timer.isActive():
+            app.processEvents()
+        expected = ["simplify: x + 12 => x + 12"] + [
+            f"expand: (x + {n})**2 => x**2 + {2 * n}*x" for n in range(999, -1, -1) if "12" in f"(x + {n})**2 x**2 + {2 * n}*x"]
+        self.assertEqual(self.texts(model), expected)
+
+        model.set_filter("")
+        self.assertEqual(self.texts(model), ["2 + 2 = 4", "simplify: x + 12 => x + 12"])
+
+    def test_panel(self):
+        panel = HistoryPanel(session_manager=self.session)
+        for number in range(30):
+            panel.add_calculation(f"x*{number}", f"{number}*x", operation="simplify")
+        # nothing is trimmed any more
+        self.assertEqual(panel.history_model.row(0)[0], "simplify: x*29 => 29*x")
+        self.assertEqual(panel.history_model.rowCount(), 30)
+
+        selected = []
+        panel.history_item_selected.connect(selected.append)
+        panel.on_item_clicked(panel.history_model.index(1))
+        self.assertEqual(selected, [{'expression': "x*28", 'optional_expression': None}])
+
+        panel.clear_history()
+        self.assertEqual(panel.history_model.rowCount(), 0)
+        self.assertFalse(panel.history_model.canFetchMore())
+
+
+if __name__ == "__main__":
+    unittest.main()
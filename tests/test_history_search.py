@@ -0,0 +1,110 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from PyQt6.QtWidgets import QApplication
+
+from src.app.core.history_search import HistorySearchIndex, analyse, is_structural
+from src.app.core.session import HistoryEntry, SessionManager
+from src.app.gui.history_model import HistoryListModel
+
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+CALCULATIONS = [
+    ("integrate", "sin(x)*y", "-y×cos(x)"),
+    ("integrate", "x**2", "x³/3"),
+    ("differentiate", "sin(x)", "cos(x)"),
+    ("simplify", "exp(t) + ln(z)", "e^(t) + ln(z)"),
+    ("integrate", "tan(x)", "-log(cos(x))"),
+]
+
+
+class TestHistorySearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = HistorySearchIndex()
+        for position, (operation, expression, result) in enumerate(CALCULATIONS):
+            self.index.add(position, {"operation": operation, "input_expr": expression, "result": result})
+
+    def test_analyse_display_forms(self):
+        words, functions, symbols = analyse("2x² + sin(y)×π + e^(t) + ln(z)")
+        self.assertEqual(functions, {"sin", "exp", "log"})
+        self.assertEqual(symbols, {"x", "y", "t", "z"})
+        self.assertIn("2", words)
+
+    def test_full_text(self):
+        self.assertEqual(self.index.search("sin"), [2, 0])
+        self.assertEqual(self.index.search("integ"), [4, 1, 0])
+        self.assertEqual(self.index.search("cos x"), [4, 2, 0])
+        self.assertEqual(self.index.search("nothing"), [])
+        self.assertEqual(self.index.search(""), [])
+
+    def test_structural(self):
+        self.assertEqual(self.index.search("op:integrate fn:sin"), [0])
+        self.assertEqual(self.index.search("result.sym:y"), [0])
+        self.assertEqual(self.index.search("input.fn:cos"), [])
+        self.assertEqual(self.index.search("fn:ln"), [4, 3])
+        self.assertEqual(self.index.search("result.fn:exp sym:z"), [3])
+        self.assertEqual(self.index.search("op:integrate", limit=2), [4, 1])
+        self.assertTrue(is_structural("sin op:integrate"))
+        self.assertFalse(is_structural("x = 3: y"))
+
+    def test_spaced_operators(self):
+        # operators are not indexed, a term of only operators doesn't narrow the search
+        self.assertEqual(self.index.search("x**2 / 3"), self.index.search("x**2/3"))
+        self.assertEqual(self.index.search("x ** 2"), [1])
+        self.assertEqual(self.index.search("op:integrate sin ( x ) * y"), [0])
+        self.assertEqual(self.index.search("+ ="), [])
+
+
+class TestSessionSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "journal.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def add_all(self, session):
+        for operation, expression, result in CALCULATIONS:
+            session.add_entry(HistoryEntry(operation, expression, result))
+
+    def test_searches_every_session(self):
+        earlier = SessionManager(max_history=2, journal_path=self.path)
+        self.add_all(earlier)
+        earlier.close()
+
+        session = SessionManager(max_history=2, journal_path=self.path)
+        found = session.search("op:integrate fn:sin")
+        self.assertEqual([e.input_expr for e in found], ["sin(x)*y"])
+
+        # entries added after the index was built are found too
+        session.add_entry(HistoryEntry("integrate", "sin(2*x)", "-cos(2*x)/2"))
+        self.assertEqual([e.input_expr for e in session.search("op:integrate fn:sin")], ["sin(2*x)", "sin(x)*y"])
+
+        session.clear_history()
+        self.assertEqual(session.search("sin"), [])
+        session.close()
+
+    def test_without_journal(self):
+        session = SessionManager()
+        self.add_all(session)
+        self.assertEqual([e.result for e in session.search("result.sym:y")], ["-y×cos(x)"])
+
+    def test_history_model_uses_the_index(self):
+        session = SessionManager(journal_path=self.path)
+        self.add_all(session)
+        model = HistoryListModel(session)
+        model.set_filter("op:integrate fn:sin")
+        self.assertEqual([model.data(model.index(row)) for row in range(model.rowCount())],
+                         ["integrate: sin(x)*y => -y×cos(x)"])
+        model.set_filter("op:integrate x ** 2")
+        self.assertEqual(model.rowCount(), 1)
+        session.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
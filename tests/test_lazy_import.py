@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from src.app.utils.lazy_import import IMPORT_TIMES, lazy_import, optional_import
+from src.app.utils.startup_profile import StartupProfiler
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def test_module_is_imported_on_first_attribute(self):
+        module = lazy_import("json")
+        self.assertFalse(module.is_loaded)
+        self.assertEqual(module.dumps([1]), "[1]")
+        self.assertTrue(module.is_loaded)
+        self.assertIn("json", IMPORT_TIMES)
+
+    def test_optional_import_of_missing_module(self):
+        self.assertIsNone(optional_import("module_that_does_not_exist_anywhere"))
+
+    def test_main_window_does_not_import_heavy_modules(self):
+        code = (
+            "import sys; import src.app.gui.main_window; "
+            "print([m for m in ('matplotlib', 'reportlab', 'openai') if m in sys.modules])"
+        )
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=120)
+        self.assertEqual(output.returncode, 0, output.stderr)
+        self.assertEqual(output.stdout.strip().splitlines()[-1], "[]")
+
+
+class TestStartupProfiler(unittest.TestCase):
+
+    def test_disabled_profiler_records_nothing(self):
+        profiler = StartupProfiler()
+        with profiler.stage("work"):
+            pass
+        self.assertEqual(profiler.stages, [])
+
+    def test_nested_stages_in_report(self):
+        profiler = StartupProfiler()
+        profiler.enable()
+        with profiler.stage("outer"):
+            with profiler.stage("inner"):
+                pass
+        profiler.mark("painted")
+        self.assertEqual([(name, depth) for name, _, depth in profiler.stages],
+                         [("outer", 0), ("inner", 1), ("painted", -1)])
+        report = profiler.report()
+        self.assertIn("    inner", report)
+        self.assertIn("matplotlib", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from PyQt6.QtWidgets import QApplication
+
+from src.app.gui.main_window import PREVIEW_TIMEOUT, MainWindow
+
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class TestLivePreview(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        journal = os.path.join(self.directory.name, "session_journal.jsonl")
+        with mock.patch("src.app.gui.main_window.SESSION_JOURNAL_FILE", journal):
+            self.window = MainWindow()
+
+    def tearDown(self):
+        self.window.close()
+        self.directory.cleanup()
+
+    def wait_for_preview(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while self.window.preview_job_id is not None and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.01)
+
+    def test_shows_value_after_typing_pauses(self):
+        self.window.expression_input.setText("1/4 + 1/2")
+        self.assertTrue(self.window.preview_timer.isActive())
+        self.window.preview_timer.stop()
+        self.window.run_live_preview()
+        self.wait_for_preview()
+        self.assertEqual(self.window.preview_label.text(), "= 0.75")
+
+    def test_parentheses_are_reported_without_evaluating(self):
+        self.window.expression_input.setText("(1 + 2")
+        self.window.run_live_preview()
+        self.assertIsNone(self.window.preview_job_id)
+        self.assertEqual(self.window.preview_label.text(), "Unmatched parentheses (column 1)")
+
+    def test_stale_result_is_dropped(self):
+        self.window.expression_input.setText("2 + 2")
+        self.window.run_live_preview()
+        job_id = self.window.preview_job_id
+        self.window.expression_input.setText("2 + 3")
+        self.window.show_preview_result(job_id, "4", {})
+        self.assertIsNone(self.window.preview_job_id)
+        self.assertEqual(self.window.preview_label.text(), "")
+
+    def test_text_change_keeps_the_worker_running(self):
+        self.window.expression_input.setText("2 + 2")
+        self.window.run_live_preview()
+        worker = self.window.executor._process
+        self.window.expression_input.setText("2 + 3")
+        self.window.preview_timer.stop()
+        self.assertTrue(self.window.executor.is_busy())
+        # the new text waits for the outdated preview instead of killing it
+        self.window.run_live_preview()
+        self.assertTrue(self.window.preview_waiting)
+        deadline = time.monotonic() + 60
+        while self.window.preview_label.text() != "= 5" and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.01)
+        self.assertEqual(self.window.preview_label.text(), "= 5")
+        self.assertIs(self.window.executor._process, worker)
+
+    def test_preview_over_budget_is_killed(self):
+        self.window.expression_input.setText("2 + 2")
+        self.window.run_live_preview()
+        job_id = self.window.preview_job_id
+        self.window.show_operation_progress(job_id, PREVIEW_TIMEOUT + 1)
+        self.assertFalse(self.window.executor.is_busy())
+        self.assertIsNone(self.window.preview_job_id)
+        self.assertNotEqual(self.window.display.text(), "Cancelled")
+
+    def test_preview_waits_for_running_operation(self):
+        self.window.expression_input.setText("2 + 2")
+        self.window.preview_timer.stop()
+        self.window.handle_symbolic_operation("simplify")
+        job_id = self.window.executor.current_job_id
+        self.window.run_live_preview()
+        self.assertIsNone(self.window.preview_job_id)
+        self.assertEqual(self.window.executor.current_job_id, job_id)
+
+    def test_operation_replaces_running_preview(self):
+        self.window.expression_input.setText("2 + 2")
+        self.window.run_live_preview()
+        self.window.handle_symbolic_operation("simplify")
+        self.assertIsNone(self.window.preview_job_id)
+        self.assertIsNotNone(self.window.pending_operation)
+
+    def test_disabled_preview_stays_empty(self):
+        self.window.live_preview_toggle.click()
+        self.window.expression_input.setText("1 + 1")
+        self.assertFalse(self.window.preview_timer.isActive())
+        self.assertEqual(self.window.preview_label.text(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
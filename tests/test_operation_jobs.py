@@ -0,0 +1,58 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from PyQt6.QtWidgets import QApplication
+
+from src.app.gui.main_window import MainWindow
+
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class TestOperationJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        journal = os.path.join(self.directory.name, "session_journal.jsonl")
+        with mock.patch("src.app.gui.main_window.SESSION_JOURNAL_FILE", journal):
+            self.window = MainWindow()
+        self.window.set_live_preview(False)
+
+    def tearDown(self):
+        self.window.close()
+        self.directory.cleanup()
+
+    def wait_for_operation(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while self.window.pending_operation is not None and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.01)
+
+    def test_submit_while_busy_shows_the_new_result(self):
+        self.window.expression_input.setText("x**2 - 1")
+        self.window.handle_symbolic_operation("factor")
+        self.window.expression_input.setText("(x + 1)**2")
+        self.window.handle_symbolic_operation("expand")
+        self.assertEqual(self.window.pending_operation['operation'], "expand")
+
+        self.wait_for_operation()
+        self.assertIsNone(self.window.pending_operation)
+        self.assertEqual(self.window.operation, "expand")
+        self.assertNotEqual(self.window.display.text(), "Cancelled")
+        self.assertEqual(len(self.window.history_panel.calculation_history), 1)
+
+    def test_answer_of_a_replaced_job_is_ignored(self):
+        self.window.expression_input.setText("x**2 - 1")
+        self.window.handle_symbolic_operation("factor")
+        job_id = self.window.pending_operation['job_id']
+        self.window.finish_symbolic_operation(job_id - 1, "0", {})
+        self.assertIsNotNone(self.window.pending_operation)
+        self.assertEqual(len(self.window.history_panel.calculation_history), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+from PyQt6.QtWidgets import QApplication
+
+from src.app.core.operation_runner import OperationRunner, parse_substitutions
+from src.app.core.evaluation_executor import EvaluationExecutor
+from src.app.core.result_memo import ResultMemo
+
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class TestOperationRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = OperationRunner()
+
+    def test_parse_substitutions(self):
+        self.assertEqual(parse_substitutions("x=3, y=5"), {'x': '3', 'y': '5'})
+        self.assertEqual(parse_substitutions("x3"), {})
+
+    def test_runs_engine_operations(self):
+        self.assertEqual(self.runner.run('expand', "(x+1)**2"), "x**2 + 2*x + 1")
+        self.assertEqual(self.runner.run('factor', "x**2 - 1"), "(x - 1)*(x + 1)")
+
+    def test_runs_substitution(self):
+        self.assertEqual(self.runner.run('substitute', "x + y", "x=3, y=5", "x=3, y=5"), "8")
+
+    def test_preview(self):
+        self.assertEqual(self.runner.run('preview', "1/4 + 1/2"), "0.75")
+        self.assertEqual(self.runner.run('preview', "2**10"), "1024")
+        self.assertEqual(self.runner.run('preview', "x**2 + 2x"), "x**2 + 2*x")
+        self.assertEqual(self.runner.run('preview', "x - 1 = 2/3"), "x - 1 = 0.666666666667")
+        with self.assertRaises(ValueError):
+            self.runner.run('preview', "2 +* ")
+
+    def test_unknown_operation(self):
+        with self.assertRaises(ValueError):
+            self.runner.run('transmogrify', "x")
+
+
+class TestEvaluationExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = EvaluationExecutor(poll_interval=10)
+        self.results = []
+        self.cancelled = []
+        self.executor.result_ready.connect(lambda job_id, result, info: self.results.append((job_id, result)))
+        self.executor.job_cancelled.connect(self.cancelled.append)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def wait_until_idle(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while self.executor.is_busy() and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.01)
+
+    def test_result_is_posted_back(self):
+        job_id = self.executor.submit('simplify', "sin(x)**2 + cos(x)**2")
+        self.wait_until_idle()
+        self.assertEqual(self.results, [(job_id, "1")])
+
+    def test_cancel_kills_running_job(self):
+        job_id = self.executor.submit('integrate', "x*sin(x)", "x")
+        self.executor.cancel()
+        self.assertFalse(self.executor.is_busy())
+        self.assertEqual(self.cancelled, [job_id])
+
+        # a fresh worker picks up the next job
+        next_id = self.executor.submit('expand', "(x+1)**2")
+        self.wait_until_idle()
+        self.assertEqual(self.results, [(next_id, "x**2 + 2*x + 1")])
+
+    def test_job_after_warm_up_gets_its_own_result(self):
+        self.executor.warm_up(["x + 1", "(x + 1)**2", "sin(x)**2 + cos(x)**2"])
+        job_id = self.executor.submit('factor', "x**2 - 1")
+        self.wait_until_idle()
+        self.assertEqual(self.results, [(job_id, "(x - 1)*(x + 1)")])
+
+    def test_result_cache_is_saved_before_the_worker_is_killed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "result_cache.json")
+            executor = EvaluationExecutor(result_cache_path=path, poll_interval=10)
+            try:
+                executor.submit('simplify', "sin(x)**2 + cos(x)**2")
+                deadline = time.monotonic() + 60
+                while not os.path.exists(path) and time.monotonic() < deadline:
+                    app.processEvents()
+                    time.sleep(0.01)
+                executor.submit('integrate', "x*sin(x)", "x")
+                executor.cancel()
+            finally:
+                executor.shutdown()
+            self.assertEqual(len(ResultMemo(persist_path=path)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from src.app.core.cache import LRUCache
+from src.app.core.symbolic_engine import SymbolicEngine
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_counts_hits_and_misses(self):
+        cache = LRUCache(max_size=2)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("missing")
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_zero_size_stores_nothing(self):
+        cache = LRUCache(max_size=0)
+        cache.put("a", 1)
+        self.assertEqual(len(cache), 0)
+
+
+class TestSymbolicEngineParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = SymbolicEngine(parse_cache_size=4)
+
+    def test_repeated_input_hits_cache(self):
+        first = self.engine.parse_expression("2x + 1")
+        second = self.engine.parse_expression("2x  +  1 ")
+        self.assertIs(first, second)
+        self.assertEqual(self.engine.parse_cache_hits, 1)
+        self.assertEqual(self.engine.parse_cache_misses, 1)
+
+    def test_variable_change_invalidates_entries(self):
+        self.engine.parse_expression("x**2")
+        self.engine.assign_variable("a", "x + 1")
+        self.engine.parse_expression("x**2")
+        self.assertEqual(self.engine.parse_cache_hits, 0)
+
+    def test_remove_variable_bumps_version(self):
+        self.engine.assign_variable("a", "x + 1")
+        version = self.engine.variables_version
+        self.engine.remove_variable("a")
+        self.assertGreater(self.engine.variables_version, version)
+        self.assertIsNone(self.engine.remove_variable("a"))
+
+    def test_cache_size_is_bounded(self):
+        for i in range(10):
+            self.engine.parse_expression(f"x + {i}")
+        self.assertEqual(self.engine.parse_cache_stats()['size'], 4)
+
+    def test_parse_errors_are_not_cached(self):
+        with self.assertRaises(ValueError):
+            self.engine.parse_expression("(x +")
+        self.assertEqual(self.engine.parse_cache_stats()['size'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import pytest
+import random
 import sys
 import os
 
@@ -6,79 +7,22 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 's
 
 
 from app.core.parser_validator import (
-    validate_characters,
-    validate_parentheses,
-    validate_operators,
-    handle_powers,
-    handle_roots,
-    handle_implicit_multiplication,
-    handle_functions,
-    handle_constants,
-    parse_expression
+    parse_expression,
+    tokenize,
+    validate,
+    IncrementalValidator,
+    _emit,
+    NUMBER,
+    NAME,
+    SUPERSCRIPT,
 )
-def test_validate_characters_valid():
-    assert validate_characters("x^2 + 3") is None
-    assert validate_characters("y+4-5*(x^3)") is None
-
-def test_validate_characters_invalid():
-    assert validate_characters("x$2") == "Invalid character: '$'"
-    assert validate_characters("y@3") == "Invalid character: '@'"
-    assert validate_characters("x² + y³") is None  # '²' and '³' are allowed
-
-def test_validate_parentheses_valid():
-    assert validate_parentheses("(x+2)*(x-3)") is None
-    assert validate_parentheses("((x+2)*(x-3))") is None
-
-def test_validate_parentheses_invalid():
-    assert validate_parentheses("((x+2)") == "Unmatched parentheses"
-    assert validate_parentheses("x+2) + (3") == "Closing parenthesis without opening one"
-
-def test_validate_operators_valid():
-    assert validate_operators("x+2-3*x") is None
-    assert validate_operators("x+2/3") is None
-
-def test_validate_operators_invalid():
-    assert validate_operators("x++2") == "Invalid operator sequence: '++'"
-    assert validate_operators("*x+3") == "Expression cannot start with operator"
-    assert validate_operators("x+3/") == "Expression cannot end with operator"
-    assert validate_operators("x**2") == "Invalid operator sequence: '**'"
-
-def test_handle_powers():
-    assert handle_powers("x²+3") == "x^2+3"
-    assert handle_powers("y³+5") == "y^3+5"
-    assert handle_powers("x^2 + y^3") == "x^2 + y^3"
-    assert handle_powers("x² - x³") == "x^2 - x^3"
-
-def test_handle_roots():
-    assert handle_roots("√(x)") == "sqrt(x)"
-    assert handle_roots("x**(1/2)") == "x)__SQRT__"
-    assert handle_roots("(x+1)**(1/2)") == "(x+1)__SQRT__"
-    assert handle_roots("x**(1/3)") == "x)__CBRT__"
-
-def test_handle_implicit_multiplication():
-    assert handle_implicit_multiplication("2x") == "2*x"
-    assert handle_implicit_multiplication("x(3+2)") == "x*(3+2)"
-    assert handle_implicit_multiplication("(x+1)2") == "(x+1)*2"
-    assert handle_implicit_multiplication("x+y") == "x+y"
-
-def test_handle_functions():
-    assert handle_functions("sin(x)+log(3)") == "SIN(x)+LOG(3)"
-    assert handle_functions("cos(x)*sin(x)") == "COS(x)*SIN(x)"
-    assert handle_functions("tan(x)") == "TAN(x)"
-    assert handle_functions("exp(x)+ln(x)") == "EXP(x)+LN(x)"
-
-def test_handle_constants():
-    assert handle_constants("pi + e") == "PI + E"
-    assert handle_constants("sin(x)*pi") == "SIN(x)*PI"
-    assert handle_constants("pi^2 + e^3") == "PI^2 + E^3"
-
 def test_parse_expression_valid():
     result = parse_expression("2x + √(x²)")
-    assert result["parsed"] == "2*x + sqrt(x**2)"
+    assert result["parsed"] == "2*x+sqrt(x**2)"
     result = parse_expression("sin(x) + log(3)")
-    assert result["parsed"] == "SIN(x) + LOG(3)"
+    assert result["parsed"] == "SIN(x)+LOG(3)"
     result = parse_expression("x² + 3x + pi")
-    assert result["parsed"] == "x^2 + 3*x + PI"
+    assert result["parsed"] == "x**2+3*x+PI"
 
 def test_parse_expression_invalid():
     result = parse_expression("2x + @")
@@ -97,3 +41,71 @@ def test_parse_expression_invalid():
     assert "error" in result
     assert result["error"] == "Invalid operator sequence: '**'"
 
+def test_tokenize_positions():
+    tokens = tokenize("2.5x + sin(y²)")
+    assert [(t.kind, t.text, t.start) for t in tokens[:3]] == [(NUMBER, "2.5", 0), (NAME, "x", 3), ("operator", "+", 5)]
+    assert tokens[-2].kind == SUPERSCRIPT and tokens[-2].start == 12
+    assert tokens[-1].end == len("2.5x + sin(y²)")
+
+def test_validate_diagnostics_have_offsets():
+    _, diagnostics = validate("(x + @) ++ 2)")
+    assert [(d.kind, d.offset) for d in diagnostics] == [
+        ("invalid_character", 5), ("operator_sequence", 8), ("unmatched_close", 12)]
+    assert diagnostics[1].length == 2
+    _, diagnostics = validate("((x+2)")
+    assert [(d.kind, d.offset) for d in diagnostics] == [("unclosed_paren", 0)]
+
+def test_parse_expression_reports_all_diagnostics():
+    result = parse_expression("x)+(")
+    assert result["error"] == "Closing parenthesis without opening one"
+    assert [d.kind for d in result["diagnostics"]] == ["unmatched_close", "unclosed_paren"]
+    assert parse_expression("")["error"] == "Expression is empty"
+
+def test_incremental_validator_matches_full_validation():
+    validator = IncrementalValidator()
+    text = ""
+    for ch in "sin(x) + 2..3(√x² - @":
+        text += ch
+        assert validator.update(text) == validate(text)[1]
+        assert validator.tokens == tokenize(text)
+    # edits in the middle and deletions rescan from the changed token
+    for text in ["sin(x) + 2.3(√x² - y)", "sin(x + 2.3(√x² - y)", "s"]:
+        assert validator.update(text) == validate(text)[1]
+        assert validator.tokens == tokenize(text)
+
+def test_incremental_validator_rescans_only_the_tail():
+    validator = IncrementalValidator()
+    text = "x^2 + 3x - 1 + " * 200
+    validator.update(text)
+    validator.update(text + "y")
+    assert validator.rescanned <= 2
+
+
+def test_fast_path_matches_the_tokens():
+    # parse_expression rewrites valid input without tokenizing, it has to agree with _emit
+    pieces = list("0123456789xyze +-*/^.()²³√_") + ["pi", "sin", "sqrt", "asin", "ln", "  ", ".5", "2.", "ab"]
+    generator = random.Random(7)
+    checked = 0
+    for _ in range(20000):
+        text = "".join(generator.choice(pieces) for _ in range(generator.randint(1, 12)))
+        _, diagnostics = validate(text)
+        result = parse_expression(text)
+        if diagnostics:
+            assert "error" in result, text
+            continue
+        compact = text.replace(" ", "")
+        assert result == {"parsed": _emit(compact, tokenize(compact))}, text
+        checked += 1
+    assert checked > 1000
+    assert parse_expression("2x √y*sin (x)pi")["parsed"] == "2*x*sqrt(y)*SIN(x)*PI"
+
+
+def test_spaces_between_tokens_are_dropped():
+    # the old pipeline removed every space before rewriting
+    assert parse_expression("2 3")["parsed"] == "23"
+    assert parse_expression("x y")["parsed"] == "xy"
+    assert parse_expression("1. 5 + s in(x)")["parsed"] == "1.5+SIN(x)"
+    assert parse_expression("  2 x  ")["parsed"] == "2*x"
+    assert parse_expression("2 .3.4")["parsed"] == parse_expression("2.3.4")["parsed"]
+    # offsets of problems still refer to the text as typed
+    assert [d.offset for d in parse_expression("x +  @")["diagnostics"]] == [5]
@@ -0,0 +1,70 @@
+import re
+import unittest
+import warnings
+from unittest import mock
+
+from sympy.parsing.sympy_parser import parse_expr
+
+from src.app.core.autocomplete import pattern_provider
+from src.app.core.autocomplete.pattern_provider import PatternProvider
+
+
+def reparsed_structural_match(partial, pattern):
+    # _structural_match before the signatures, parsing the template every time
+    try:
+        partial_terms = str(parse_expr(partial.replace('^', '**'))).split('+')
+        pattern_terms = str(parse_expr(re.sub(r'\{([a-z])\}', r'\1', pattern))).split('+')
+    except Exception:
+        return 0.0
+    shapes = {re.sub(r'[a-z](?![a-z])', 'N', term.strip()) for term in pattern_terms}
+    matching = sum(1 for term in partial_terms if re.sub(r'\d+', 'N', term.strip()) in shapes)
+    return (matching / len(partial_terms)) * 80 if matching else 0.0
+
+
+class TestPatternSignatures(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.provider = PatternProvider()
+        cls.templates = [d['pattern'] for items in cls.provider.patterns.values() for d in items]
+
+    def test_signature(self):
+        self.assertEqual(self.provider._signature("x**2 + {b}*x + {c}"), {"N**2", "N*N", "N"})
+        self.assertIsNone(self.provider._signature("x**2 +"))
+
+    def test_matches_parsing_the_templates(self):
+        for partial in ["x**2 + 5", "2*x + 3", "sin(x)", "x^2", "a + b", "x**2 +", "3*x**2 + 2*x + 1"]:
+            scores = self.provider._structural_scores(partial)
+            for template in self.templates:
+                expected = reparsed_structural_match(partial, template)
+                self.assertAlmostEqual(self.provider._structural_match(partial, template), expected)
+                self.assertAlmostEqual(scores.get(template, 0.0), expected)
+
+    def test_one_parse_per_keystroke(self):
+        self.provider.get_suggestions("x + 1")  # the templates are parsed on the first query
+        with mock.patch.object(pattern_provider, "parse_expr", wraps=parse_expr) as parse:
+            suggestions = self.provider.get_suggestions("x**2 + 5")
+        self.assertEqual(parse.call_count, 1)
+        self.assertIn("x**2 + {b}*x + {c}", [s.text for s in suggestions])
+
+    def test_templates_are_parsed_on_first_query(self):
+        with mock.patch.object(pattern_provider, "parse_expr", wraps=parse_expr) as parse:
+            provider = PatternProvider()
+        self.assertEqual(parse.call_count, 0)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            provider.get_suggestions("x**2 + 5")
+        self.assertTrue(provider.signatures)
+        self.assertEqual([w for w in caught if issubclass(w.category, SyntaxWarning)], [])
+
+    def test_templates_scored_before_indexing_are_still_indexed(self):
+        fresh = PatternProvider()._structural_scores("3")
+        provider = PatternProvider()
+        for template in self.templates:
+            provider._structural_match("3", template)
+        self.assertTrue(fresh)
+        self.assertEqual(provider._structural_scores("3"), fresh)
+
+
+if __name__ == "__main__":
+    unittest.main()
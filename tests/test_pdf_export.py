@@ -0,0 +1,105 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from PyPDF2 import PdfReader
+from PyQt6.QtWidgets import QApplication
+
+from src.app.core import history_export
+from src.app.core.history_export import ExportCancelled, LineWrapper, export_pdf, export_text
+from src.app.gui.history_window import HistoryWindow
+
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+def history(count):
+    return (f"simplify: sin(x)**2 + cos(x)**2 + {number} => {number + 1}" for number in range(count))
+
+
+class TestPdfExport(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "history.pdf")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_wrapper_measures_each_word_once(self):
+        wrapper = LineWrapper(max_width=100)
+        with mock.patch.object(history_export.pdfmetrics, "stringWidth", wraps=history_export.pdfmetrics.stringWidth) as measure:
+            lines = wrapper.wrap("sin(x) + sin(x) + sin(x) + sin(x) + sin(x) + sin(x)")
+        self.assertGreater(len(lines), 1)
+        self.assertEqual(measure.call_count, 2)  # "sin(x)" and "+"
+        self.assertTrue(all(wrapper.width(line) <= 100 for line in lines))
+        # a word wider than the page is broken up
+        self.assertTrue(all(wrapper.width(line) <= 100 for line in wrapper.wrap("x" * 200)))
+
+    def test_paginates(self):
+        progress = []
+        self.assertEqual(export_pdf(self.path, history(500), progress=progress.append), 500)
+        self.assertEqual(progress, [200, 400, 500])
+        reader = PdfReader(self.path)
+        self.assertGreater(len(reader.pages), 10)
+        self.assertIn("1. simplify: sin(x)**2 + cos(x)**2 + 0 => 1", reader.pages[0].extract_text())
+        self.assertIn("500. simplify: sin(x)**2 + cos(x)**2 + 499 => 500", reader.pages[-1].extract_text())
+
+    def test_cancel_writes_nothing(self):
+        cancel = threading.Event()
+        cancel.set()
+        with self.assertRaises(ExportCancelled):
+            export_pdf(self.path, history(500), cancel=cancel)
+        self.assertFalse(os.path.exists(self.path))
+        text_path = os.path.join(self.directory.name, "history.txt")
+        with self.assertRaises(ExportCancelled):
+            export_text(text_path, history(500), cancel=cancel)
+        self.assertFalse(os.path.exists(text_path))
+
+
+class TestHistoryWindowExport(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def wait_for_export(self, window, timeout=60):
+        deadline = time.monotonic() + timeout
+        while window.export_thread is not None and time.monotonic() < deadline:
+            app.processEvents()
+            time.sleep(0.01)
+
+    def test_exports_in_the_background(self):
+        window = HistoryWindow(lambda: history(1000))
+        window.name_input.setText("streamed")
+        with mock.patch("src.app.gui.history_window.QMessageBox.information") as information:
+            window.export_file("pdf")
+            self.assertFalse(window.export_pdf_btn.isEnabled())
+            self.wait_for_export(window)
+        information.assert_called_once()
+        self.assertTrue(window.export_pdf_btn.isEnabled())
+        self.assertEqual(window.progress_bar.value(), 1000)
+        self.assertTrue(os.path.exists("streamed.pdf"))
+
+    def test_cancel(self):
+        window = HistoryWindow(["1 + 1 = 2"] * 100000)
+        window.name_input.setText("cancelled")
+        with mock.patch("src.app.gui.history_window.QMessageBox") as message_box:
+            window.export_file("pdf")
+            window.cancel_export()
+            self.wait_for_export(window)
+        message_box.information.assert_not_called()
+        self.assertFalse(os.path.exists("cancelled.pdf"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,10 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'app'))
 
-from src.app.core.plotter import ExpressionPlotter
+from src.app.core.plotter import ExpressionPlotter, COMPILED_CACHE, compile_expression
+from src.app.core.adaptive_sampler import adaptive_sample
+from src.app.core.progressive_plot import lod_levels
+from src.app.core.implicit_tracer import trace_implicit
 from matplotlib.figure import Figure
 import numpy as np
 
@@ -99,5 +102,210 @@ class TestExpressionPlotter(unittest.TestCase):
         self.assertIsInstance(figure, Figure)
 
 
+class TestCompiledExpressionCache(unittest.TestCase):
+
+    def setUp(self):
+        COMPILED_CACHE.clear()
+        self.plotter = ExpressionPlotter()
+
+    def test_replot_reuses_compiled_function(self):
+        self.plotter.create_plot("x**2 + 1", x_range=(-5, 5))
+        self.plotter.create_plot("x**2 + 1", x_range=(0, 2))
+        stats = self.plotter.compiled_cache_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+
+    def test_cache_is_shared_between_plot_types(self):
+        self.plotter.create_plot("cos(t)", variable='t')
+        ExpressionPlotter().create_parametric_plot("cos(t)", "sin(t)")
+        self.assertEqual(COMPILED_CACHE.hits, 1)
+
+    def test_arguments_are_part_of_the_key(self):
+        import sympy as sp
+        x, y = sp.symbols("x y")
+        f_x = compile_expression(x, x + y)
+        f_xy = compile_expression((x, y), x + y)
+        self.assertIsNot(f_x, f_xy)
+        self.assertEqual(f_xy(1, 2), 3)
+
+
+class TestAdaptiveSampling(unittest.TestCase):
+
+    def test_smooth_curve_needs_fewer_points(self):
+        result = adaptive_sample(lambda x: x**2, -10, 10, max_points=1000)
+        self.assertLess(result.evaluations, 300)
+        self.assertEqual(result.discontinuities, 0)
+
+    def test_respects_point_budget(self):
+        result = adaptive_sample(lambda x: np.sin(1 / x), -1, 1, max_points=500)
+        self.assertLessEqual(result.evaluations, 500)
+
+    def test_breaks_line_at_poles(self):
+        result = adaptive_sample(np.tan, -10, 10, max_points=1000)
+        # tan has 6 poles in [-10, 10]
+        self.assertEqual(result.discontinuities, 6)
+        self.assertEqual(int(np.isnan(result.ys).sum()), 6)
+        self.assertIsNotNone(result.y_limits)
+
+    def test_steep_continuous_curve_is_not_broken(self):
+        result = adaptive_sample(lambda x: np.tanh(100 * x), -10, 10)
+        self.assertEqual(result.discontinuities, 0)
+
+    def test_reversed_range_is_refined(self):
+        forward = adaptive_sample(np.tan, -10, 10, max_points=1000)
+        reversed_range = adaptive_sample(np.tan, 10, -10, max_points=1000)
+        self.assertGreater(reversed_range.evaluations, 65)
+        self.assertEqual(reversed_range.discontinuities, 6)
+        np.testing.assert_array_equal(reversed_range.xs, forward.xs)
+
+    def test_plot_uses_adaptive_sampling_by_default(self):
+        plotter = ExpressionPlotter()
+        figure = plotter.create_plot("1/x")
+        line = figure.axes[0].get_lines()[0]
+        self.assertEqual(plotter.last_sample_stats['discontinuities'], 1)
+        self.assertTrue(np.isnan(line.get_ydata()).any())
+        self.assertLess(figure.axes[0].get_ylim()[1], 10)
+
+    def test_uniform_sampling_is_still_available(self):
+        plotter = ExpressionPlotter()
+        figure = plotter.create_plot("x**2", num_points=200, sampling="uniform")
+        self.assertEqual(len(figure.axes[0].get_lines()[0].get_xdata()), 200)
+
+
+class TestProgressivePlots(unittest.TestCase):
+
+    def setUp(self):
+        self.plotter = ExpressionPlotter()
+
+    def test_levels_double_up_to_requested_resolution(self):
+        self.assertEqual(lod_levels(400), [50, 100, 200, 400])
+        self.assertEqual(lod_levels(10), [10])
+
+    def test_non_progressive_plot_has_no_refinement(self):
+        figure = self.plotter.create_surface_plot("x*y")
+        self.assertFalse(hasattr(figure, "progressive_refinement"))
+
+    def test_surface_is_refined_to_full_resolution(self):
+        figure = self.plotter.create_surface_plot("sin(x)*cos(y)", num_points=60, progressive=True)
+        refinement = figure.progressive_refinement
+        refinement.start()
+        refinement.wait(10)
+        self.assertTrue(refinement.poll())
+        self.assertEqual(refinement.current_level, 60)
+        self.assertTrue(refinement.finished)
+        self.assertEqual(len(figure.axes[0].collections), 1)
+
+    def test_implicit_plot_swaps_contour(self):
+        figure = self.plotter.create_implicit_plot("x**2 + y**2 - 1", progressive=True)
+        first = figure.axes[0].collections[0]
+        refinement = figure.progressive_refinement
+        refinement.start()
+        refinement.wait(10)
+        refinement.poll()
+        self.assertEqual(refinement.current_level, 400)
+        self.assertNotIn(first, figure.axes[0].collections)
+
+    def test_cancelled_refinement_draws_nothing(self):
+        figure = self.plotter.create_implicit_plot("x**2 - y", progressive=True)
+        refinement = figure.progressive_refinement
+        refinement.cancel()
+        refinement.start()
+        refinement.wait(10)
+        self.assertFalse(refinement.poll())
+        self.assertTrue(refinement.finished)
+
+
+class TestImplicitTracer(unittest.TestCase):
+
+    def test_segments_lie_on_the_curve(self):
+        curve = trace_implicit(lambda x, y: x**2 + y**2 - 1, (-2, 2), (-2, 2))
+        points = curve.segments.reshape(-1, 2)
+        self.assertGreater(len(curve.segments), 100)
+        np.testing.assert_allclose(np.hypot(points[:, 0], points[:, 1]), 1, atol=1e-3)
+
+    def test_respects_evaluation_budget(self):
+        curve = trace_implicit(lambda x, y: np.sin(x * y) - 0.3, (-5, 5), (-5, 5), max_evaluations=5000)
+        self.assertLessEqual(curve.evaluations, 5000)
+        self.assertGreater(len(curve.segments), 0)
+
+    def test_finds_feature_smaller_than_the_coarse_grid(self):
+        # radius 0.05 circle between the nodes of the 32x32 starting grid
+        curve = trace_implicit(lambda x, y: (x - 0.13)**2 + (y - 0.07)**2 - 0.0025, (-5, 5), (-5, 5))
+        self.assertGreater(len(curve.segments), 0)
+
+    def test_empty_zero_set_stays_cheap(self):
+        curve = trace_implicit(lambda x, y: x**2 + y**2 + 1, (-5, 5), (-5, 5))
+        self.assertEqual(len(curve.segments), 0)
+        self.assertLess(curve.evaluations, 5000)
+
+    def test_pole_is_not_drawn(self):
+        curve = trace_implicit(lambda x, y: 1 / x - y, (-5, 5), (-5, 5))
+        points = curve.segments.reshape(-1, 2)
+        residual = np.abs(1 / points[:, 0] - points[:, 1])
+        self.assertLess(residual.max(), 0.1)
+
+    def test_plotter_quadtree_strategy(self):
+        plotter = ExpressionPlotter()
+        figure = plotter.create_implicit_plot("x**2 + y**2 - 1", strategy="quadtree", max_evaluations=8000)
+        self.assertIsInstance(figure, Figure)
+        self.assertLessEqual(plotter.last_sample_stats['evaluations'], 8000)
+        self.assertGreater(plotter.last_sample_stats['segments'], 0)
+
+    def test_unknown_strategy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ExpressionPlotter().create_implicit_plot("x - y", strategy="raytrace")
+
+
+class TestViewportResampler(unittest.TestCase):
+
+    def _wait_for_poll(self, resampler):
+        import time
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            if resampler.poll():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_zoom_resamples_visible_range(self):
+        figure = ExpressionPlotter().create_plot("sin(1/x)")
+        resampler = figure.viewport_resampler
+        line = figure.axes[0].get_lines()[0]
+
+        self.assertTrue(resampler.request(-0.1, 0.1))
+        resampler.start_pending()
+        self.assertTrue(self._wait_for_poll(resampler))
+        xs = line.get_xdata()
+        self.assertGreaterEqual(xs.min(), -0.2)
+        self.assertLessEqual(xs.max(), 0.2)
+        self.assertFalse(resampler.busy)
+
+    def test_small_pan_inside_sampled_margin_is_skipped(self):
+        figure = ExpressionPlotter().create_plot("x**2", x_range=(-10, 10))
+        resampler = figure.viewport_resampler
+        self.assertFalse(resampler.request(-8, 8))
+        self.assertTrue(resampler.request(-8, 12))
+
+    def test_only_newest_request_is_drawn(self):
+        figure = ExpressionPlotter().create_multi_plot(["sin(x)", "cos(x)"])
+        resampler = figure.viewport_resampler
+        resampler.request(-1, 1)
+        resampler.start_pending()
+        resampler.request(20, 30)
+        resampler.start_pending()
+        self.assertTrue(self._wait_for_poll(resampler))
+        for line, _f in resampler.curves:
+            self.assertGreater(line.get_xdata().min(), 15)
+
+    def test_reuses_compiled_function(self):
+        COMPILED_CACHE.clear()
+        figure = ExpressionPlotter().create_plot("x**3 - x")
+        resampler = figure.viewport_resampler
+        resampler.request(0, 1)
+        resampler.start_pending()
+        self._wait_for_poll(resampler)
+        self.assertEqual(COMPILED_CACHE.misses, 1)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+import sympy as sp
+
+from src.app.core.result_memo import ResultMemo
+from src.app.core.symbolic_engine import SymbolicEngine
+
+
+class TestResultMemo(unittest.TestCase):
+
+    def test_equal_inputs_share_a_key(self):
+        memo = ResultMemo()
+        x = sp.Symbol('x')
+        self.assertEqual(
+            memo.make_key('simplify', x + 1),
+            memo.make_key('simplify', sp.sympify("1 + x")),
+        )
+
+    def test_ignores_non_sympy_results(self):
+        memo = ResultMemo()
+        key = memo.make_key('integrate', sp.Symbol('x'), 'x')
+        memo.put(key, "Error occured")
+        self.assertEqual(len(memo), 0)
+
+    def test_evicts_when_over_memory_budget(self):
+        memo = ResultMemo(max_bytes=200)
+        for i in range(20):
+            expr = sp.sympify(f"x + {i}")
+            memo.put(memo.make_key('expand', expr), expr)
+        self.assertLessEqual(memo.total_bytes, 200)
+        self.assertLess(len(memo), 20)
+
+    def test_persists_to_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "memo.json")
+            memo = ResultMemo(persist_path=path)
+            expr = sp.sympify("sin(x)**2 + cos(x)**2")
+            key = memo.make_key('simplify', expr)
+            memo.put(key, sp.Integer(1))
+            memo.save()
+
+            reloaded = ResultMemo(persist_path=path)
+            self.assertEqual(reloaded.get(key), 1)
+
+    def test_save_clears_dirty_flag(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            memo = ResultMemo(persist_path=os.path.join(tmp, "memo.json"))
+            self.assertFalse(memo.dirty)
+            memo.put(memo.make_key('expand', sp.Symbol('x')), sp.Symbol('x'))
+            self.assertTrue(memo.dirty)
+            memo.save()
+            self.assertFalse(memo.dirty)
+
+
+class TestSymbolicEngineMemoization(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = SymbolicEngine()
+
+    def test_repeated_simplify_hits_memo(self):
+        first = self.engine.simplify("sin(x)**2 + cos(x)**2")
+        second = self.engine.simplify("cos(x)**2 + sin(x)**2")
+        self.assertEqual(first, 1)
+        self.assertIs(first, second)
+        self.assertEqual(self.engine.result_cache_stats()['hits'], 1)
+
+    def test_integrate_is_keyed_on_variable(self):
+        by_x = self.engine.integrate("x*y", "x")
+        by_y = self.engine.integrate("x*y", "y")
+        self.assertNotEqual(by_x, by_y)
+        self.assertEqual(self.engine.result_cache_stats()['entries'], 2)
+
+    def test_differentiate_uses_memo(self):
+        self.engine.differentiate("x**3", "x")
+        result = self.engine.differentiate("x**3", "x")
+        self.assertEqual(result, sp.sympify("3*x**2"))
+        self.assertEqual(self.engine.result_cache_stats()['hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from src.app.core.session import HistoryEntry, SessionManager
+from src.app.core.session_journal import SessionJournal
+
+
+def entry(number):
+    return HistoryEntry("simplify", f"x + {number}", f"x + {number}",
+                        timestamp=datetime(2024, 1, 1, 12, 0, number % 60), variables={"a": str(number)})
+
+
+class TestSessionJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "journal.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_backwards_in_pages(self):
+        journal = SessionJournal(self.path)
+        journal.block_size = 64  # several reads per page
+        offsets = [journal.append(entry(number).to_dict()) for number in range(10)]
+
+        page, reached_start = journal.read_before(journal.end_offset(), 4)
+        self.assertEqual([data["input_expr"] for _, data in page], ["x + 6", "x + 7", "x + 8", "x + 9"])
+        self.assertEqual([offset for offset, _ in page], offsets[6:])
+        self.assertFalse(reached_start)
+
+        page, reached_start = journal.read_before(offsets[6], 10)
+        self.assertEqual(len(page), 6)
+        self.assertTrue(reached_start)
+        journal.close()
+
+    def test_clear_and_compact(self):
+        journal = SessionJournal(self.path)
+        for number in range(5):
+            journal.append(entry(number).to_dict())
+        journal.clear()
+        for number in range(5, 8):
+            journal.append(entry(number).to_dict())
+
+        page, reached_start = journal.read_before(journal.end_offset(), 10)
+        self.assertEqual(len(page), 3)
+        self.assertTrue(reached_start)
+        size = journal.end_offset()
+
+        self.assertEqual(journal.compact(), 3)
+        self.assertLess(journal.end_offset(), size)
+        self.assertEqual(journal.dead_bytes, 0)
+        self.assertEqual([data["input_expr"] for _, data in journal.entries()], ["x + 5", "x + 6", "x + 7"])
+        self.assertEqual(journal.compact(keep_last=1), 1)
+        self.assertEqual([data["input_expr"] for _, data in journal.entries()], ["x + 7"])
+        journal.close()
+
+    def test_torn_record_is_dropped(self):
+        journal = SessionJournal(self.path)
+        journal.append(entry(1).to_dict())
+        journal.close()
+        with open(self.path, "ab") as f:
+            f.write(b'{"op": "add", "entry": {"operat')
+
+        journal = SessionJournal(self.path)
+        journal.append(entry(2).to_dict())
+        self.assertEqual([data["input_expr"] for _, data in journal.entries()], ["x + 1", "x + 2"])
+        journal.close()
+
+
+class TestSessionManagerJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "journal.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replays_only_the_tail(self):
+        session = SessionManager(max_history=5, journal_path=self.path)
+        for number in range(12):
+            session.add_entry(entry(number))
+        # older entries leave memory but not the journal
+        self.assertEqual([e.input_expr for e in session.history], [f"x + {n}" for n in range(7, 12)])
+        session.close()
+
+        session = SessionManager(max_history=5, journal_path=self.path)
+        restored = session.history[-1]
+        self.assertEqual((restored.operation, restored.result, restored.variables),
+                         ("simplify", "x + 11", {"a": "11"}))
+        self.assertEqual(restored.timestamp, datetime(2024, 1, 1, 12, 0, 11))
+        self.assertEqual(len(session.history), 5)
+
+        older = session.load_older(4)
+        self.assertEqual([e.input_expr for e in older], ["x + 3", "x + 4", "x + 5", "x + 6"])
+        self.assertEqual(session.history[0].input_expr, "x + 3")
+        self.assertTrue(session.has_older())
+        session.load_older()
+        self.assertFalse(session.has_older())
+        self.assertEqual(len(session.history), 12)
+        self.assertEqual(len(list(session.iter_history())), 12)
+        session.close()
+
+    def test_clear_history_survives_a_restart(self):
+        session = SessionManager(journal_path=self.path)
+        session.add_entry(entry(1))
+        session.clear_history()
+        session.add_entry(entry(2))
+        session.close()
+
+        session = SessionManager(journal_path=self.path)
+        self.assertEqual([e.input_expr for e in session.history], ["x + 2"])
+        self.assertFalse(session.has_older())
+        # closing compacted the cleared entry away
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 1)
+        session.close()
+
+    def test_without_journal(self):
+        session = SessionManager(max_history=2)
+        for number in range(4):
+            session.add_entry(entry(number))
+        self.assertEqual(len(session.history), 4)
+        self.assertEqual(session.load_older(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
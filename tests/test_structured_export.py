@@ -0,0 +1,117 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import numpy as np
+
+from src.app.core import history_export
+from src.app.core.history_export import ExportCancelled, export_latex, export_npz, read_npz, result_latex
+from src.app.core.math_formatter import MathFormatter
+from src.app.core.session import HistoryEntry, SessionManager
+
+
+def entries(count):
+    for number in range(count):
+        yield HistoryEntry("integrate", f"x^{number}", f"x**{number + 1}/{number + 1}",
+                           "x" if number % 2 else None, timestamp=datetime(2024, 1, 1, 12, 0, number % 60),
+                           variables={"a": str(number)} if number % 3 == 0 else None)
+
+
+class TestStructuredExport(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name)
+        self.session_manager = SessionManager()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def test_jsonl_round_trips(self):
+        filepath = self.session_manager.export_history("jsonl", "history", entries(10))
+        self.assertTrue(filepath.endswith(".jsonl"))
+        with open(filepath, encoding="utf-8") as f:
+            restored = [HistoryEntry.from_dict(json.loads(line)) for line in f]
+        self.assertEqual([entry.to_dict() for entry in restored], [entry.to_dict() for entry in entries(10)])
+
+    def test_csv(self):
+        filepath = self.session_manager.export_history("csv", "history", entries(3))
+        with open(filepath, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1]["optional_input_expr"], "x")
+        self.assertEqual(rows[0]["optional_input_expr"], "")
+        self.assertEqual(json.loads(rows[0]["variables"]), {"a": "0"})
+        self.assertEqual(rows[2]["timestamp"], "2024-01-01T12:00:02")
+
+    def test_latex_typesets_results(self):
+        filepath = self.session_manager.export_history("latex", "history", entries(3))
+        with open(filepath, encoding="utf-8") as f:
+            document = f.read()
+        self.assertTrue(document.startswith("\\documentclass"))
+        self.assertTrue(document.endswith("\\end{document}\n"))
+        self.assertEqual(document.count("\\item "), 3)
+        self.assertIn("\\texttt{x\\textasciicircum{}2}", document)
+        self.assertIn("$\\frac{x^{3}}{3}$", document)
+        # what doesn't parse is written as text
+        export_latex("odd.tex", [HistoryEntry("solve", "x", "no solution & (")])
+        with open("odd.tex", encoding="utf-8") as f:
+            self.assertIn("\\texttt{no solution \\& (}", f.read())
+
+    def test_latex_of_displayed_results(self):
+        # MainWindow records results as MathFormatter.to_display shows them
+        cases = {
+            "x**2 + 2*x + 1": "x^{2} + 2 x + 1",
+            "(x - 2)*(x + 2)": "\\left(x + 2\\right) \\left(x - 2\\right)",
+            "-y*cos(x)": "- y \\cos{\\left(x \\right)}",
+            "x**3/3": "\\frac{x^{3}}{3}",
+            "exp(x)*log(x)": "e^{x} \\log{\\left(x \\right)}",
+        }
+        for internal, latex in cases.items():
+            displayed = MathFormatter.to_display(internal)
+            self.assertEqual(result_latex(displayed), latex, displayed)
+        self.assertIsNone(result_latex("Error in input equation"))
+
+        export_latex("displayed.tex", [HistoryEntry("integrate", "x²", MathFormatter.to_display("x**3/3"))])
+        with open("displayed.tex", encoding="utf-8") as f:
+            document = f.read()
+        self.assertIn("$\\frac{x^{3}}{3}$", document)
+        self.assertNotIn("³", document.split("$\\Rightarrow$")[1])
+
+    def test_npz_columns_in_chunks(self):
+        with mock.patch.object(history_export, "CHUNK_ROWS", 7):
+            filepath = self.session_manager.export_history("npz", "history", entries(20))
+        columns = read_npz(filepath)
+        expected = [entry.to_dict() for entry in entries(20)]
+        self.assertEqual(columns["result"], [record["result"] for record in expected])
+        self.assertEqual(columns["optional_input_expr"][:2], [None, "x"])
+        self.assertEqual(columns["variables"][:2], [{"a": "0"}, {}])
+        self.assertEqual(columns["timestamp"][3], np.datetime64("2024-01-01T12:00:03"))
+        # plain history lines have no result or timestamp
+        export_npz("lines.npz", ["1 + 1 = 2"])
+        columns = read_npz("lines.npz")
+        self.assertEqual((columns["input_expr"], columns["result"]), (["1 + 1 = 2"], [None]))
+        self.assertTrue(np.isnat(columns["timestamp"][0]))
+
+    def test_cancel_writes_nothing(self):
+        cancel = threading.Event()
+        cancel.set()
+        for file_type in ("jsonl", "csv", "latex", "npz"):
+            with self.assertRaises(ExportCancelled):
+                self.session_manager.export_history(file_type, "history", entries(500), cancel=cancel)
+        self.assertEqual(os.listdir("HistoryFiles"), [])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.session_manager.export_history("xlsx", "history", entries(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from src.app.core.autocomplete.text_index import TextIndex
+from src.app.core.autocomplete.function_provider import FunctionProvider
+
+
+class TestTextIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.words = ["sin", "sinh", "asin", "cos", "Sqrt", "x**2 + {b}*x", "a_very_long_function_name"]
+        self.index = TextIndex(self.words)
+
+    def test_starting_with(self):
+        self.assertEqual(self.index.starting_with("sin"), [0, 1])
+        self.assertEqual(self.index.starting_with("S"), [0, 1, 4])
+        self.assertEqual(self.index.starting_with("tan"), [])
+        # longer than the trie depth
+        self.assertEqual(self.index.starting_with("a_very_long_function"), [6])
+        self.assertEqual(self.index.starting_with("a_very_long_fun_"), [])
+
+    def test_containing(self):
+        self.assertEqual(self.index.containing("sin"), [0, 1, 2])
+        self.assertEqual(self.index.containing("s"), [0, 1, 2, 3, 4])
+        self.assertEqual(self.index.containing("**2 + "), [5])
+        self.assertEqual(self.index.containing("function_name"), [6])
+        self.assertEqual(self.index.containing("sinx"), [])
+
+    def test_matches_a_linear_scan(self):
+        for word in self.words:
+            for start in range(len(word)):
+                for end in range(start + 1, len(word) + 1):
+                    query = word[start:end].lower()
+                    expected = [i for i, w in enumerate(self.words) if query in w.lower()]
+                    self.assertEqual(self.index.containing(query), expected)
+                    expected = [i for i, w in enumerate(self.words) if w.lower().startswith(query)]
+                    self.assertEqual(self.index.starting_with(query), expected)
+
+
+class TestIndexedProviders(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.provider = FunctionProvider()
+        cls.store = cls.provider.pattern_store
+
+    def linear_find(self, text):
+        text = text.lower().strip()
+        matches = [pattern for pattern in self.store.patterns if self.store._matches_text(text, pattern)]
+        return sorted(matches, key=lambda pattern: (self.store._similarity_score(text, pattern), pattern.commonness),
+                      reverse=True)
+
+    def test_pattern_lookup_matches_a_linear_scan(self):
+        for query in ["q", "quad", "x**2", "sin(", "Deriv", "(x + ", "zzz", " ln "]:
+            self.assertEqual(self.store.find_matching_patterns(query), self.linear_find(query), query)
+
+    def test_function_and_constant_suggestions(self):
+        names = [s.text for s in self.provider._build_function_suggestions("sin")]
+        self.assertEqual(names, ["sin", "asin", "sinh", "asinh"])
+        self.assertEqual([s.text for s in self.provider._build_constant_suggestions("p")], ["pi", "phi"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import threading
+import time
+import unittest
+
+import sympy as sp
+
+from src.app.core.symbolic_engine import SymbolicEngine
+from src.app.core.time_budget import BudgetExceeded, run_with_budget
+
+
+def spin(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+    return "done"
+
+
+class TestRunWithBudget(unittest.TestCase):
+
+    def test_returns_result_within_budget(self):
+        self.assertEqual(run_with_budget(lambda: 42, 1.0), 42)
+
+    def test_no_budget_means_no_limit(self):
+        self.assertEqual(run_with_budget(lambda: spin(0.05), None), "done")
+
+    def test_raises_when_budget_exceeded(self):
+        with self.assertRaises(BudgetExceeded):
+            run_with_budget(lambda: spin(2), 0.05)
+
+    def test_budget_outside_main_thread(self):
+        outcome = []
+
+        def target():
+            try:
+                run_with_budget(lambda: spin(1), 0.05)
+            except BudgetExceeded:
+                outcome.append("exceeded")
+
+        worker = threading.Thread(target=target)
+        worker.start()
+        worker.join()
+        self.assertEqual(outcome, ["exceeded"])
+
+
+class TestEngineFallbacks(unittest.TestCase):
+
+    def test_simplify_falls_back_when_out_of_time(self):
+        engine = SymbolicEngine()
+        engine.set_time_budget('simplify', 0.05)
+        result, strategy, partial = engine._run_with_fallbacks(
+            'simplify', lambda: spin(2), (('cancel', lambda: sp.Integer(1)),))
+        self.assertEqual((result, strategy, partial), (1, 'cancel', True))
+
+    def test_partial_results_are_not_memoized(self):
+        engine = SymbolicEngine(time_budgets={'integrate': 0.001})
+        engine.integrate("exp(-x**2)*sin(x)**3/(1 + x**4)", "x")
+        self.assertTrue(engine.last_evaluation['partial'])
+        self.assertEqual(engine.result_cache_stats()['entries'], 0)
+
+    def test_full_result_within_budget(self):
+        engine = SymbolicEngine()
+        self.assertEqual(engine.simplify("sin(x)**2 + cos(x)**2"), 1)
+        self.assertEqual(engine.last_evaluation, {'operation': 'simplify', 'strategy': 'full', 'partial': False})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from src.app.core.symbolic_engine import SymbolicEngine
+from src.app.core.warmup import BackgroundWarmup, load_corpus, warm_up
+
+
+class TestWarmup(unittest.TestCase):
+
+    def test_corpus_comes_from_pattern_templates(self):
+        corpus = load_corpus(limit=10)
+        self.assertEqual(len(corpus), 10)
+        self.assertTrue(all("{" not in text for text in corpus))
+        self.assertIn("m*x + b", corpus)  # the most common template
+
+    def test_invalid_templates_are_skipped(self):
+        stats = warm_up(SymbolicEngine(), ["x + x", "f'(x)", "(x + 1)**2"])
+        self.assertEqual(stats["evaluated"], 2)
+        self.assertEqual(stats["failed"], 1)
+
+    def test_stops_when_asked(self):
+        stats = warm_up(SymbolicEngine(), ["x", "y", "z"], should_stop=lambda: True)
+        self.assertEqual(stats["parsed"], 0)
+
+    def test_background_warmup_finishes(self):
+        warmup = BackgroundWarmup(["x**2 - 1", "sin(x)**2 + cos(x)**2"])
+        warmup.start()
+        self.assertTrue(warmup.wait(30))
+        self.assertEqual(warmup.stats["evaluated"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()